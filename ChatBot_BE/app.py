@@ -1,4 +1,5 @@
 from fastapi import FastAPI, HTTPException, Request, APIRouter
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import os
@@ -12,11 +13,30 @@ import re
 from typing import List, Dict, Optional
 from resume_manager.fetcher import SharePointFetcher
 from resume_manager.parser import ResumeParser
+from resume_manager.parse_cache import ParsedTextCache
+from resume_manager.chunker import ResumeChunker
+from resume_manager.numpy_index import NumpyVectorIndex
+from resume_manager.bm25_index import BM25Index, tokenize
+from resume_manager.profile_extractor import (
+    PROFILE_VERSION, extract_profile, build_resume_filter, infer_resume_filter_args
+)
+from resume_manager.progress import IngestionProgress, IngestionCancelled
 import chromadb
 from chromadb.api.types import EmbeddingFunction
 import hashlib
 import logging
-from openai import AzureOpenAI
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from openai_clients.registry import AzureOpenAIClientRegistry
+from openai_clients.embedding_cache import EmbeddingCache
+from openai_clients.gateway import AzureOpenAIGateway
+from intent_classifier.model import IntentClassifier
+from cache.lru import LRUTTLCache
+from sql_connector.pool import SqlConnectionPool, CachedAccessToken, encode_access_token, SQL_COPT_SS_ACCESS_TOKEN
+from sql_connector.schema_catalog import SchemaCatalog
+from sql_connector.rbac_resolver import RBACResolver, accessible_objects_for_role
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 logging.basicConfig(level=logging.INFO)
@@ -48,6 +68,64 @@ SHAREPOINT_DOMAIN = os.getenv("SHAREPOINT_DOMAIN")
 SHAREPOINT_SITE_NAME = os.getenv("SHAREPOINT_SITE_NAME")
 SHAREPOINT_FOLDER_PATH = os.getenv("SHAREPOINT_FOLDER_PATH")
 
+RESUME_PARSE_WORKERS = int(os.getenv("RESUME_PARSE_WORKERS", str(os.cpu_count() or 1)))
+RESUME_PARSE_TIMEOUT = float(os.getenv("RESUME_PARSE_TIMEOUT", "120"))
+INGESTION_MAX_ATTEMPTS = int(os.getenv("INGESTION_MAX_ATTEMPTS", "5"))
+INGESTION_RETRY_BASE_SECONDS = float(os.getenv("INGESTION_RETRY_BASE_SECONDS", "30"))
+INGESTION_RETRY_MAX_SECONDS = float(os.getenv("INGESTION_RETRY_MAX_SECONDS", "900"))
+SQL_POOL_SIZE = int(os.getenv("SQL_POOL_SIZE", "10"))
+SQL_POOL_MAX_IDLE_SECONDS = float(os.getenv("SQL_POOL_MAX_IDLE_SECONDS", "300"))
+SQL_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("SQL_POOL_HEALTH_CHECK_INTERVAL", "30"))
+SQL_TOKEN_REFRESH_MARGIN = float(os.getenv("SQL_TOKEN_REFRESH_MARGIN", "300"))
+SCHEMA_CATALOG_REFRESH_SECONDS = float(os.getenv("SCHEMA_CATALOG_REFRESH_SECONDS", "60"))
+RBAC_CACHE_TTL_SECONDS = float(os.getenv("RBAC_CACHE_TTL_SECONDS", "300"))
+BLOCKING_IO_WORKERS = int(os.getenv("BLOCKING_IO_WORKERS", "32"))
+# Client-side quota shaping for Azure OpenAI; 0 disables a limit
+AZURE_OPENAI_TPM_LIMIT = float(os.getenv("AZURE_OPENAI_TPM_LIMIT", "120000"))
+AZURE_OPENAI_RPM_LIMIT = float(os.getenv("AZURE_OPENAI_RPM_LIMIT", "720"))
+EMBEDDING_TPM_LIMIT = float(os.getenv("EMBEDDING_TPM_LIMIT", "240000"))
+EMBEDDING_RPM_LIMIT = float(os.getenv("EMBEDDING_RPM_LIMIT", "1440"))
+AZURE_OPENAI_MAX_CONCURRENCY = int(os.getenv("AZURE_OPENAI_MAX_CONCURRENCY", "16"))
+AZURE_OPENAI_QUEUE_MAX_WAIT = float(os.getenv("AZURE_OPENAI_QUEUE_MAX_WAIT", "10"))
+# Local intent model (scripts/train_intent_classifier.py); below the threshold the LLM classifies
+INTENT_MODEL_PATH = os.getenv("INTENT_MODEL_PATH", "intent_model.npz")
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.85"))
+INTENT_SHADOW_SAMPLE_RATE = float(os.getenv("INTENT_SHADOW_SAMPLE_RATE", "0.05"))
+# LLM-labelled user messages for retraining; they are raw user input, so logging is off
+# unless a path is set, and the file is rotated once it reaches the size limit
+INTENT_TRAFFIC_LOG = os.getenv("INTENT_TRAFFIC_LOG", "")
+INTENT_TRAFFIC_LOG_MAX_BYTES = int(os.getenv("INTENT_TRAFFIC_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+# Stages chatbot-router starts while classification is in flight: "resume_search" (query
+# embedding + retrieval) and/or "table_guess" (one extra LLM call). Off by default: a
+# discarded branch still spends embedding/LLM quota and an executor slot.
+ROUTER_SPECULATION = [branch.strip() for branch in os.getenv("ROUTER_SPECULATION", "").split(",") if branch.strip()]
+# Branches only start when the local intent model rates their intent at least this likely
+ROUTER_SPECULATION_MIN_PROBABILITY = float(os.getenv("ROUTER_SPECULATION_MIN_PROBABILITY", "0.3"))
+SHAREPOINT_DOWNLOAD_CONCURRENCY = int(os.getenv("SHAREPOINT_DOWNLOAD_CONCURRENCY", "8"))
+SHAREPOINT_DELTA_SYNC = os.getenv("SHAREPOINT_DELTA_SYNC", "true").lower() == "true"
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "100000"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "500"))
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "512"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "64"))
+CHUNK_POOLING = os.getenv("CHUNK_POOLING", "max")
+CHUNK_OVERSAMPLE = int(os.getenv("CHUNK_OVERSAMPLE", "4"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3")
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "4096"))
+QUERY_EMBEDDING_CACHE_TTL = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "86400"))
+SEARCH_RESULT_CACHE_SIZE = int(os.getenv("SEARCH_RESULT_CACHE_SIZE", "1024"))
+SEARCH_RESULT_CACHE_TTL = float(os.getenv("SEARCH_RESULT_CACHE_TTL", "900"))
+BM25_INDEX_PATH = os.getenv("BM25_INDEX_PATH", "bm25_index.sqlite3")
+RESUME_SEARCH_MODE = os.getenv("RESUME_SEARCH_MODE", "auto")
+KEYWORD_QUERY_MAX_TERMS = int(os.getenv("KEYWORD_QUERY_MAX_TERMS", "3"))
+# Terms that are looked up rather than described: letters mixed with digits or symbols (c#, asp.net, req1024)
+LOOKUP_TOKEN_PATTERN = re.compile(r"^(?=.*[a-z])(?=.*[0-9#+.]).+$")
+ACRONYM_PATTERN = re.compile(r"\b[A-Z][A-Z0-9]+\b")
+RRF_K = int(os.getenv("RRF_K", "60"))
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "chroma")
+NUMPY_INDEX_PATH = os.getenv("NUMPY_INDEX_PATH", "numpy_index")
+NUMPY_INDEX_QUANTIZATION = os.getenv("NUMPY_INDEX_QUANTIZATION", "float32")
+
 logger.info("Environment variables loaded:")
 logger.info(f"SQL_SERVER: {SQL_SERVER}")
 logger.info(f"SQL_DATABASE: {SQL_DATABASE}")
@@ -83,114 +161,46 @@ missing_vars = [var for var in required_vars if not os.getenv(var)]
 if missing_vars:
     raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
-def validate_azure_openai_config(api_key: str, endpoint: str, api_version: str, model: str) -> tuple[bool, str]:
-    """
-    Validate Azure OpenAI API key and endpoint by checking format and making a test request.
-    Returns (is_valid, error_message).
-    """
-    if not api_key or not re.match(r'^[0-9a-fA-F]{32}$', api_key):
-        error_msg = "Invalid Azure OpenAI API key format. It should be a 32-character hexadecimal string."
-        logger.error(error_msg)
-        return False, error_msg
-
-    endpoint_pattern = r'^https://[a-z0-9-]+\.openai\.azure\.com/?$'
-    if not endpoint or not re.match(endpoint_pattern, endpoint):
-        error_msg = f"Invalid Azure OpenAI endpoint format: {endpoint}. Expected format: https://<resource-name>.openai.azure.com/."
-        logger.error(error_msg)
-        return False, error_msg
-
-    test_url = f"{endpoint.rstrip('/')}/openai/deployments/{model}/embeddings?api-version={api_version}"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    body = {"input": "Test embedding"}
-    try:
-        response = requests.post(test_url, headers=headers, json=body, timeout=10)
-        if response.status_code == 200:
-            logger.info(f"Azure OpenAI endpoint validated successfully: {endpoint}")
-            return True, ""
-        elif response.status_code == 401:
-            error_msg = "Authentication failed: Invalid Azure OpenAI API key."
-            logger.error(error_msg)
-            return False, error_msg
-        elif response.status_code == 404:
-            error_msg = f"Endpoint or model not found: {endpoint}/{model}."
-            logger.error(error_msg)
-            return False, error_msg
-        else:
-            error_msg = f"Failed to access Azure OpenAI endpoint: {endpoint}. Status code: {response.status_code}, Response: {response.text}."
-            logger.error(error_msg)
-            return False, error_msg
-    except requests.exceptions.RequestException as e:
-        error_msg = f"Error connecting to Azure OpenAI endpoint {endpoint}: {str(e)}."
-        logger.error(error_msg)
-        return False, error_msg
-
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=2, max=10),
-    retry=retry_if_exception_type(Exception)
-)
-def initialize_azure_openai_client(api_key: str, endpoint: str, api_version: str) -> AzureOpenAI:
-    """Initialize Azure OpenAI client with retry logic."""
-    return AzureOpenAI(
-        api_key=api_key,
-        api_version=api_version,
-        azure_endpoint=endpoint
-    )
+# Request handlers are async; pyodbc, requests, chromadb and the sync AzureOpenAI client
+# are not. Their calls run on this bounded pool so one slow call never blocks the event loop.
+blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_IO_WORKERS, thread_name_prefix="blocking-io")
 
-embedding_client = None
-is_embedding_enabled = False
-embedding_error = None
-try:
-    is_valid, validation_error = validate_azure_openai_config(
-        EMBEDDING_API_KEY,
-        EMBEDDING_ENDPOINT,
-        EMBEDDING_API_VERSION,
-        EMBEDDING_MODEL
-    )
-    if not is_valid:
-        raise ValueError(validation_error)
+async def run_blocking(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_executor, functools.partial(func, *args, **kwargs))
 
-    embedding_client = initialize_azure_openai_client(
-        EMBEDDING_API_KEY,
-        EMBEDDING_ENDPOINT,
-        EMBEDDING_API_VERSION
-    )
-    logger.info("AzureOpenAI embedding client initialized successfully")
-    is_embedding_enabled = True
-except Exception as e:
-    embedding_error = str(e)
-    logger.error(f"Failed to initialize AzureOpenAI embedding client: {embedding_error}")
-    embedding_client = None
-    is_embedding_enabled = False
-
-general_client = None
-is_general_enabled = False
-general_error = None
-try:
-    is_valid, validation_error = validate_azure_openai_config(
-        AZURE_OPENAI_API_KEY,
-        AZURE_OPENAI_ENDPOINT,
-        AZURE_OPENAI_API_VERSION,
-        DEFAULT_MODEL
-    )
-    if is_valid:
-        general_client = initialize_azure_openai_client(
-            AZURE_OPENAI_API_KEY,
-            AZURE_OPENAI_ENDPOINT,
-            AZURE_OPENAI_API_VERSION
-        )
-        logger.info("AzureOpenAI general client initialized successfully")
-        is_general_enabled = True
-    else:
-        raise ValueError(validation_error)
-except Exception as e:
-    general_error = str(e)
-    logger.error(f"Failed to initialize AzureOpenAI general client: {general_error}")
-    general_client = None
-    is_general_enabled = False
+openai_clients = AzureOpenAIClientRegistry(
+    ttl_seconds=float(os.getenv("AZURE_OPENAI_VALIDATION_TTL", "3600")),
+    retry_seconds=float(os.getenv("AZURE_OPENAI_VALIDATION_RETRY", "60"))
+)
+openai_clients.register(
+    "embedding",
+    EMBEDDING_API_KEY,
+    EMBEDDING_ENDPOINT,
+    EMBEDDING_API_VERSION,
+    EMBEDDING_MODEL
+)
+openai_clients.register(
+    "general",
+    AZURE_OPENAI_API_KEY,
+    AZURE_OPENAI_ENDPOINT,
+    AZURE_OPENAI_API_VERSION,
+    DEFAULT_MODEL
+)
+chat_gateway = AzureOpenAIGateway(
+    openai_clients, "general",
+    tpm_limit=AZURE_OPENAI_TPM_LIMIT,
+    rpm_limit=AZURE_OPENAI_RPM_LIMIT,
+    max_concurrency=AZURE_OPENAI_MAX_CONCURRENCY,
+    max_queue_wait=AZURE_OPENAI_QUEUE_MAX_WAIT
+)
+embedding_gateway = AzureOpenAIGateway(
+    openai_clients, "embedding",
+    tpm_limit=EMBEDDING_TPM_LIMIT,
+    rpm_limit=EMBEDDING_RPM_LIMIT,
+    max_concurrency=AZURE_OPENAI_MAX_CONCURRENCY,
+    max_queue_wait=AZURE_OPENAI_QUEUE_MAX_WAIT
+)
 
 app = FastAPI()
 router = APIRouter()
@@ -203,23 +213,33 @@ app.add_middleware(
 )
 
 class AzureOpenAIEmbeddingFunction(EmbeddingFunction):
-    def __init__(self, api_key: str, endpoint: str, model: str, api_version: str):
-        if not is_embedding_enabled:
-            raise ValueError("Embedding functionality is disabled due to Azure OpenAI client initialization failure.")
-        self.client = embedding_client
+    def __init__(self, model: str, cache: Optional[EmbeddingCache] = None):
         self.model = model
+        self.cache = cache
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        embeddings = self.cache.get_many(self.model, input) if self.cache else [None] * len(input)
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if misses:
+            miss_texts = [input[i] for i in misses]
+            generated = self._embed_remote(miss_texts)
+            for i, embedding in zip(misses, generated):
+                embeddings[i] = embedding
+            if self.cache:
+                self.cache.put_many(self.model, miss_texts, generated)
+        logger.info(f"Embeddings for {len(input)} inputs: {len(input) - len(misses)} from cache, {len(misses)} generated")
+        return embeddings
 
     @retry(
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=1, min=4, max=60),
         retry=retry_if_exception_type(Exception)
     )
-    def __call__(self, input: List[str]) -> List[List[float]]:
+    def _embed_remote(self, input: List[str]) -> List[List[float]]:
+        if not openai_clients.is_enabled("embedding"):
+            raise ValueError(f"Embedding functionality is disabled due to Azure OpenAI client initialization failure: {openai_clients.error('embedding')}")
         try:
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=input
-            )
+            response = embedding_gateway.embed_sync(self.model, input)
             embeddings = [item.embedding for item in response.data]
             logger.info(f"Generated embeddings for {len(input)} inputs")
             return embeddings
@@ -229,29 +249,45 @@ class AzureOpenAIEmbeddingFunction(EmbeddingFunction):
 
 class VectorDBManager:
     def __init__(self, db_path="vector_db", collection_name="resumes"):
-        self.client = chromadb.PersistentClient(path=db_path)
+        self.client = None
         self.embedding_function = None
         self.collection = None
-        if is_embedding_enabled:
-            try:
-                self.embedding_function = AzureOpenAIEmbeddingFunction(
-                    api_key=EMBEDDING_API_KEY,
-                    endpoint=EMBEDDING_ENDPOINT,
-                    model=EMBEDDING_MODEL,
-                    api_version=EMBEDDING_API_VERSION
+        try:
+            # The embedding client is resolved lazily on each call, so the collection
+            # can be opened even while Azure OpenAI is still being validated.
+            self.embedding_function = AzureOpenAIEmbeddingFunction(
+                model=EMBEDDING_MODEL,
+                cache=EmbeddingCache(EMBEDDING_CACHE_PATH) if EMBEDDING_CACHE_PATH else None
+            )
+            if VECTOR_INDEX_BACKEND == "numpy":
+                # Chroma-compatible exact index over a memory-mapped matrix shared by all workers
+                self.collection = NumpyVectorIndex(
+                    os.path.join(NUMPY_INDEX_PATH, collection_name),
+                    quantization=NUMPY_INDEX_QUANTIZATION
                 )
+            else:
+                self.client = chromadb.PersistentClient(path=db_path)
                 self.collection = self.client.get_or_create_collection(
                     name=collection_name,
                     embedding_function=self.embedding_function
                 )
-                logger.info(f"VectorDBManager initialized with collection: {collection_name}")
-            except Exception as e:
-                logger.error(f"Failed to initialize VectorDBManager: {str(e)}")
-                self.embedding_function = None
-                self.collection = None
-        else:
-            logger.warning("VectorDBManager initialized without embedding functionality.")
-        self.max_tokens = 8192
+            logger.info(f"VectorDBManager initialized with {VECTOR_INDEX_BACKEND} collection: {collection_name}")
+        except Exception as e:
+            logger.error(f"Failed to initialize VectorDBManager: {str(e)}")
+            self.embedding_function = None
+            self.collection = None
+        self.chunker = ResumeChunker(max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS)
+        self.chunk_pooling = CHUNK_POOLING
+        self.chunk_oversample = CHUNK_OVERSAMPLE
+        self.embedding_batch_tokens = EMBEDDING_BATCH_TOKENS
+        self.embedding_batch_size = EMBEDDING_BATCH_SIZE
+        self.upsert_batch_size = UPSERT_BATCH_SIZE
+        self.query_embedding_cache = LRUTTLCache(maxsize=QUERY_EMBEDDING_CACHE_SIZE, ttl=QUERY_EMBEDDING_CACHE_TTL)
+        self.search_result_cache = LRUTTLCache(maxsize=SEARCH_RESULT_CACHE_SIZE, ttl=SEARCH_RESULT_CACHE_TTL)
+        self.keyword_index = BM25Index(BM25_INDEX_PATH)
+        self.search_mode = RESUME_SEARCH_MODE
+        self.keyword_query_max_terms = KEYWORD_QUERY_MAX_TERMS
+        self.rrf_k = RRF_K
 
     def compute_file_hash(self, content: str):
         hasher = hashlib.sha256()
@@ -262,72 +298,410 @@ class VectorDBManager:
         return len(text) // 4
 
     def embed_resume(self, file_id: str, content: str, metadata: Dict):
-        if not self.collection or not is_embedding_enabled:
-            logger.warning(f"Skipping embedding for {file_id}: Embedding functionality is disabled.")
-            return False
-        try:
-            token_count = self.estimate_tokens(content)
-            if token_count > self.max_tokens:
-                logger.warning(f"Content for {file_id} exceeds {self.max_tokens} tokens ({token_count}). Truncating.")
-                content = content[:self.max_tokens * 4]
-                token_count = self.estimate_tokens(content)
-                logger.info(f"Truncated content to {token_count} tokens.")
-
-            file_hash = self.compute_file_hash(content)
-            existing = self.collection.get(ids=[file_id])
-            if existing['ids'] and existing['metadatas'][0].get('file_hash') == file_hash:
-                logger.info(f"Skipping unchanged resume: {metadata['file_name']}")
-                return False
-
-            self.collection.upsert(
-                documents=[content],
-                metadatas=[{**metadata, 'file_hash': file_hash}],
-                ids=[file_id]
-            )
-            logger.info(f"Embedded resume: {metadata['file_name']} ({token_count} tokens)")
-            return True
-        except Exception as e:
-            logger.error(f"Error embedding resume {file_id}: {str(e)}")
-            return False
-
-    def embed_resumes(self, parsed_resumes: Dict[str, str], metadata_manager):
-        if not is_embedding_enabled:
-            logger.warning("Embedding skipped: Azure OpenAI embedding client is not initialized.")
-            return 0
-        embedded_count = 0
+        return self.index_resumes({file_id: (content, metadata)}) > 0
+
+    def batch_by_token_budget(self, documents: List[str]):
+        """Yield lists of indexes into documents, each list fitting one embedding request."""
+        batch = []
+        batch_tokens = 0
+        for i, document in enumerate(documents):
+            tokens = self.estimate_tokens(document)
+            if batch and (batch_tokens + tokens > self.embedding_batch_tokens or len(batch) >= self.embedding_batch_size):
+                yield batch
+                batch = []
+                batch_tokens = 0
+            batch.append(i)
+            batch_tokens += tokens
+        if batch:
+            yield batch
+
+    def embed_resumes(self, parsed_resumes: Dict[str, str], metadata_manager, should_stop=None):
+        resumes = {}
+        resume_metadata = metadata_manager.get_many(parsed_resumes)
         for file_id, content in parsed_resumes.items():
-            file_metadata = metadata_manager.metadata.get(file_id)
+            file_metadata = resume_metadata.get(file_id)
             if not file_metadata:
                 logger.warning(f"No metadata found for file ID: {file_id}")
                 continue
-            file_metadata['file_id'] = file_id
-            logger.info(f"Metadata for {file_id}: {file_metadata}")
-            if self.embed_resume(file_id, content, file_metadata):
-                embedded_count += 1
+            resumes[file_id] = (content, file_metadata)
+        embedded_count = self.index_resumes(resumes, should_stop)
         logger.info(f"Total resumes embedded: {embedded_count}")
         return embedded_count
 
-    def search_resumes(self, query: str, n_results: int = 5):
-        if not self.collection or not is_embedding_enabled:
-            error_detail = f"Resume search is unavailable. Embedding client not initialized. Error details: {embedding_error}"
+    def index_resumes(self, resumes: Dict[str, tuple], should_stop=None):
+        """
+        Chunk and index resumes given as {file_id: (content, metadata)}.
+
+        Each resume is stored as chunks with ids "<file_id>::<chunk_index>" and a
+        `file_id` metadata pointing at the parent file. Unchanged files are skipped
+        with a single bulk `get`; for changed files, chunks whose text is unchanged
+        reuse their stored embedding and only new chunk text is sent for embedding.
+        The BM25 keyword index is updated first, even when embedding is unavailable.
+        Returns the number of files that were (re)embedded. When `should_stop()` turns
+        true, remaining batches are skipped and their files are retried on the next run.
+        """
+        self.update_keyword_index(resumes)
+        if not self.collection or not openai_clients.is_enabled("embedding"):
+            logger.warning("Embedding skipped: Azure OpenAI embedding client is not initialized.")
+            return 0
+        if not resumes:
+            return 0
+
+        existing = self.collection.get(where={"file_id": {"$in": list(resumes)}}, include=['metadatas'])
+        existing_chunks = {}
+        for chunk_id, chunk_metadata in zip(existing['ids'], existing['metadatas']):
+            chunk_metadata = chunk_metadata or {}
+            existing_chunks.setdefault(chunk_metadata.get('file_id', chunk_id), {})[chunk_id] = chunk_metadata
+
+        ids, documents, metadatas = [], [], []
+        reuse_from = {}
+        stale_ids = []
+        for file_id, (content, metadata) in resumes.items():
+            file_hash = self.compute_file_hash(content)
+            old_chunks = existing_chunks.get(file_id, {})
+            if old_chunks and all(
+                chunk_metadata.get('file_hash') == file_hash
+                and chunk_metadata.get('chunk_count') == len(old_chunks)
+                and chunk_metadata.get('profile_version') == PROFILE_VERSION
+                for chunk_metadata in old_chunks.values()
+            ):
+                logger.info(f"Skipping unchanged resume: {metadata.get('file_name', file_id)}")
+                continue
+
+            old_by_hash = {
+                chunk_metadata['chunk_hash']: chunk_id
+                for chunk_id, chunk_metadata in old_chunks.items() if chunk_metadata.get('chunk_hash')
+            }
+            profile = extract_profile(file_id, content)
+            chunks = self.chunker.chunk(content)
+            new_ids = set()
+            for chunk_index, chunk in enumerate(chunks):
+                chunk_id = f"{file_id}::{chunk_index}"
+                chunk_hash = self.compute_file_hash(chunk)
+                if chunk_hash in old_by_hash:
+                    reuse_from[len(ids)] = old_by_hash[chunk_hash]
+                new_ids.add(chunk_id)
+                ids.append(chunk_id)
+                documents.append(chunk)
+                metadatas.append({
+                    **metadata,
+                    **profile,
+                    'file_id': file_id,
+                    'file_hash': file_hash,
+                    'chunk_index': chunk_index,
+                    'chunk_count': len(chunks),
+                    'chunk_hash': chunk_hash
+                })
+            stale_ids.extend(chunk_id for chunk_id in old_chunks if chunk_id not in new_ids)
+
+        changed_files = {metadata['file_id'] for metadata in metadatas}
+        if not ids:
+            if stale_ids:
+                self.collection.delete(ids=stale_ids)
+                self.invalidate_search_cache()
+            return 0
+
+        embeddings = [None] * len(ids)
+        if reuse_from:
+            reused = self.collection.get(ids=list(set(reuse_from.values())), include=['embeddings'])
+            reused_embeddings = dict(zip(reused['ids'], reused['embeddings']))
+            for i, source_id in reuse_from.items():
+                if source_id in reused_embeddings:
+                    embeddings[i] = list(reused_embeddings[source_id])
+        to_embed = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        logger.info(f"{len(resumes) - len(changed_files)} unchanged resumes skipped; "
+                    f"{len(changed_files)} changed resumes have {len(ids)} chunks, {len(to_embed)} need embedding.")
+
+        failed_files = set()
+        for batch in self.batch_by_token_budget([documents[i] for i in to_embed]):
+            batch = [to_embed[i] for i in batch]
+            if should_stop is not None and should_stop():
+                failed_files.update(metadatas[i]['file_id'] for i in batch)
+                continue
+            try:
+                for i, embedding in zip(batch, self.embedding_function([documents[i] for i in batch])):
+                    embeddings[i] = embedding
+            except Exception as e:
+                logger.error(f"Error embedding batch of {len(batch)} chunks: {str(e)}")
+                failed_files.update(metadatas[i]['file_id'] for i in batch)
+
+        # Chunks of a file that failed to embed keep their old file_hash (or go missing),
+        # so that file is picked up again by the next run.
+        ready = [i for i, embedding in enumerate(embeddings) if embedding is not None]
+        for start in range(0, len(ready), self.upsert_batch_size):
+            batch = ready[start:start + self.upsert_batch_size]
+            try:
+                self.collection.upsert(
+                    ids=[ids[i] for i in batch],
+                    documents=[documents[i] for i in batch],
+                    metadatas=[metadatas[i] for i in batch],
+                    embeddings=[embeddings[i] for i in batch]
+                )
+            except Exception as e:
+                logger.error(f"Error upserting batch of {len(batch)} chunks: {str(e)}")
+                failed_files.update(metadatas[i]['file_id'] for i in batch)
+        if stale_ids:
+            self.collection.delete(ids=stale_ids)
+        if ready or stale_ids:
+            self.invalidate_search_cache()
+        return len(changed_files - failed_files)
+
+    def aggregate_chunk_hits(self, chunk_results, pooling: str):
+        """
+        Collapse chunk-level query results into one ranked hit per candidate file.
+        "max" pooling ranks a candidate by its best chunk; "sum" adds the
+        (non-negative) similarities of all its matching chunks. Each hit keeps the
+        best chunk as its document. Returns [(file_id, candidate)], best first.
+        """
+        candidates = {}
+        for chunk_id, document, metadata, distance in zip(
+            chunk_results['ids'][0],
+            chunk_results['documents'][0],
+            chunk_results['metadatas'][0],
+            chunk_results['distances'][0]
+        ):
+            metadata = metadata or {}
+            file_id = metadata.get('file_id', chunk_id)
+            similarity = max(0.0, 1 - distance)
+            candidate = candidates.get(file_id)
+            if candidate is None:
+                candidates[file_id] = {
+                    'document': document,
+                    'metadata': metadata,
+                    'distance': distance,
+                    'score': similarity
+                }
+                continue
+            if pooling == "sum":
+                candidate['score'] += similarity
+            else:
+                candidate['score'] = max(candidate['score'], similarity)
+            if distance < candidate['distance']:
+                candidate.update(document=document, metadata=metadata, distance=distance)
+
+        return sorted(candidates.items(), key=lambda item: item[1]['score'], reverse=True)
+
+    @staticmethod
+    def to_query_result(ranked):
+        """Shape ranked hits like a Chroma query result, plus the ranking `scores`."""
+        return {
+            'ids': [[file_id for file_id, _ in ranked]],
+            'documents': [[candidate['document'] for _, candidate in ranked]],
+            'metadatas': [[candidate['metadata'] for _, candidate in ranked]],
+            'distances': [[candidate['distance'] for _, candidate in ranked]],
+            'scores': [[candidate['score'] for _, candidate in ranked]]
+        }
+
+    def update_keyword_index(self, resumes: Dict[str, tuple]):
+        updated = self.keyword_index.upsert_documents(
+            (
+                file_id,
+                content,
+                f"{self.compute_file_hash(content)}:{PROFILE_VERSION}",
+                {**metadata, **extract_profile(file_id, content), 'file_id': file_id}
+            )
+            for file_id, (content, metadata) in resumes.items()
+        )
+        if updated:
+            logger.info(f"Keyword index updated for {updated} resumes.")
+            self.invalidate_search_cache()
+        return updated
+
+    def remove_missing_resumes(self, live_file_ids):
+        """Drop resumes that are no longer in SharePoint from the keyword and vector indexes"""
+        live_file_ids = list(live_file_ids)
+        if not live_file_ids:
+            # An empty listing is far more likely a fetch problem than an empty library
+            return 0
+        removed = self.keyword_index.remove_missing(live_file_ids)
+        if self.collection:
+            stale = self.collection.get(where={"file_id": {"$nin": live_file_ids}}, include=['metadatas'])
+            if stale['ids']:
+                self.collection.delete(ids=stale['ids'])
+                removed = max(removed, len({(m or {}).get('file_id') for m in stale['metadatas']}))
+        if removed:
+            self.invalidate_search_cache()
+        return removed
+
+    def is_keyword_query(self, query: str) -> bool:
+        """
+        Exact-token lookups are answered lexically: every term is an id-like token
+        ("c#", "asp.net", "req1024"), an acronym typed in capitals ("SSIS", "AWS") or a
+        word of an indexed candidate name. Descriptive queries ("Java developer 5 years")
+        go to hybrid search.
+        """
+        terms = tokenize(query)
+        if not 0 < len(terms) <= self.keyword_query_max_terms or not self.keyword_index.has_terms(terms):
+            return False
+        acronyms = {word.lower() for word in ACRONYM_PATTERN.findall(query)}
+        lookups = {term for term in terms if term in acronyms or LOOKUP_TOKEN_PATTERN.match(term)}
+        if len(lookups) < len(set(terms)):
+            lookups |= self.keyword_index.candidate_name_terms(set(terms) - lookups)
+        return lookups == set(terms)
+
+    def vector_candidates(self, query: str, n_results: int, pooling: str, where: Optional[Dict] = None):
+        chunk_results = self.collection.query(
+            query_embeddings=[self.get_query_embedding(query)],
+            n_results=n_results * self.chunk_oversample,
+            where=where,
+            include=['documents', 'metadatas', 'distances']
+        )
+        return self.aggregate_chunk_hits(chunk_results, pooling)
+
+    def keyword_candidates(self, query: str, n_results: int, where: Optional[Dict] = None):
+        """BM25 hits, each paired with the stored chunk that contains the most query terms."""
+        hits = self.keyword_index.search(query, top_k=n_results, where=where)
+        if not hits:
+            return []
+        terms = set(tokenize(query))
+        best_chunks = {}
+        if self.collection:
+            chunks = self.collection.get(
+                where={"file_id": {"$in": [file_id for file_id, _, _ in hits]}},
+                include=['documents', 'metadatas']
+            )
+            for document, metadata in zip(chunks['documents'], chunks['metadatas']):
+                metadata = metadata or {}
+                overlap = len(terms & set(tokenize(document or "")))
+                file_id = metadata.get('file_id')
+                if file_id not in best_chunks or overlap > best_chunks[file_id][0]:
+                    best_chunks[file_id] = (overlap, document, metadata)
+        top_score = hits[0][1]
+        return [
+            (file_id, {
+                'document': best_chunks[file_id][1] if file_id in best_chunks else "",
+                'metadata': best_chunks[file_id][2] if file_id in best_chunks else metadata,
+                'distance': 1 - score / top_score,
+                'score': score
+            })
+            for file_id, score, metadata in hits
+        ]
+
+    def reciprocal_rank_fusion(self, rankings, n_results: int):
+        """Fuse rankings with RRF: score = sum(1 / (k + rank)). Earlier rankings supply the hit details."""
+        fused = {}
+        for ranking in rankings:
+            for rank, (file_id, candidate) in enumerate(ranking, start=1):
+                entry = fused.setdefault(file_id, {'candidate': candidate, 'score': 0.0})
+                entry['score'] += 1 / (self.rrf_k + rank)
+        ranked = sorted(fused.items(), key=lambda item: item[1]['score'], reverse=True)[:n_results]
+        return [(file_id, {**entry['candidate'], 'score': entry['score']}) for file_id, entry in ranked]
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def invalidate_search_cache(self):
+        """Drop cached search results; called whenever the collection changes."""
+        self.search_result_cache.clear()
+
+    def get_query_embedding(self, query: str) -> List[float]:
+        key = self.normalize_query(query)
+        embedding = self.query_embedding_cache.get(key)
+        if embedding is None:
+            embedding = self.embedding_function([query])[0]
+            self.query_embedding_cache.set(key, embedding)
+        return embedding
+
+    def search_resumes(self, query: str, n_results: int = 5, pooling: Optional[str] = None,
+                       mode: Optional[str] = None, where: Optional[Dict] = None):
+        """
+        Search resumes in "vector", "keyword" (BM25 only, no embedding call) or
+        "hybrid" (reciprocal rank fusion of both) mode. "auto" picks keyword mode for
+        exact-token lookups (see is_keyword_query) and hybrid otherwise.
+        `where` is a Chroma metadata filter (see build_resume_filter) applied before ranking.
+        """
+        pooling = pooling or self.chunk_pooling
+        mode = mode or self.search_mode
+        if mode == "auto":
+            mode = "keyword" if self.is_keyword_query(query) else "hybrid"
+        cache_key = (self.normalize_query(query), n_results, pooling, mode, json.dumps(where, sort_keys=True))
+        cached = self.search_result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Resume search for query '{query}' served from cache")
+            return cached
+        if mode != "keyword" and (not self.collection or not openai_clients.is_enabled("embedding")):
+            error_detail = f"Resume search is unavailable. Embedding client not initialized. Error details: {openai_clients.error('embedding')}"
             logger.error(error_detail)
             raise HTTPException(status_code=503, detail=error_detail)
         try:
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results,
-                include=['documents', 'metadatas', 'distances']
-            )
-            logger.info(f"Resume search for query '{query}' returned {len(results['ids'][0])} results")
+            if mode == "keyword":
+                ranked = self.keyword_candidates(query, n_results, where)
+            elif mode == "hybrid":
+                ranked = self.reciprocal_rank_fusion(
+                    [
+                        self.vector_candidates(query, n_results, pooling, where),
+                        self.keyword_candidates(query, n_results * self.chunk_oversample, where)
+                    ],
+                    n_results
+                )
+            else:
+                ranked = self.vector_candidates(query, n_results, pooling, where)[:n_results]
+            results = self.to_query_result(ranked)
+            self.search_result_cache.set(cache_key, results)
+            logger.info(f"Resume search ({mode}) for query '{query}' returned {len(results['ids'][0])} results")
             return results
         except Exception as e:
             logger.error(f"Error searching resumes: {str(e)}")
             raise
 
-@app.on_event("startup")
-async def startup_event():
-    logger.info("App startup: Initializing SharePoint Fetch + Resume Parsing + Embedding...")
+    def cache_stats(self):
+        stats = {
+            "query_embeddings": self.query_embedding_cache.stats(),
+            "search_results": self.search_result_cache.stats()
+        }
+        if self.embedding_function and self.embedding_function.cache:
+            stats["embedding_store"] = self.embedding_function.cache.stats()
+        return stats
+
+    def warm_up(self):
+        """
+        Force Chroma to load the collection's HNSW index into memory by running one
+        query with a stored embedding, so the first user search does not pay for it.
+        """
+        if not self.collection:
+            return
+        try:
+            count = self.collection.count()
+            sample = self.collection.peek(limit=1)
+            if count and sample['embeddings'] is not None and len(sample['embeddings']):
+                self.collection.query(query_embeddings=[list(sample['embeddings'][0])], n_results=1, include=[])
+            logger.info(f"Vector DB warmed up ({count} records).")
+        except Exception as e:
+            logger.warning(f"Vector DB warm-up failed: {str(e)}")
+
+_vector_db = None
+_vector_db_lock = threading.Lock()
+
+def get_vector_db() -> VectorDBManager:
+    """Return the process-wide VectorDBManager, creating it on first use."""
+    global _vector_db
+    if _vector_db is None:
+        with _vector_db_lock:
+            if _vector_db is None:
+                _vector_db = VectorDBManager()
+    return _vector_db
+
+ingestion_progress = IngestionProgress()
+ingestion_task = None
+warm_up_task = None
+schema_preload_task = None
+
+# Set on shutdown; the ingestion thread checks it between files and stages
+ingestion_stop = threading.Event()
+
+def check_ingestion_stop():
+    if ingestion_stop.is_set():
+        raise IngestionCancelled("Resume ingestion stopped by shutdown")
+
+def run_resume_ingestion(progress: IngestionProgress, attempt: int = 1):
+    """
+    SharePoint fetch -> resume parsing -> embedding. Blocking; run off the event loop.
+    Returns True on success; failures are recorded on `progress`.
+    """
+    progress.start(attempt)
     try:
+        progress.set_stage("fetching")
         authority = f"https://login.microsoftonline.com/{SHAREPOINT_TENANT_ID}"
         app_msal = msal.ConfidentialClientApplication(
             client_id=SHAREPOINT_CLIENT_ID,
@@ -352,11 +726,17 @@ async def startup_event():
             access_token=access_token,
             site_id=site_id,
             folder_path=SHAREPOINT_FOLDER_PATH,
-            download_dir="resumes"
+            download_dir="resumes",
+            progress=progress,
+            max_concurrency=SHAREPOINT_DOWNLOAD_CONCURRENCY,
+            use_delta=SHAREPOINT_DELTA_SYNC,
+            stop_event=ingestion_stop
         )
         fetcher.fetch_and_update()
         logger.info("Resumes fetched and metadata updated.")
+        check_ingestion_stop()
 
+        progress.set_stage("parsing")
         parser = ResumeParser(resume_dir="resumes")
         metadata_manager = fetcher.metadata_manager
         new_or_updated_files = list(metadata_manager.metadata.keys())
@@ -367,37 +747,97 @@ async def startup_event():
             not any(keyword in file_id.lower() for keyword in ['website', 'policy', 'agentmodel', 'agentzero'])
         ]
         logger.info(f"Found {len(resume_files)} new/updated resumes to parse (filtered).")
+        parse_cache = ParsedTextCache()
+        parse_queue = []
         parsed_resumes = {}
+        resume_metadata = metadata_manager.get_many(resume_files)
         for file_id in resume_files:
-            file_metadata = metadata_manager.metadata.get(file_id)
+            file_metadata = resume_metadata.get(file_id)
             if not file_metadata:
                 logger.warning(f"No metadata found for file ID: {file_id}")
                 continue
-            if 'file_name' not in file_metadata:
-                file_metadata['file_name'] = file_id
-                logger.info(f"Set file_name to file_id for {file_id}")
-            file_name = file_metadata['file_name']
-            try:
-                logger.info(f"Parsing resume: {file_name}")
-                parsed_data = parser.parse_resume(file_id)
-                if isinstance(parsed_data, str) and parsed_data.strip():
-                    parsed_resumes[file_id] = parsed_data
-                else:
-                    logger.warning(f"Invalid or empty parsed data for {file_id}")
-            except Exception as e:
-                logger.warning(f"Failed to parse resume for file ID {file_id} (name: {file_name}): {str(e)}")
+            cached_text = parse_cache.get(file_metadata.get('file_hash'))
+            if cached_text is None:
+                parse_queue.append(file_id)
+            elif cached_text.strip():
+                parsed_resumes[file_id] = cached_text
+                progress.increment("parsed")
+        logger.info(f"Parsed-text cache hits: {len(resume_files) - len(parse_queue)}, files to parse: {len(parse_queue)}")
+
+        for file_id, parsed_data, parse_error in parser.parse_many(
+            parse_queue,
+            workers=RESUME_PARSE_WORKERS,
+            timeout=RESUME_PARSE_TIMEOUT
+        ):
+            check_ingestion_stop()
+            file_name = resume_metadata[file_id]['file_name']
+            if parse_error:
+                logger.warning(f"Failed to parse resume for file ID {file_id} (name: {file_name}): {parse_error}")
                 continue
+            parse_cache.put(resume_metadata[file_id].get('file_hash'), parsed_data or "")
+            if isinstance(parsed_data, str) and parsed_data.strip():
+                parsed_resumes[file_id] = parsed_data
+                progress.increment("parsed")
+            else:
+                logger.warning(f"Invalid or empty parsed data for {file_id}")
+        removed = parse_cache.garbage_collect(
+            entry.get('file_hash') for entry in metadata_manager.metadata.values()
+        )
+        if removed:
+            logger.info(f"Removed {removed} stale parsed-text cache entries.")
         logger.info(f"Successfully parsed {len(parsed_resumes)} resumes.")
-
-        if is_embedding_enabled:
-            vector_db = VectorDBManager()
-            embedded_count = vector_db.embed_resumes(parsed_resumes, metadata_manager)
-            logger.info(f"Embedded {embedded_count} new or updated resumes into vector database.")
-        else:
-            logger.warning("Skipping resume embedding due to embedding client initialization failure.")
+        check_ingestion_stop()
+
+        progress.set_stage("embedding")
+        vector_db = get_vector_db()
+        if not openai_clients.is_enabled("embedding"):
+            logger.warning("Skipping resume embedding due to embedding client initialization failure; updating keyword index only.")
+        embedded_count = vector_db.embed_resumes(parsed_resumes, metadata_manager, should_stop=ingestion_stop.is_set)
+        progress.set_count("embedded", embedded_count)
+        logger.info(f"Embedded {embedded_count} new or updated resumes into vector database.")
+        check_ingestion_stop()
+        removed = vector_db.remove_missing_resumes(resume_files)
+        if removed:
+            logger.info(f"Removed {removed} deleted resumes from the search indexes.")
+        progress.complete()
+        logger.info("Resume ingestion completed.")
+        return True
+    except IngestionCancelled as e:
+        progress.fail(e)
+        logger.info(str(e))
+        return False
     except Exception as e:
-        logger.error(f"Error during startup: {str(e)}")
-        raise
+        progress.fail(e)
+        logger.error(f"Error during resume ingestion: {str(e)}")
+        return False
+
+def run_resume_ingestion_with_retry(progress: IngestionProgress):
+    """run_resume_ingestion, retried with exponential backoff until it succeeds, attempts run out or shutdown"""
+    for attempt in range(1, INGESTION_MAX_ATTEMPTS + 1):
+        if run_resume_ingestion(progress, attempt) or ingestion_stop.is_set():
+            return
+        if attempt == INGESTION_MAX_ATTEMPTS:
+            logger.error(f"Resume ingestion failed {attempt} times; giving up until the next restart.")
+            return
+        delay = min(INGESTION_RETRY_MAX_SECONDS, INGESTION_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+        progress.schedule_retry(delay)
+        logger.info(f"Retrying resume ingestion in {delay:.0f}s (attempt {attempt + 1} of {INGESTION_MAX_ATTEMPTS}).")
+        if ingestion_stop.wait(delay):
+            return
+
+@app.on_event("shutdown")
+def shutdown_event():
+    ingestion_stop.set()
+    sql_pool.close_all()
+    blocking_executor.shutdown(wait=False)
+
+@app.on_event("startup")
+async def startup_event():
+    global ingestion_task, warm_up_task, schema_preload_task
+    warm_up_task = asyncio.create_task(asyncio.to_thread(lambda: get_vector_db().warm_up()))
+    schema_preload_task = asyncio.create_task(asyncio.to_thread(preload_schema_catalog))
+    logger.info("App startup: scheduling SharePoint Fetch + Resume Parsing + Embedding in the background...")
+    ingestion_task = asyncio.create_task(asyncio.to_thread(run_resume_ingestion_with_retry, ingestion_progress))
 
 class LoginRequest(BaseModel):
     email: str
@@ -421,43 +861,81 @@ class ResumeSearchRequest(BaseModel):
     userEmail: str
     userRoles: List[Dict]
     n_results: int = 5
-
-def get_access_token():
-    authority = f"https://login.microsoftonline.com/{TENANT_ID}"
-    msal_app = msal.PublicClientApplication(client_id=CLIENT_ID, authority=authority)
-    accounts = msal_app.get_accounts(username=SQL_USERNAME)
+    min_experience_years: Optional[float] = None
+    max_experience_years: Optional[float] = None
+    roles: Optional[List[str]] = None
+
+SQL_TOKEN_SCOPES = ["https://database.windows.net/.default"]
+sql_msal_app = None
+
+def acquire_sql_token():
+    """MSAL token for Azure SQL: silent from the account cache, interactive as a fallback"""
+    global sql_msal_app
+    if sql_msal_app is None:
+        authority = f"https://login.microsoftonline.com/{TENANT_ID}"
+        sql_msal_app = msal.PublicClientApplication(client_id=CLIENT_ID, authority=authority)
+    accounts = sql_msal_app.get_accounts(username=SQL_USERNAME)
     if accounts:
-        result = msal_app.acquire_token_silent(scopes=["https://database.windows.net/.default"], account=accounts[0])
+        result = sql_msal_app.acquire_token_silent(scopes=SQL_TOKEN_SCOPES, account=accounts[0])
         if result:
-            return result["access_token"]
-    result = msal_app.acquire_token_interactive(scopes=["https://database.windows.net/.default"])
-    if "access_token" in result:
-        return result["access_token"]
-    raise Exception(f"Failed to acquire token: {result.get('error')} - {result.get('error_description')}")
+            return result
+    return sql_msal_app.acquire_token_interactive(scopes=SQL_TOKEN_SCOPES)
 
-def establish_connection():
+sql_access_token = CachedAccessToken(acquire_sql_token, refresh_margin=SQL_TOKEN_REFRESH_MARGIN)
+
+def get_access_token():
+    return sql_access_token.get()
+
+def connect_sql():
     driver = "{ODBC Driver 17 for SQL Server}" if platform.system() == 'Windows' else "{ODBC Driver 18 for SQL Server}"
-    connection_string = f"Driver={driver};Server={SQL_SERVER};Database={SQL_DATABASE};Authentication=ActiveDirectoryInteractive;UID={SQL_USERNAME};"
+    connection_string = f"Driver={driver};Server={SQL_SERVER};Database={SQL_DATABASE};"
+    try:
+        return pyodbc.connect(
+            connection_string,
+            attrs_before={SQL_COPT_SS_ACCESS_TOKEN: encode_access_token(get_access_token())}
+        )
+    except pyodbc.Error:
+        # The cached token may have been revoked; fetch a fresh one on the next attempt
+        sql_access_token.invalidate()
+        raise
+
+sql_pool = SqlConnectionPool(
+    connect_sql,
+    max_size=SQL_POOL_SIZE,
+    max_idle_seconds=SQL_POOL_MAX_IDLE_SECONDS,
+    health_check_interval=SQL_POOL_HEALTH_CHECK_INTERVAL
+)
+
+def establish_connection():
+    """Pooled connection; conn.close() returns it to the pool"""
     try:
-        conn = pyodbc.connect(connection_string)
+        conn = sql_pool.acquire()
         return conn, None
     except Exception as e:
         return None, f"Connection error: {str(e)}"
 
+schema_catalog = SchemaCatalog(sql_pool.acquire, refresh_interval=SCHEMA_CATALOG_REFRESH_SECONDS)
+
+def preload_schema_catalog():
+    try:
+        schema_catalog.load()
+    except Exception as e:
+        logger.warning(f"Schema catalog preload failed; it will load on first use: {str(e)}")
+
 def get_user_role(email):
     conn, error = establish_connection()
     if error:
         raise HTTPException(status_code=500, detail=error)
-    cursor = conn.cursor()
-    query = """
-    SELECT r.RoleID, r.RoleName 
-    FROM [dbo].[UserRoleMapping] urm
-    JOIN [dbo].[Roles] r ON urm.RoleID = r.RoleID
-    WHERE urm.UserEmail = ? AND urm.IsActive = 1
-    """
-    cursor.execute(query, (email,))
-    roles = [{"id": row[0], "name": row[1]} for row in cursor.fetchall()]
-    conn.close()
+    with conn:
+        cursor = conn.cursor()
+        query = """
+        SELECT r.RoleID, r.RoleName 
+        FROM [dbo].[UserRoleMapping] urm
+        JOIN [dbo].[Roles] r ON urm.RoleID = r.RoleID
+        WHERE urm.UserEmail = ? AND urm.IsActive = 1
+        """
+        cursor.execute(query, (email,))
+        roles = [{"id": row[0], "name": row[1]} for row in cursor.fetchall()]
     if not roles:
         raise HTTPException(status_code=401, detail="No active roles found for this email")
     return roles
@@ -466,54 +944,52 @@ def get_all_database_objects():
     conn, error = establish_connection()
     if error:
         raise HTTPException(status_code=500, detail=error)
-    cursor = conn.cursor()
-    tables_query = """
-    SELECT TABLE_NAME 
-    FROM INFORMATION_SCHEMA.TABLES 
-    WHERE TABLE_SCHEMA = 'dbo' AND TABLE_TYPE = 'BASE TABLE'
-    """
-    cursor.execute(tables_query)
-    tables = [row[0] for row in cursor.fetchall()]
-    views_query = """
-    SELECT TABLE_NAME 
-    FROM INFORMATION_SCHEMA.VIEWS 
-    WHERE TABLE_SCHEMA = 'dbo'
-    """
-    cursor.execute(views_query)
-    views = [row[0] for row in cursor.fetchall()]
-    conn.close()
+    with conn:
+        cursor = conn.cursor()
+        tables_query = """
+        SELECT TABLE_NAME 
+        FROM INFORMATION_SCHEMA.TABLES 
+        WHERE TABLE_SCHEMA = 'dbo' AND TABLE_TYPE = 'BASE TABLE'
+        """
+        cursor.execute(tables_query)
+        tables = [row[0] for row in cursor.fetchall()]
+        views_query = """
+        SELECT TABLE_NAME 
+        FROM INFORMATION_SCHEMA.VIEWS 
+        WHERE TABLE_SCHEMA = 'dbo'
+        """
+        cursor.execute(views_query)
+        views = [row[0] for row in cursor.fetchall()]
     return tables + views
 
 def get_role_definitions():
     conn, error = establish_connection()
     if error:
         raise HTTPException(status_code=500, detail=error)
-    cursor = conn.cursor()
-    check_query = """
-    SELECT COUNT(*) 
-    FROM INFORMATION_SCHEMA.TABLES 
-    WHERE TABLE_SCHEMA = 'dbo' AND TABLE_NAME = 'RoleTableMapping'
-    """
-    cursor.execute(check_query)
-    table_exists = cursor.fetchone()[0] > 0
-    if table_exists:
-        roles_query = """
-        SELECT r.RoleName, rtm.TableName
-        FROM [dbo].[RoleTableMapping] rtm
-        JOIN [dbo].[Roles] r ON rtm.RoleID = r.RoleID
-        WHERE rtm.IsActive = 1
+    with conn:
+        cursor = conn.cursor()
+        check_query = """
+        SELECT COUNT(*) 
+        FROM INFORMATION_SCHEMA.TABLES 
+        WHERE TABLE_SCHEMA = 'dbo' AND TABLE_NAME = 'RoleTableMapping'
         """
-        cursor.execute(roles_query)
-        role_mappings = cursor.fetchall()
-        role_definitions = {}
-        for role_name, table_name in role_mappings:
-            if role_name not in role_definitions:
-                role_definitions[role_name] = []
-            role_definitions[role_name].append(table_name)
-        conn.close()
-        return role_definitions
-    else:
-        conn.close()
+        cursor.execute(check_query)
+        table_exists = cursor.fetchone()[0] > 0
+        if table_exists:
+            roles_query = """
+            SELECT r.RoleName, rtm.TableName
+            FROM [dbo].[RoleTableMapping] rtm
+            JOIN [dbo].[Roles] r ON rtm.RoleID = r.RoleID
+            WHERE rtm.IsActive = 1
+            """
+            cursor.execute(roles_query)
+            role_mappings = cursor.fetchall()
+            role_definitions = {}
+            for role_name, table_name in role_mappings:
+                if role_name not in role_definitions:
+                    role_definitions[role_name] = []
+                role_definitions[role_name].append(table_name)
+            return role_definitions
         return {
             "Admin": [],
             "Recruiter": ["Sourcing", "Candidate", "Education", "PreferredLocation", "NoticePeriod"],
@@ -521,108 +997,74 @@ def get_role_definitions():
             "Interviewer": ["Feedback", "Interview", "Interviewer"]
         }
 
-def define_table_access_by_role(role_name, all_objects):
-    role_definitions = get_role_definitions()
-    if role_name == "Admin":
-        return all_objects
-    patterns = role_definitions.get(role_name, [])
-    accessible = []
-    if not patterns:
-        patterns = [role_name]
-    for obj in all_objects:
-        if any(pattern.lower() in obj.lower() for pattern in patterns):
-            accessible.append(obj)
-    return accessible
+def define_table_access_by_role(role_name, all_objects, role_definitions=None):
+    if role_definitions is None:
+        role_definitions = rbac_resolver.role_definitions()
+    return accessible_objects_for_role(role_name, all_objects, role_definitions)
+
+rbac_resolver = RBACResolver(get_role_definitions, get_all_database_objects, ttl_seconds=RBAC_CACHE_TTL_SECONDS)
 
 def get_table_schema(table_name):
-    conn, error = establish_connection()
-    if error:
-        raise HTTPException(status_code=500, detail=error)
-    cursor = conn.cursor()
-    table_check_query = """
-    SELECT COUNT(*) 
-    FROM INFORMATION_SCHEMA.TABLES 
-    WHERE TABLE_SCHEMA = 'dbo' AND TABLE_NAME = ?
-    """
-    cursor.execute(table_check_query, (table_name,))
-    table_exists = cursor.fetchone()[0] > 0
-    if table_exists:
-        schema_query = f"""
-        SELECT COLUMN_NAME, DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, IS_NULLABLE, COLUMN_DEFAULT
-        FROM INFORMATION_SCHEMA.COLUMNS
-        WHERE TABLE_SCHEMA = 'dbo' AND TABLE_NAME = '{table_name}'
-        ORDER BY ORDINAL_POSITION
-        """
-        cursor.execute(schema_query)
-        columns = cursor.fetchall()
-        schema = f"CREATE TABLE [dbo].[{table_name}](\n"
-        for i, col in enumerate(columns):
-            column_name, data_type, max_length, is_nullable, default_value = col
-            data_type_str = f"{data_type}({max_length})" if max_length and max_length != -1 and data_type in ('char', 'varchar', 'nchar', 'nvarchar') else data_type
-            nullable = "NULL" if is_nullable == "YES" else "NOT NULL"
-            default = f" DEFAULT {default_value}" if default_value else ""
-            comma = "" if i == len(columns) - 1 else ","
-            schema += f"    [{column_name}] [{data_type_str}] {nullable}{default}{comma}\n"
-        schema += ")"
-        conn.close()
-        return schema
-    else:
-        view_check_query = """
-        SELECT COUNT(*) 
-        FROM INFORMATION_SCHEMA.VIEWS 
-        WHERE TABLE_SCHEMA = 'dbo' AND TABLE_NAME = ?
-        """
-        cursor.execute(view_check_query, (table_name,))
-        view_exists = cursor.fetchone()[0] > 0
-        if view_exists:
-            view_def_query = f"""
-            SELECT VIEW_DEFINITION
-            FROM INFORMATION_SCHEMA.VIEWS
-            WHERE TABLE_SCHEMA = 'dbo' AND TABLE_NAME = '{table_name}'
-            """
-            cursor.execute(view_def_query)
-            view_def = cursor.fetchone()[0]
-            schema = f"CREATE VIEW [dbo].[{table_name}] AS\n{view_def}"
-            conn.close()
-            return schema
-        conn.close()
+    try:
+        schema = schema_catalog.get_schema(table_name)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Connection error: {str(e)}")
+    if schema is None:
         raise HTTPException(status_code=404, detail=f"The {table_name} table/view does not exist")
+    return schema
+
+CHAT_SYSTEM_PROMPT = "You are a helpful assistant specialized in the Recruitment Management System's RBAC and resume search."
+
+def describe_completion_error(e: Exception, model_id: str) -> str:
+    error_message = str(e).lower()
+    if "authentication" in error_message or "api key" in error_message:
+        detail = "Authentication error: Invalid or missing Azure OpenAI API key."
+    elif "resource" in error_message or "endpoint" in error_message:
+        detail = f"Resource error: Invalid endpoint URL ({AZURE_OPENAI_ENDPOINT})."
+    elif "deployment" in error_message or "model" in error_message:
+        detail = f"Deployment error: Model '{model_id}' not found or not deployed."
+    elif "rate limit" in error_message:
+        detail = "Rate limit exceeded: Please try again later."
+    elif "timed out" in error_message:
+        detail = "Request timed out: Check network connectivity to Azure OpenAI."
+    elif "quota" in error_message or "credits" in error_message:
+        detail = "Quota exceeded: Azure OpenAI credits for gpt-35-turbo are exhausted."
+    else:
+        detail = f"Unexpected error: {str(e)}"
+    logger.error(f"Error in Azure OpenAI request for model {model_id}: {detail}")
+    return detail
+
+def chat_messages(prompt: str):
+    return [
+        {"role": "system", "content": CHAT_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
 
 def get_completion_from_azure_openai(model_id: str, prompt: str, temperature: float = 0.5, max_tokens: int = 1000):
-    if not is_general_enabled or general_client is None:
-        return None, f"Azure OpenAI general client not initialized. Error: {general_error}"
+    """Blocking completion through chat_gateway, for code running on worker threads"""
+    if not openai_clients.is_enabled("general"):
+        return None, f"Azure OpenAI general client not initialized. Error: {openai_clients.error('general')}"
     try:
         logger.info(f"Sending request to Azure OpenAI: Model={model_id}, Prompt (first 100 chars)={prompt[:100]}...")
-        response = general_client.chat.completions.create(
-            model=model_id,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant specialized in the Recruitment Management System's RBAC and resume search."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
+        response = chat_gateway.chat_sync(model_id, chat_messages(prompt), temperature=temperature, max_tokens=max_tokens)
         response_content = response.choices[0].message.content
         logger.info(f"Response received from {model_id} (first 100 chars): {response_content[:100]}...")
         return response_content, None
     except Exception as e:
-        error_message = str(e).lower()
-        if "authentication" in error_message or "api key" in error_message:
-            detail = "Authentication error: Invalid or missing Azure OpenAI API key."
-        elif "resource" in error_message or "endpoint" in error_message:
-            detail = f"Resource error: Invalid endpoint URL ({AZURE_OPENAI_ENDPOINT})."
-        elif "deployment" in error_message or "model" in error_message:
-            detail = f"Deployment error: Model '{model_id}' not found or not deployed."
-        elif "rate limit" in error_message:
-            detail = "Rate limit exceeded: Please try again later."
-        elif "timed out" in error_message:
-            detail = "Request timed out: Check network connectivity to Azure OpenAI."
-        elif "quota" in error_message or "credits" in error_message:
-            detail = "Quota exceeded: Azure OpenAI credits for gpt-35-turbo are exhausted."
-        else:
-            detail = f"Unexpected error: {str(e)}"
-        logger.error(f"Error in Azure OpenAI request for model {model_id}: {detail}")
-        return None, detail
+        return None, describe_completion_error(e, model_id)
+
+async def get_completion_from_azure_openai_async(model_id: str, prompt: str, temperature: float = 0.5, max_tokens: int = 1000):
+    """Completion for request handlers; waits on the gateway without holding a worker thread"""
+    if not await run_blocking(openai_clients.is_enabled, "general"):
+        return None, f"Azure OpenAI general client not initialized. Error: {openai_clients.error('general')}"
+    try:
+        logger.info(f"Sending request to Azure OpenAI: Model={model_id}, Prompt (first 100 chars)={prompt[:100]}...")
+        response = await chat_gateway.chat(model_id, chat_messages(prompt), temperature=temperature, max_tokens=max_tokens)
+        response_content = response.choices[0].message.content
+        logger.info(f"Response received from {model_id} (first 100 chars): {response_content[:100]}...")
+        return response_content, None
+    except Exception as e:
+        return None, describe_completion_error(e, model_id)
 
 def get_nl2sql_response(question, table_name, schema, user_role=None):
     role_context = f"\nNote that this query is being made by a user with {user_role} role. " if user_role else ""
@@ -661,9 +1103,9 @@ def execute_sql_query(sql_query):
     conn, error = establish_connection()
     if error:
         raise HTTPException(status_code=500, detail=error)
-    cursor = conn.cursor()
     logger.info(f"Executing SQL query: {sql_query}")
     try:
+        cursor = conn.cursor()
         cursor.execute(sql_query)
         columns = [column[0] for column in cursor.description] if cursor.description else []
         results = []
@@ -678,20 +1120,18 @@ def execute_sql_query(sql_query):
                         value = value.isoformat()
                     result_row[columns[i]] = value
                 results.append(result_row)
-        conn.close()
         logger.info(f"Query returned {len(results)} results")
         return results
     except Exception as e:
-        conn.close()
         error_message = f"SQL query execution error: {str(e)}"
         logger.error(error_message)
         raise HTTPException(status_code=400, detail=error_message)
+    finally:
+        conn.close()
 
-def convert_results_to_natural_language(results, question, table_name):
-    if not results:
-        return "I didn't find any data matching your query."
+def natural_language_prompt(results, question, table_name):
     results_json = json.dumps(results, indent=2)
-    prompt = f"""Here are the results of a query against the {table_name} table:
+    return f"""Here are the results of a query against the {table_name} table:
 ```json
 {results_json}
 ```
@@ -703,6 +1143,11 @@ Make your response conversational and friendly. Focus on the key information and
 Only mention specific numbers if they're significant to the answer.
 DO NOT mention SQL, queries, or tables in your response.
 """
+
+def convert_results_to_natural_language(results, question, table_name):
+    if not results:
+        return "I didn't find any data matching your query."
+    prompt = natural_language_prompt(results, question, table_name)
     response, error = get_completion_from_azure_openai(DEFAULT_MODEL, prompt, temperature=0.5, max_tokens=1000)
     if error:
         raise HTTPException(status_code=500, detail=error)
@@ -711,13 +1156,8 @@ DO NOT mention SQL, queries, or tables in your response.
 @app.post("/api/login")
 async def login(request: LoginRequest):
     try:
-        roles = get_user_role(request.email)
-        all_database_objects = get_all_database_objects()
-        accessible_objects = []
-        for role in roles:
-            role_objects = define_table_access_by_role(role["name"], all_database_objects)
-            accessible_objects.extend(role_objects)
-        accessible_objects = list(set(accessible_objects))
+        roles = await run_blocking(get_user_role, request.email)
+        accessible_objects = await run_blocking(rbac_resolver.accessible_objects, [role["name"] for role in roles])
         logger.info(f"User {request.email} logged in with roles: {[role['name'] for role in roles]}")
         return {
             "success": True,
@@ -729,13 +1169,21 @@ async def login(request: LoginRequest):
         logger.error(f"Login error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Login failed: {str(e)}")
 
-@app.post("/api/classify-message")
-async def classify_message(request: MessageClassificationRequest):
-    try:
-        logger.info(f"Classifying message: {request.message[:50]}...")
-        tables_list = ", ".join(request.accessibleTables[:10])
-        additional_tables = f" and {len(request.accessibleTables) - 10} more" if len(request.accessibleTables) > 10 else ""
-        prompt = f"""
+intent_classifier = IntentClassifier(
+    INTENT_MODEL_PATH,
+    threshold=INTENT_CONFIDENCE_THRESHOLD,
+    shadow_rate=INTENT_SHADOW_SAMPLE_RATE,
+    traffic_log=INTENT_TRAFFIC_LOG,
+    traffic_log_max_bytes=INTENT_TRAFFIC_LOG_MAX_BYTES
+)
+# Keeps shadow classification tasks referenced until they finish
+shadow_tasks = set()
+
+async def classify_with_llm(request: MessageClassificationRequest):
+    """Returns (label, error) from the LLM classification prompt"""
+    tables_list = ", ".join(request.accessibleTables[:10])
+    additional_tables = f" and {len(request.accessibleTables) - 10} more" if len(request.accessibleTables) > 10 else ""
+    prompt = f"""
 You are an AI assistant that helps classify user questions.
 
 Classify the following user message into exactly one of these categories:
@@ -749,31 +1197,65 @@ Available database tables: {tables_list}{additional_tables}
 
 Return only one word: "conversational", "database_query", or "resume_query".
 """
-        response_text, error = get_completion_from_azure_openai(
-            DEFAULT_MODEL,
-            prompt,
-            temperature=0.1,
-            max_tokens=20
-        )
+    response_text, error = await get_completion_from_azure_openai_async(
+        DEFAULT_MODEL,
+        prompt,
+        temperature=0.1,
+        max_tokens=20
+    )
+    if error:
+        return None, error
+    response_text = response_text.strip().lower()
+    if response_text not in ["conversational", "database_query", "resume_query"]:
+        response_text = "conversational"
+    return response_text, None
+
+async def shadow_classify(request: MessageClassificationRequest, prediction):
+    """Check a locally served classification against the LLM, for the accuracy metric"""
+    try:
+        label, error = await classify_with_llm(request)
+        if not error:
+            await run_blocking(intent_classifier.record_llm_label, request.message, prediction, label, shadow=True)
+    except Exception as e:
+        logger.warning(f"Shadow classification failed: {str(e)}")
+
+@app.post("/api/classify-message")
+async def classify_message(request: MessageClassificationRequest):
+    try:
+        logger.info(f"Classifying message: {request.message[:50]}...")
+        prediction = intent_classifier.predict(request.message)
+        if intent_classifier.is_confident(prediction):
+            intent_classifier.record_local()
+            logger.info(f"Local classification result: {prediction[0]} ({prediction[1]:.2f})")
+            if intent_classifier.should_shadow():
+                task = asyncio.create_task(shadow_classify(request, prediction))
+                shadow_tasks.add(task)
+                task.add_done_callback(shadow_tasks.discard)
+            return {"success": True, "type": prediction[0]}
+
+        intent_classifier.record_fallback()
+        response_text, error = await classify_with_llm(request)
         if error:
             if "Quota exceeded" in error:
-                logger.warning("Falling back to conversational classification due to quota exhaustion")
-                return {"success": True, "type": "conversational"}
+                fallback_type = prediction[0] if prediction else "conversational"
+                logger.warning(f"Falling back to {fallback_type} classification due to quota exhaustion")
+                return {"success": True, "type": fallback_type}
             raise HTTPException(status_code=500, detail=error)
-        response_text = response_text.strip().lower()
         logger.info(f"Classification result: {response_text}")
-        if response_text not in ["conversational", "database_query", "resume_query"]:
-            response_text = "conversational"
+        await run_blocking(intent_classifier.record_llm_label, request.message, prediction, response_text)
         return {"success": True, "type": response_text}
     except Exception as e:
         logger.error(f"Error during classify-message: {str(e)}")
         return {"success": False, "error": str(e), "type": "conversational"}
 
+CONVERSATIONAL_QUOTA_MESSAGE = "Sorry, I'm unable to respond right now due to usage limits. Please try a resume-related query or contact support."
+RESUME_SUMMARY_QUOTA_MESSAGE = "Resume search completed, but natural language response is unavailable due to usage limits."
+
 @app.post("/api/conversational-response")
 async def get_conversational_response(request: ChatRequest):
     try:
         logger.info(f"Received conversational request from user: {request.userEmail}")
-        response, error = get_completion_from_azure_openai(
+        response, error = await get_completion_from_azure_openai_async(
             DEFAULT_MODEL,
             request.message,
             temperature=0.7,
@@ -781,133 +1263,166 @@ async def get_conversational_response(request: ChatRequest):
         )
         if error:
             if "Quota exceeded" in error:
-                return {
-                    "success": True,
-                    "message": "Sorry, I'm unable to respond right now due to usage limits. Please try a resume-related query or contact support.",
-                    "type": "conversational"
-                }
+                return {"success": True, "message": CONVERSATIONAL_QUOTA_MESSAGE, "type": "conversational"}
             raise HTTPException(status_code=500, detail=error)
         return {"success": True, "message": response, "type": "conversational"}
     except Exception as e:
         logger.error(f"Error in conversational-response: {str(e)}")
         return {"success": False, "error": str(e), "type": "conversational"}
 
-@app.post("/api/ask-llama")
-async def ask_llama(request: ChatRequest):
-    try:
-        logger.info(f"Received ask-llama request from user: {request.userEmail}")
-        logger.info(f"Question: {request.message}")
-        table_name = None
-        format_type = request.format
-        question = request.message
-
-        if "tabular format" in question.lower() or "table format" in question.lower():
-            format_type = "table"
-            logger.info("Format detected: table")
-
-        if question.startswith("[Table:"):
-            match = re.match(r'\[Table: ([^\]]+)\] (.+)', question)
-            if match:
-                table_name = match.group(1)
-                question = match.group(2)
-                logger.info(f"Table extracted: {table_name}")
-
-        if table_name and table_name not in request.accessibleTables and "Admin" not in [role["name"] for role in request.userRoles]:
-            logger.info(f"Permission denied for table {table_name}")
-            return {"success": False, "error": f"You don't have permission to query the {table_name} table"}
-
-        if not table_name:
-            guess_prompt = f"""
+async def guess_table(question, accessible_tables):
+    """Ask the LLM which accessible table a question is about; returns (guess, error)"""
+    guess_prompt = f"""
 You are an AI assistant.
 
 A user asked: "{question}"
 
-Available tables: {', '.join(request.accessibleTables)}
+Available tables: {', '.join(accessible_tables)}
 
 Based on the user's question, suggest the most relevant table name from the list.
 
 Respond only with the table name exactly. If unsure, reply "Unknown".
 """
-            table_guess, error = get_completion_from_azure_openai(DEFAULT_MODEL, guess_prompt, temperature=0.1, max_tokens=20)
-            if error:
-                if "Quota exceeded" in error:
-                    return {
-                        "success": False,
-                        "error": "Cannot process database query due to usage limits. Try a resume-related query or contact support."
-                    }
-                raise HTTPException(status_code=500, detail=error)
-            table_guess = table_guess.strip()
-            if table_guess and table_guess.lower() != "unknown" and table_guess in request.accessibleTables:
-                table_name = table_guess
-                logger.info(f"Guessed table: {table_name}")
-            else:
-                return {"success": False, "error": "Please specify a table to query."}
+    return await get_completion_from_azure_openai_async(
+        DEFAULT_MODEL, guess_prompt, temperature=0.1, max_tokens=20
+    )
+
+async def query_database(request: ChatRequest, table_guess=None):
+    """
+    Everything in ask-llama up to the natural language answer: table resolution, schema,
+    NL2SQL and execution. Returns (response, None) when the request is answered without
+    a summary, or (None, (results, question, table_name)) when the results need one.
+    `table_guess` may be an already started guess_table task (see chatbot_router).
+    """
+    logger.info(f"Received ask-llama request from user: {request.userEmail}")
+    logger.info(f"Question: {request.message}")
+    table_name = None
+    format_type = request.format
+    question = request.message
+
+    if "tabular format" in question.lower() or "table format" in question.lower():
+        format_type = "table"
+        logger.info("Format detected: table")
+
+    if question.startswith("[Table:"):
+        match = re.match(r'\[Table: ([^\]]+)\] (.+)', question)
+        if match:
+            table_name = match.group(1)
+            question = match.group(2)
+            logger.info(f"Table extracted: {table_name}")
+
+    if table_name and table_name not in request.accessibleTables and "Admin" not in [role["name"] for role in request.userRoles]:
+        logger.info(f"Permission denied for table {table_name}")
+        return {"success": False, "error": f"You don't have permission to query the {table_name} table"}, None
+
+    if not table_name:
+        if table_guess is None:
+            table_guess = guess_table(question, request.accessibleTables)
+        table_guess, error = await table_guess
+        if error:
+            if "Quota exceeded" in error:
+                return {
+                    "success": False,
+                    "error": "Cannot process database query due to usage limits. Try a resume-related query or contact support."
+                }, None
+            raise HTTPException(status_code=500, detail=error)
+        table_guess = table_guess.strip()
+        if table_guess and table_guess.lower() != "unknown" and table_guess in request.accessibleTables:
+            table_name = table_guess
+            logger.info(f"Guessed table: {table_name}")
+        else:
+            return {"success": False, "error": "Please specify a table to query."}, None
 
-        schema = get_table_schema(table_name)
-        logger.info(f"Schema fetched for table: {table_name}")
-        user_role = request.userRoles[0]["name"] if request.userRoles else None
-        sql_query = get_nl2sql_response(question, table_name, schema, user_role)
-        logger.info(f"SQL generated: {sql_query}")
+    schema = await run_blocking(get_table_schema, table_name)
+    logger.info(f"Schema fetched for table: {table_name}")
+    user_role = request.userRoles[0]["name"] if request.userRoles else None
+    sql_query = await run_blocking(get_nl2sql_response, question, table_name, schema, user_role)
+    logger.info(f"SQL generated: {sql_query}")
 
-        if sql_query.startswith("Error:"):
-            return {"success": False, "error": sql_query}
+    if sql_query.startswith("Error:"):
+        return {"success": False, "error": sql_query}, None
 
-        results = execute_sql_query(sql_query)
-        if not results:
-            return {"success": True, "results": [], "message": "No results found for your query."}
+    results = await run_blocking(execute_sql_query, sql_query)
+    if not results:
+        return {"success": True, "results": [], "message": "No results found for your query."}, None
 
-        if format_type == "table":
-            return {"success": True, "results": results, "format": "table", "type": "database_query"}
+    if format_type == "table":
+        return {"success": True, "results": results, "format": "table", "type": "database_query"}, None
+    return None, (results, question, table_name)
 
-        natural_language_response = convert_results_to_natural_language(results, question, table_name)
+@app.post("/api/ask-llama")
+async def ask_llama(request: ChatRequest):
+    return await answer_database_query(request)
+
+async def answer_database_query(request: ChatRequest, table_guess=None):
+    try:
+        response, query = await query_database(request, table_guess)
+        if response is not None:
+            return response
+        natural_language_response = await run_blocking(convert_results_to_natural_language, *query)
         return {"success": True, "message": natural_language_response, "format": "text", "type": "database_query"}
     except Exception as e:
         logger.error(f"Error in ask-llama: {str(e)}")
         return {"success": False, "error": str(e), "type": "database_query"}
 
-@app.post("/api/resume-search")
-async def resume_search(request: ResumeSearchRequest):
-    try:
-        logger.info(f"Received resume search request from user: {request.userEmail}")
-        logger.info(f"Query: {request.query}")
-        
-        if not any(role["name"] in ["Recruiter", "Admin"] for role in request.userRoles):
-            raise HTTPException(status_code=403, detail="You don't have permission to search resumes.")
-
-        if not is_embedding_enabled:
-            raise HTTPException(status_code=503, detail=f"Resume search is unavailable due to embedding client initialization failure: {embedding_error}")
-
-        vector_db = VectorDBManager()
-        search_results = vector_db.search_resumes(request.query, n_results=request.n_results)
-        documents = search_results['documents'][0]
-        metadatas = search_results['metadatas'][0]
-        distances = search_results['distances'][0]
-
-        results_context = []
-        for doc, meta, dist in zip(documents, metadatas, distances):
-            result = {
-                "file_name": meta.get('file_name', 'Unknown'),
-                "content": doc[:500],
-                "similarity_score": 1 - dist,
-                "metadata": meta
-            }
-            results_context.append(result)
+async def find_resumes(request: ResumeSearchRequest):
+    """
+    Permission check, metadata filters and vector search for resume-search. Returns
+    (results_context, applied_filters); applied_filters is None when the search ran
+    unfiltered, otherwise the filter arguments and whether they were inferred from the query.
+    """
+    logger.info(f"Received resume search request from user: {request.userEmail}")
+    logger.info(f"Query: {request.query}")
+    
+    if not any(role["name"] in ["Recruiter", "Admin"] for role in request.userRoles):
+        raise HTTPException(status_code=403, detail="You don't have permission to search resumes.")
 
-        # Skip natural language conversion if general client is unavailable
-        if not is_general_enabled:
-            return {
-                "success": True,
-                "message": "Resume search completed, but natural language response is unavailable due to usage limits.",
-                "format": "text",
-                "type": "resume_query",
-                "results": results_context
-            }
+    filter_args = {
+        "min_experience_years": request.min_experience_years,
+        "max_experience_years": request.max_experience_years,
+        "roles": request.roles
+    }
+    explicit_filter = any(value is not None for value in filter_args.values())
+    if not explicit_filter:
+        filter_args = infer_resume_filter_args(request.query)
+    try:
+        where = build_resume_filter(**filter_args)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(f"Resume search filter: {where}")
+    applied_filters = {
+        "source": "request" if explicit_filter else "inferred",
+        **{name: value for name, value in filter_args.items() if value is not None}
+    } if where else None
+
+    vector_db = await run_blocking(get_vector_db)
+    search_results = await run_blocking(vector_db.search_resumes, request.query, n_results=request.n_results, where=where)
+    if where and not explicit_filter and not search_results['ids'][0]:
+        # Filters inferred from the query text should never hide every candidate
+        logger.info("Inferred filter matched no resumes; retrying without it.")
+        search_results = await run_blocking(vector_db.search_resumes, request.query, n_results=request.n_results)
+        applied_filters = None
+    documents = search_results['documents'][0]
+    metadatas = search_results['metadatas'][0]
+    distances = search_results['distances'][0]
+
+    results_context = []
+    for doc, meta, dist in zip(documents, metadatas, distances):
+        result = {
+            "file_name": meta.get('file_name', 'Unknown'),
+            "content": doc[:500],
+            "similarity_score": 1 - dist,
+            "metadata": meta
+        }
+        results_context.append(result)
+    return results_context, applied_filters
 
-        results_json = json.dumps(results_context, indent=2)
-        prompt = f"""
+def resume_summary_prompt(query, results_context):
+    results_json = json.dumps(results_context, indent=2)
+    return f"""
 You are an AI assistant specialized in resume search.
 
-A user asked: "{request.query}"
+A user asked: "{query}"
 
 Here are the top matching resumes:
 ```json
@@ -919,9 +1434,30 @@ Make your response conversational, friendly, and concise. Focus on key informati
 Do not mention file names, similarity scores, or technical terms like "vector" or "embedding".
 If no relevant information is found, say so politely.
 """
-        response, error = get_completion_from_azure_openai(
+
+@app.post("/api/resume-search")
+async def resume_search(request: ResumeSearchRequest):
+    return await answer_resume_search(request)
+
+async def answer_resume_search(request: ResumeSearchRequest, search=None):
+    """`search` may be an already started find_resumes task (see chatbot_router)"""
+    try:
+        results_context, applied_filters = await (search if search is not None else find_resumes(request))
+
+        # Skip natural language conversion if general client is unavailable
+        if not await run_blocking(openai_clients.is_enabled, "general"):
+            return {
+                "success": True,
+                "message": RESUME_SUMMARY_QUOTA_MESSAGE,
+                "format": "text",
+                "type": "resume_query",
+                "results": results_context,
+                "applied_filters": applied_filters
+            }
+
+        response, error = await get_completion_from_azure_openai_async(
             DEFAULT_MODEL,
-            prompt,
+            resume_summary_prompt(request.query, results_context),
             temperature=0.5,
             max_tokens=1000
         )
@@ -929,10 +1465,11 @@ If no relevant information is found, say so politely.
             if "Quota exceeded" in error:
                 return {
                     "success": True,
-                    "message": "Resume search completed, but natural language response is unavailable due to usage limits.",
+                    "message": RESUME_SUMMARY_QUOTA_MESSAGE,
                     "format": "text",
                     "type": "resume_query",
-                    "results": results_context
+                    "results": results_context,
+                    "applied_filters": applied_filters
                 }
             raise HTTPException(status_code=500, detail=error)
 
@@ -941,12 +1478,160 @@ If no relevant information is found, say so politely.
             "message": response,
             "format": "text",
             "type": "resume_query",
-            "results": results_context
+            "results": results_context,
+            "applied_filters": applied_filters
         }
     except Exception as e:
         logger.error(f"Error in resume-search: {str(e)}")
         return {"success": False, "error": str(e), "type": "resume_query"}
 
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def event_stream(events):
+    # no-cache and X-Accel-Buffering stop proxies from holding tokens back until the end
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def stream_completion_events(prompt: str, message_type: str, temperature: float, max_tokens: int,
+                                   quota_message: str = None):
+    """
+    SSE events for a streamed completion: one `token` event per content delta, then
+    `done`, or `error` if the completion fails. On quota exhaustion `quota_message`,
+    when given, is sent as the answer, like the non-streaming endpoints do.
+    """
+    try:
+        if not await run_blocking(openai_clients.is_enabled, "general"):
+            raise ValueError(f"Azure OpenAI general client not initialized. Error: {openai_clients.error('general')}")
+        logger.info(f"Streaming request to Azure OpenAI: Model={DEFAULT_MODEL}, Prompt (first 100 chars)={prompt[:100]}...")
+        async for delta in chat_gateway.stream_chat(
+            DEFAULT_MODEL, chat_messages(prompt), temperature=temperature, max_tokens=max_tokens
+        ):
+            yield sse_event("token", {"delta": delta})
+    except Exception as e:
+        detail = describe_completion_error(e, DEFAULT_MODEL)
+        if not (quota_message and "Quota exceeded" in detail):
+            yield sse_event("error", {"success": False, "error": detail, "type": message_type})
+            return
+        yield sse_event("token", {"delta": quota_message})
+    yield sse_event("done", {"success": True, "type": message_type})
+
+# Streaming variants. Each answers with text/event-stream: the natural language answer
+# arrives as `token` events ({"delta": ...}) followed by `done`; fields of the JSON
+# response other than the message are sent first as a `meta` event. Requests answered
+# without a completion send the usual JSON body as a single `result` event, and
+# failures send an `error` event.
+
+@app.post("/api/conversational-response/stream")
+async def stream_conversational_response(request: ChatRequest):
+    logger.info(f"Received streaming conversational request from user: {request.userEmail}")
+    return event_stream(stream_completion_events(
+        request.message, "conversational", temperature=0.7, max_tokens=1000, quota_message=CONVERSATIONAL_QUOTA_MESSAGE
+    ))
+
+@app.post("/api/ask-llama/stream")
+async def stream_ask_llama(request: ChatRequest):
+    async def events():
+        try:
+            response, query = await query_database(request)
+        except Exception as e:
+            logger.error(f"Error in ask-llama stream: {str(e)}")
+            yield sse_event("error", {"success": False, "error": str(e), "type": "database_query"})
+            return
+        if response is not None:
+            yield sse_event("result", response)
+            return
+        yield sse_event("meta", {"success": True, "format": "text", "type": "database_query"})
+        async for event in stream_completion_events(
+            natural_language_prompt(*query), "database_query", temperature=0.5, max_tokens=1000
+        ):
+            yield event
+    return event_stream(events())
+
+@app.post("/api/resume-search/stream")
+async def stream_resume_search(request: ResumeSearchRequest):
+    async def events():
+        try:
+            results_context, applied_filters = await find_resumes(request)
+        except Exception as e:
+            logger.error(f"Error in resume-search stream: {str(e)}")
+            yield sse_event("error", {"success": False, "error": str(e), "type": "resume_query"})
+            return
+        # Candidates are useful on their own, so they go out before the summary starts
+        yield sse_event("meta", {
+            "success": True, "format": "text", "type": "resume_query",
+            "results": results_context, "applied_filters": applied_filters
+        })
+        if not await run_blocking(openai_clients.is_enabled, "general"):
+            yield sse_event("token", {"delta": RESUME_SUMMARY_QUOTA_MESSAGE})
+            yield sse_event("done", {"success": True, "type": "resume_query"})
+            return
+        async for event in stream_completion_events(
+            resume_summary_prompt(request.query, results_context), "resume_query",
+            temperature=0.5, max_tokens=1000, quota_message=RESUME_SUMMARY_QUOTA_MESSAGE
+        ):
+            yield event
+    return event_stream(events())
+
+speculation_stats = {branch: {"started": 0, "used": 0, "discarded": 0} for branch in ("resume_search", "table_guess")}
+
+async def speculative_table_guess(question, accessible_tables):
+    """guess_table, then warm the schema of the guessed table"""
+    table_guess, error = await guess_table(question, accessible_tables)
+    if not error and table_guess.strip() in accessible_tables:
+        try:
+            await run_blocking(get_table_schema, table_guess.strip())
+        except Exception:
+            pass  # query_database reports schema errors itself
+    return table_guess, error
+
+def start_speculation(message, user_roles, accessible_tables, resume_request):
+    """
+    Start the ROUTER_SPECULATION branches that could be needed once the message is
+    classified. Returns {message type: (branch, task)}.
+    """
+    if not ROUTER_SPECULATION:
+        return {}
+    probabilities = intent_classifier.probabilities(message)
+    if not probabilities:
+        return {}  # without a local intent model there is no signal to decide what is worth the quota
+    if max(probabilities.values()) >= intent_classifier.threshold:
+        return {}  # answered by the local classifier, so there is no LLM call to overlap
+    candidates = {}
+    if "resume_search" in ROUTER_SPECULATION and any(role["name"] in ["Recruiter", "Admin"] for role in user_roles):
+        candidates["resume_query"] = ("resume_search", lambda: find_resumes(resume_request))
+    if "table_guess" in ROUTER_SPECULATION and accessible_tables and not message.startswith("[Table:"):
+        candidates["database_query"] = ("table_guess", lambda: speculative_table_guess(message, accessible_tables))
+
+    speculation = {}
+    for message_type, (branch, start) in candidates.items():
+        if probabilities.get(message_type, 0.0) < ROUTER_SPECULATION_MIN_PROBABILITY:
+            continue
+        task = asyncio.create_task(start())
+        # Failures surface when the branch is used; unused branches are not reported
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        speculation_stats[branch]["started"] += 1
+        speculation[message_type] = (branch, task)
+    return speculation
+
+def claim_speculation(speculation, message_type):
+    """The speculative task for the chosen route, or None"""
+    if message_type not in speculation:
+        return None
+    branch, task = speculation.pop(message_type)
+    speculation_stats[branch]["used"] += 1
+    return task
+
+def cancel_speculation(speculation):
+    """Cancel the branches the chosen route does not need; `discarded` counts the wasted work"""
+    for branch, task in speculation.values():
+        task.cancel()
+        speculation_stats[branch]["discarded"] += 1
+    speculation.clear()
+
 @app.post("/api/chatbot-router")
 async def chatbot_router(request: Request):
     try:
@@ -960,49 +1645,55 @@ async def chatbot_router(request: Request):
         if not user_message:
             raise ValueError("User message missing!")
 
-        classification_response = await classify_message(
-            MessageClassificationRequest(
-                message=user_message,
-                accessibleTables=accessible_tables,
-                userEmail=user_email,
-                userRoles=user_roles
-            )
+        resume_request = ResumeSearchRequest(
+            query=user_message,
+            userEmail=user_email,
+            userRoles=user_roles,
+            n_results=5
         )
-
-        message_type = classification_response.get("type", "conversational")
-        logger.info(f"Router classified message as: {message_type}")
-
-        if message_type == "conversational":
-            response = await get_conversational_response(
-                ChatRequest(
+        speculation = start_speculation(user_message, user_roles, accessible_tables, resume_request)
+        try:
+            classification_response = await classify_message(
+                MessageClassificationRequest(
                     message=user_message,
-                    userEmail=user_email,
-                    userRoles=user_roles,
                     accessibleTables=accessible_tables,
-                    format=format_type
-                )
-            )
-        elif message_type == "database_query":
-            response = await ask_llama(
-                ChatRequest(
-                    message=user_message,
                     userEmail=user_email,
-                    userRoles=user_roles,
-                    accessibleTables=accessible_tables,
-                    format=format_type
+                    userRoles=user_roles
                 )
             )
-        elif message_type == "resume_query":
-            response = await resume_search(
-                ResumeSearchRequest(
-                    query=user_message,
-                    userEmail=user_email,
-                    userRoles=user_roles,
-                    n_results=5
+
+            message_type = classification_response.get("type", "conversational")
+            logger.info(f"Router classified message as: {message_type}")
+            speculative = claim_speculation(speculation, message_type)
+            cancel_speculation(speculation)
+
+            if message_type == "conversational":
+                response = await get_conversational_response(
+                    ChatRequest(
+                        message=user_message,
+                        userEmail=user_email,
+                        userRoles=user_roles,
+                        accessibleTables=accessible_tables,
+                        format=format_type
+                    )
                 )
-            )
-        else:
-            response = {"success": False, "error": "Unknown message type.", "type": "conversational"}
+            elif message_type == "database_query":
+                response = await answer_database_query(
+                    ChatRequest(
+                        message=user_message,
+                        userEmail=user_email,
+                        userRoles=user_roles,
+                        accessibleTables=accessible_tables,
+                        format=format_type
+                    ),
+                    table_guess=speculative
+                )
+            elif message_type == "resume_query":
+                response = await answer_resume_search(resume_request, search=speculative)
+            else:
+                response = {"success": False, "error": "Unknown message type.", "type": "conversational"}
+        finally:
+            cancel_speculation(speculation)
         return response
     except Exception as e:
         logger.error(f"Error in chatbot-router: {str(e)}")
@@ -1012,7 +1703,7 @@ async def chatbot_router(request: Request):
 async def get_schema(table_name: str):
     try:
         logger.info(f"Getting schema for table: {table_name}")
-        schema = get_table_schema(table_name)
+        schema = await run_blocking(get_table_schema, table_name)
         return {"success": True, "schema": schema}
     except Exception as e:
         logger.error(f"Error getting schema for {table_name}: {str(e)}")
@@ -1021,10 +1712,12 @@ async def get_schema(table_name: str):
 @app.get("/api/health")
 async def health_check():
     try:
-        response, error = get_completion_from_azure_openai(DEFAULT_MODEL, "Say hello", temperature=0.1, max_tokens=10)
+        response, error = await get_completion_from_azure_openai_async(
+            DEFAULT_MODEL, "Say hello", temperature=0.1, max_tokens=10
+        )
         if error and "Quota exceeded" not in error:
             raise Exception(error)
-        conn, error = establish_connection()
+        conn, error = await run_blocking(establish_connection)
         db_status = "connected" if conn else f"error: {error}"
         if conn:
             conn.close()
@@ -1033,31 +1726,62 @@ async def health_check():
             "openai_connection": "working" if not error else f"error: {error}",
             "openai_response": response if response else None,
             "database_connection": db_status,
-            "embedding_enabled": is_embedding_enabled,
+            "sql_pool": sql_pool.stats(),
+            "schema_catalog": schema_catalog.stats(),
+            "openai_gateway": {"chat": chat_gateway.stats(), "embedding": embedding_gateway.stats()},
+            "intent_classifier": intent_classifier.stats(),
+            "router_speculation": speculation_stats,
+            "embedding_enabled": openai_clients.status()["embedding"]["enabled"],
             "api_version": "1.0.0"
         }
     except Exception as e:
         error_detail = str(e)
+        embedding_error = openai_clients.error("embedding")
         if embedding_error:
             error_detail = f"{error_detail}. Azure OpenAI embedding error: {embedding_error}"
         logger.error(f"Health check error: {error_detail}")
         return {
             "status": "unhealthy",
             "error": error_detail,
-            "embedding_enabled": is_embedding_enabled,
+            "embedding_enabled": openai_clients.status()["embedding"]["enabled"],
             "api_version": "1.0.0"
         }
 
+@app.get("/api/ready")
+async def readiness_check():
+    """
+    The API itself is ready as soon as it accepts traffic. Resume search is only
+    reported ready once background ingestion has finished.
+    """
+    ingestion = ingestion_progress.snapshot()
+    return {
+        "ready": True,
+        "resume_search_ready": ingestion_progress.is_ready and openai_clients.status()["embedding"]["enabled"],
+        "ingestion": ingestion,
+        "openai_clients": openai_clients.status(),
+        "api_version": "1.0.0"
+    }
+
+@app.get("/api/cache-stats")
+async def cache_stats():
+    vector_db = await run_blocking(get_vector_db)
+    # The embedding store count is a SQLite query under the lock ingestion writes through
+    resume_search_stats = await run_blocking(vector_db.cache_stats)
+    return {"success": True, "resume_search": resume_search_stats, "intent_classifier": intent_classifier.stats()}
+
+def acquire_sharepoint_graph_token():
+    authority = f"https://login.microsoftonline.com/{SHAREPOINT_TENANT_ID}"
+    app_msal = msal.ConfidentialClientApplication(
+        client_id=SHAREPOINT_CLIENT_ID,
+        authority=authority,
+        client_credential=SHAREPOINT_CLIENT_SECRET
+    )
+    return app_msal.acquire_token_for_client(scopes=["https://graph.microsoft.com/.default"])
+
 @router.get("/internal/get-sharepoint-token", include_in_schema=False)
 async def get_sharepoint_token():
     try:
-        authority = f"https://login.microsoftonline.com/{SHAREPOINT_TENANT_ID}"
-        app_msal = msal.ConfidentialClientApplication(
-            client_id=SHAREPOINT_CLIENT_ID,
-            authority=authority,
-            client_credential=SHAREPOINT_CLIENT_SECRET
-        )
-        token_result = app_msal.acquire_token_for_client(scopes=["https://graph.microsoft.com/.default"])
+        token_result = await run_blocking(acquire_sharepoint_graph_token)
         if "access_token" not in token_result:
             raise HTTPException(status_code=500, detail=f"Token fetch failed: {token_result.get('error_description', 'Unknown error')}")
         return {"access_token": token_result["access_token"]}
@@ -0,0 +1,222 @@
+import json
+import os
+import random
+import re
+import threading
+import numpy as np
+
+LABELS = ("conversational", "database_query", "resume_query")
+INTENT_MODEL_FILE = "intent_model.npz"
+TRAFFIC_LOG_FILE = "intent_traffic.jsonl"
+TRAFFIC_LOG_MAX_BYTES = 10 * 1024 * 1024
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str):
+    """Lower-cased word unigrams and bigrams"""
+    words = TOKEN_PATTERN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+class IntentModel:
+    """
+    TF-IDF features and a multinomial logistic regression, both in NumPy.
+
+    A message is scored by gathering the weight rows of the terms it contains, so
+    prediction costs a few small vector operations rather than a matrix product over
+    the vocabulary.
+    """
+
+    def __init__(self, vocabulary, idf, weights, bias, labels=LABELS, metrics=None):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+        self.labels = tuple(labels)
+        self.metrics = metrics or {}
+
+    def _features(self, text):
+        counts = {}
+        for token in tokenize(text):
+            index = self.vocabulary.get(token)
+            if index is not None:
+                counts[index] = counts.get(index, 0) + 1
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = (1 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))) * self.idf[indices]
+        norm = np.linalg.norm(values)
+        return indices, values / norm if norm else values
+
+    def _matrix(self, texts):
+        matrix = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            indices, values = self._features(text)
+            matrix[row, indices] = values
+        return matrix
+
+    def predict_proba(self, text: str):
+        indices, values = self._features(text)
+        logits = values @ self.weights[indices] + self.bias
+        exp = np.exp(logits - logits.max())
+        return exp / exp.sum()
+
+    def predict(self, text: str):
+        """(label, confidence) for the most likely intent"""
+        probabilities = self.predict_proba(text)
+        best = int(probabilities.argmax())
+        return self.labels[best], float(probabilities[best])
+
+    @classmethod
+    def fit(cls, texts, labels, min_df=1, l2=1e-3, learning_rate=5.0, epochs=300):
+        """Train on labelled messages with full-batch gradient descent"""
+        document_frequency = {}
+        for text in texts:
+            for token in set(tokenize(text)):
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+        terms = sorted(token for token, df in document_frequency.items() if df >= min_df)
+        vocabulary = {token: index for index, token in enumerate(terms)}
+        idf = np.array(
+            [np.log((1 + len(texts)) / (1 + document_frequency[token])) + 1 for token in terms], dtype=np.float32
+        )
+        model = cls(vocabulary, idf, np.zeros((len(terms), len(LABELS)), dtype=np.float32),
+                    np.zeros(len(LABELS), dtype=np.float32))
+
+        x = model._matrix(texts)
+        y = np.zeros((len(texts), len(LABELS)), dtype=np.float32)
+        y[np.arange(len(texts)), [LABELS.index(label) for label in labels]] = 1
+        # Weight classes equally so the largest source does not dominate
+        class_weight = len(texts) / (len(LABELS) * np.maximum(y.sum(axis=0), 1))
+        sample_weight = (y * class_weight).sum(axis=1, keepdims=True) / len(texts)
+        for _ in range(epochs):
+            logits = x @ model.weights + model.bias
+            exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+            error = (exp / exp.sum(axis=1, keepdims=True) - y) * sample_weight
+            model.weights -= learning_rate * (x.T @ error + l2 * model.weights)
+            model.bias -= learning_rate * error.sum(axis=0)
+        return model
+
+    def evaluate(self, texts, labels, threshold):
+        """Accuracy overall and on the predictions confident enough to skip the LLM"""
+        predictions = [self.predict(text) for text in texts]
+        correct = [label == expected for (label, _), expected in zip(predictions, labels)]
+        confident = [ok for ok, (_, confidence) in zip(correct, predictions) if confidence >= threshold]
+        return {
+            "samples": len(texts),
+            "accuracy": round(sum(correct) / len(correct), 4) if correct else None,
+            "threshold": threshold,
+            "coverage": round(len(confident) / len(correct), 4) if correct else None,
+            "confident_accuracy": round(sum(confident) / len(confident), 4) if confident else None
+        }
+
+    def save(self, path: str):
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez(
+            path,
+            terms=np.array(terms, dtype=str),
+            idf=self.idf,
+            weights=self.weights,
+            bias=self.bias,
+            labels=np.array(self.labels, dtype=str),
+            metrics=np.array(json.dumps(self.metrics))
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as data:
+            vocabulary = {str(term): index for index, term in enumerate(data["terms"])}
+            return cls(vocabulary, data["idf"], data["weights"], data["bias"],
+                       [str(label) for label in data["labels"]], json.loads(str(data["metrics"])))
+
+class IntentClassifier:
+    """
+    Fast path in front of the LLM classification call. Predictions at or above
+    `threshold` are served locally; the rest fall back to the LLM, whose label is
+    appended to the traffic log for the next training run. A `shadow_rate` fraction
+    of local answers is also checked against the LLM to measure live accuracy.
+
+    The traffic log holds raw user messages, so it is off unless a path is given. Once
+    it grows past `traffic_log_max_bytes` it is rotated to `<path>.1`, replacing the
+    previous rotation, which bounds it to twice that size on disk.
+    """
+
+    def __init__(self, model_path: str = INTENT_MODEL_FILE, threshold: float = 0.85, shadow_rate: float = 0.0,
+                 traffic_log: str = "", traffic_log_max_bytes: int = TRAFFIC_LOG_MAX_BYTES):
+        self.model_path = model_path
+        self.threshold = threshold
+        self.shadow_rate = shadow_rate
+        self.traffic_log = traffic_log
+        self.traffic_log_max_bytes = traffic_log_max_bytes
+        self._lock = threading.Lock()
+        self.model = IntentModel.load(model_path) if model_path and os.path.exists(model_path) else None
+        self.requests = 0
+        self.local = 0
+        self.fallbacks = 0
+        self.fallback_compared = 0
+        self.fallback_agreed = 0
+        self.shadow_checked = 0
+        self.shadow_agreed = 0
+
+    def predict(self, message: str):
+        """(label, confidence), or None when no model has been trained"""
+        with self._lock:
+            self.requests += 1
+        if self.model is None:
+            return None
+        return self.model.predict(message)
+
+    def probabilities(self, message: str):
+        """{label: probability} without counting a request, or None when no model has been trained"""
+        if self.model is None:
+            return None
+        return dict(zip(self.model.labels, (float(p) for p in self.model.predict_proba(message))))
+
+    def is_confident(self, prediction) -> bool:
+        return prediction is not None and prediction[1] >= self.threshold
+
+    def record_local(self):
+        with self._lock:
+            self.local += 1
+
+    def record_fallback(self):
+        with self._lock:
+            self.fallbacks += 1
+
+    def should_shadow(self) -> bool:
+        return self.model is not None and random.random() < self.shadow_rate
+
+    def record_llm_label(self, message: str, prediction, llm_label: str, shadow: bool = False):
+        """Count how the local prediction compared with the LLM and log the labelled message"""
+        agreed = prediction is not None and prediction[0] == llm_label
+        with self._lock:
+            if shadow:
+                self.shadow_checked += 1
+                self.shadow_agreed += agreed
+            elif prediction is not None:
+                self.fallback_compared += 1
+                self.fallback_agreed += agreed
+            if self.traffic_log:
+                self._append_traffic({"message": message, "label": llm_label})
+
+    def _append_traffic(self, record):
+        """Caller holds the lock"""
+        try:
+            if os.path.getsize(self.traffic_log) >= self.traffic_log_max_bytes:
+                os.replace(self.traffic_log, self.traffic_log + ".1")
+        except FileNotFoundError:
+            pass
+        with open(self.traffic_log, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "model_loaded": self.model is not None,
+                "threshold": self.threshold,
+                "requests": self.requests,
+                "local": self.local,
+                "fallbacks": self.fallbacks,
+                "fallback_rate": round(self.fallbacks / self.requests, 4) if self.requests else 0.0,
+                # Share of sampled local answers the LLM agreed with
+                "accuracy": round(self.shadow_agreed / self.shadow_checked, 4) if self.shadow_checked else None,
+                "shadow_checked": self.shadow_checked,
+                # How often the low-confidence guess matched the LLM anyway
+                "fallback_agreement": round(self.fallback_agreed / self.fallback_compared, 4) if self.fallback_compared else None,
+                "offline": self.model.metrics if self.model is not None else None
+            }
@@ -0,0 +1,282 @@
+import asyncio
+import logging
+import threading
+import time
+from types import SimpleNamespace
+from openai import AuthenticationError, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+MAX_RATE_LIMIT_RETRIES = 5
+DEFAULT_RETRY_AFTER_SECONDS = 2.0
+_STREAM_END = object()
+
+class RateLimitQueueTimeout(Exception):
+    """Raised when a request could not be admitted within the gateway's queue wait budget"""
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4
+
+class StreamedCompletion:
+    """Outcome of a streamed chat call; usage is estimated when the stream does not report it"""
+
+    def __init__(self, text: str, total_tokens: int):
+        self.text = text
+        self.usage = SimpleNamespace(total_tokens=total_tokens)
+
+class TokenBucket:
+    """
+    Per-minute quota as a token bucket: holds up to `limit_per_minute` tokens and
+    refills continuously. Waiters are served in arrival order. Must be used from a
+    single event loop.
+    """
+
+    def __init__(self, limit_per_minute: float):
+        self.capacity = float(limit_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float, deadline: float):
+        """Take `amount` tokens, waiting for refill; raises RateLimitQueueTimeout past `deadline`"""
+        amount = min(float(amount), self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                now = time.monotonic()
+                wait = max(self.paused_until - now, (amount - self.tokens) / self.rate if self.tokens < amount else 0.0)
+                if wait <= 0:
+                    self.tokens -= amount
+                    return
+                if now + wait > deadline:
+                    raise RateLimitQueueTimeout(
+                        "Rate limit exceeded: request could not be scheduled within the queue wait budget"
+                    )
+                await asyncio.sleep(wait)
+
+    def settle(self, estimated: float, actual: float):
+        """Correct an admission estimate with the tokens the response reported using"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + estimated - actual)
+
+    def pause(self, seconds: float):
+        """Hold all admissions for `seconds`, e.g. after the service returned 429"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def stats(self):
+        available = min(self.capacity, self.tokens + (time.monotonic() - self.updated_at) * self.rate)
+        return {"limit_per_minute": self.capacity, "available": round(available, 1)}
+
+class AzureOpenAIGateway:
+    """
+    Single entry point for the chat and embedding calls of one Azure OpenAI deployment.
+
+    Calls run on the gateway's own event loop thread with the registry's async
+    client, so sync callers (embedding during ingestion, helpers running on the
+    blocking pool) and async request handlers share one connection pool, one
+    concurrency limit and one pair of TPM/RPM token buckets. A request is admitted
+    with an estimate of its tokens and the bucket is then settled with the
+    response's `usage`. Bursts beyond the quota queue for up to `max_queue_wait`
+    seconds instead of failing; 429s pause admissions for the Retry-After delay and
+    are retried.
+    """
+
+    def __init__(self, registry, name: str, tpm_limit: float = 0, rpm_limit: float = 0,
+                 max_concurrency: int = 16, max_queue_wait: float = 10):
+        self.registry = registry
+        self.name = name
+        self.tpm_limit = tpm_limit
+        self.rpm_limit = rpm_limit
+        self.max_concurrency = max_concurrency
+        self.max_queue_wait = max_queue_wait
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._tokens = None
+        self._requests = None
+        self._semaphore = None
+        self.requests = 0
+        self.queued_seconds = 0.0
+        self.rate_limited = 0
+        self.rejected = 0
+        self.tokens_used = 0
+
+    # ---- event loop ------------------------------------------------------------------
+
+    def _ensure_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name=f"openai-gateway-{self.name}", daemon=True).start()
+                asyncio.run_coroutine_threadsafe(self._init_limits(), loop).result()
+                self._loop = loop
+        return self._loop
+
+    async def _init_limits(self):
+        # asyncio primitives are created on the loop that will use them
+        self._tokens = TokenBucket(self.tpm_limit) if self.tpm_limit else None
+        self._requests = TokenBucket(self.rpm_limit) if self.rpm_limit else None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def submit(self, coroutine):
+        """Schedule a coroutine on the gateway loop; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop())
+
+    def run_sync(self, coroutine):
+        """Run a gateway coroutine from a synchronous caller (never from the gateway loop itself)"""
+        return self.submit(coroutine).result()
+
+    async def run(self, coroutine):
+        """Run a gateway coroutine from any event loop"""
+        return await asyncio.wrap_future(self.submit(coroutine))
+
+    # ---- admission -------------------------------------------------------------------
+
+    async def _call(self, estimated_tokens, make_request):
+        client = await asyncio.to_thread(self.registry.get_async, self.name)
+        if client is None:
+            raise ValueError(f"Azure OpenAI {self.name} client not initialized. Error: {self.registry.error(self.name)}")
+        started = time.monotonic()
+        deadline = started + self.max_queue_wait
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            try:
+                if self._requests:
+                    await self._requests.acquire(1, deadline)
+                if self._tokens:
+                    await self._tokens.acquire(estimated_tokens, deadline)
+            except RateLimitQueueTimeout:
+                self.rejected += 1
+                raise
+            async with self._semaphore:
+                self.queued_seconds += time.monotonic() - started
+                try:
+                    response = await make_request(client)
+                except AuthenticationError as e:
+                    # The key is rejected for every request; disable the client until the registry re-probes it
+                    await asyncio.to_thread(self.registry.mark_failed, self.name, f"Authentication failed: {e}")
+                    raise
+                except RateLimitError as e:
+                    self.rate_limited += 1
+                    if self._tokens:
+                        self._tokens.settle(estimated_tokens, 0)
+                    delay = self._retry_after(e, attempt)
+                    logger.warning(f"Azure OpenAI {self.name} returned 429; pausing admissions for {delay}s")
+                    for bucket in (self._requests, self._tokens):
+                        if bucket:
+                            bucket.pause(delay)
+                    if attempt == MAX_RATE_LIMIT_RETRIES or time.monotonic() + delay > deadline:
+                        raise
+                    started = time.monotonic()
+                    continue
+            self.requests += 1
+            usage = getattr(response, "usage", None)
+            actual = getattr(usage, "total_tokens", None) if usage is not None else None
+            if actual is not None:
+                self.tokens_used += actual
+                if self._tokens:
+                    self._tokens.settle(estimated_tokens, actual)
+            return response
+
+    @staticmethod
+    def _retry_after(error, attempt):
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+            try:
+                return float(headers[header]) * scale
+            except (KeyError, TypeError, ValueError):
+                continue
+        return DEFAULT_RETRY_AFTER_SECONDS * 2 ** attempt
+
+    # ---- calls -----------------------------------------------------------------------
+
+    async def _chat(self, model, messages, **kwargs):
+        estimated = sum(estimate_tokens(message.get("content") or "") for message in messages) + kwargs.get("max_tokens", 0)
+        return await self._call(
+            estimated,
+            lambda client: client.chat.completions.create(model=model, messages=messages, **kwargs)
+        )
+
+    async def _embed(self, model, inputs):
+        estimated = sum(estimate_tokens(text) for text in inputs)
+        return await self._call(
+            estimated,
+            lambda client: client.embeddings.create(model=model, input=inputs)
+        )
+
+    async def _stream_chat(self, model, messages, forward, **kwargs):
+        prompt_tokens = sum(estimate_tokens(message.get("content") or "") for message in messages)
+        estimated = prompt_tokens + kwargs.get("max_tokens", 0)
+
+        async def consume(client):
+            # 429s are raised by create(), before any chunk has been forwarded, so a retry is safe
+            stream = await client.chat.completions.create(model=model, messages=messages, stream=True, **kwargs)
+            parts, usage = [], None
+            async for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    forward(delta)
+            text = "".join(parts)
+            total = getattr(usage, "total_tokens", None) or prompt_tokens + estimate_tokens(text)
+            return StreamedCompletion(text, total)
+
+        return await self._call(estimated, consume)
+
+    async def stream_chat(self, model, messages, **kwargs):
+        """
+        Async generator of content deltas from a `stream=True` chat completion, usable from
+        any event loop. Chunks are read on the gateway loop and handed over through an
+        asyncio.Queue on the caller's loop; closing the generator cancels the request.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def forward(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                pass  # the caller's loop has already closed
+
+        future = self.submit(self._stream_chat(model, messages, forward, **kwargs))
+        future.add_done_callback(lambda _: forward(_STREAM_END))
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    break
+                yield item
+            future.result()
+        finally:
+            future.cancel()
+
+    async def chat(self, model, messages, **kwargs):
+        return await self.run(self._chat(model, messages, **kwargs))
+
+    def chat_sync(self, model, messages, **kwargs):
+        return self.run_sync(self._chat(model, messages, **kwargs))
+
+    async def embed(self, model, inputs):
+        return await self.run(self._embed(model, inputs))
+
+    def embed_sync(self, model, inputs):
+        return self.run_sync(self._embed(model, inputs))
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "tokens_used": self.tokens_used,
+            "rate_limited": self.rate_limited,
+            "rejected": self.rejected,
+            "avg_queue_seconds": round(self.queued_seconds / self.requests, 3) if self.requests else 0.0,
+            "tpm": self._tokens.stats() if self._tokens else None,
+            "rpm": self._requests.stats() if self._requests else None,
+        }
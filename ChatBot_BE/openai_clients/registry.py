@@ -0,0 +1,248 @@
+import logging
+import re
+import threading
+import time
+import httpx
+import requests
+from openai import AzureOpenAI, AsyncAzureOpenAI
+
+logger = logging.getLogger(__name__)
+
+class TransientValidationError(Exception):
+    """Validation could not reach a verdict (network error, timeout, 429/5xx); worth retrying"""
+
+def validate_azure_openai_config(api_key: str, endpoint: str, api_version: str, model: str) -> tuple[bool, str]:
+    """
+    Validate Azure OpenAI API key and endpoint by checking format and making a test request.
+    Returns (is_valid, error_message) for a definitive answer (bad format, 401, 404) and
+    raises TransientValidationError when the service could not give one.
+    """
+    if not api_key or not re.match(r'^[0-9a-fA-F]{32}$', api_key):
+        error_msg = "Invalid Azure OpenAI API key format. It should be a 32-character hexadecimal string."
+        logger.error(error_msg)
+        return False, error_msg
+
+    endpoint_pattern = r'^https://[a-z0-9-]+\.openai\.azure\.com/?$'
+    if not endpoint or not re.match(endpoint_pattern, endpoint):
+        error_msg = f"Invalid Azure OpenAI endpoint format: {endpoint}. Expected format: https://<resource-name>.openai.azure.com/."
+        logger.error(error_msg)
+        return False, error_msg
+
+    test_url = f"{endpoint.rstrip('/')}/openai/deployments/{model}/embeddings?api-version={api_version}"
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    body = {"input": "Test embedding"}
+    try:
+        response = requests.post(test_url, headers=headers, json=body, timeout=10)
+        if response.status_code == 200:
+            logger.info(f"Azure OpenAI endpoint validated successfully: {endpoint}")
+            return True, ""
+        elif response.status_code == 401:
+            error_msg = "Authentication failed: Invalid Azure OpenAI API key."
+            logger.error(error_msg)
+            return False, error_msg
+        elif response.status_code == 404:
+            error_msg = f"Endpoint or model not found: {endpoint}/{model}."
+            logger.error(error_msg)
+            return False, error_msg
+        else:
+            raise TransientValidationError(
+                f"Failed to access Azure OpenAI endpoint: {endpoint}. Status code: {response.status_code}, Response: {response.text}."
+            )
+    except requests.exceptions.RequestException as e:
+        raise TransientValidationError(f"Error connecting to Azure OpenAI endpoint {endpoint}: {str(e)}.")
+
+def initialize_azure_openai_client(api_key: str, endpoint: str, api_version: str) -> AzureOpenAI:
+    """Initialize Azure OpenAI client. Construction is local; no network call is made."""
+    return AzureOpenAI(
+        api_key=api_key,
+        api_version=api_version,
+        azure_endpoint=endpoint
+    )
+
+def initialize_async_azure_openai_client(api_key: str, endpoint: str, api_version: str,
+                                         max_connections: int = 32) -> AsyncAzureOpenAI:
+    """
+    Async client over a pooled httpx connection pool. SDK retries are disabled because
+    callers go through AzureOpenAIGateway, which handles 429s against its shared quota.
+    """
+    return AsyncAzureOpenAI(
+        api_key=api_key,
+        api_version=api_version,
+        azure_endpoint=endpoint,
+        max_retries=0,
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(60.0, connect=10.0)
+        )
+    )
+
+class _ClientEntry:
+    def __init__(self, name, api_key, endpoint, api_version, model):
+        self.name = name
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.api_version = api_version
+        self.model = model
+        self.client = None
+        self.async_client = None
+        self.error = None
+        self.validated_at = None
+        self.lock = threading.Lock()
+        self.probing = False
+
+class AzureOpenAIClientRegistry:
+    """
+    Lazily validated Azure OpenAI clients.
+
+    Each registered client is validated on first use and the result is cached.
+    A successful validation is trusted for `ttl_seconds`, after which it is
+    re-checked in the background while the cached client keeps serving. Only a
+    definitive failure (invalid key/endpoint, 401, 404, or mark_failed from a call)
+    disables a client; when a re-check merely cannot reach the service, the cached
+    client stays in use. Disabled or never-validated clients are re-probed in the
+    background every `retry_seconds`, so a client that was unreachable at startup
+    becomes enabled again without a restart.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, retry_seconds: float = 60):
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+        self._entries = {}
+
+    def register(self, name: str, api_key: str, endpoint: str, api_version: str, model: str):
+        self._entries[name] = _ClientEntry(name, api_key, endpoint, api_version, model)
+
+    def get(self, name: str):
+        """Return the client for `name`, or None if it is currently unavailable."""
+        entry = self._entries[name]
+        if entry.validated_at is None:
+            with entry.lock:
+                if entry.validated_at is None:
+                    self._validate(entry)
+            return entry.client
+
+        age = time.monotonic() - entry.validated_at
+        if entry.client is None and age >= self.retry_seconds:
+            self._probe_in_background(entry)
+        elif entry.client is not None and age >= self.ttl_seconds:
+            self._probe_in_background(entry)
+        return entry.client
+
+    def get_async(self, name: str):
+        """
+        Async client for `name`, or None while the client is unavailable. It shares the
+        validation state of the sync client and is created once, on first use.
+        """
+        if self.get(name) is None:
+            return None
+        entry = self._entries[name]
+        with entry.lock:
+            if entry.async_client is None:
+                entry.async_client = initialize_async_azure_openai_client(
+                    entry.api_key,
+                    entry.endpoint,
+                    entry.api_version
+                )
+            return entry.async_client
+
+    def is_enabled(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def error(self, name: str):
+        return self._entries[name].error
+
+    def mark_failed(self, name: str, error: str):
+        """Disable a client after a definitive failure seen at call time (401/404); it will be re-probed later."""
+        entry = self._entries[name]
+        with entry.lock:
+            entry.client = None
+            entry.error = error
+            entry.validated_at = time.monotonic()
+
+    def status(self):
+        """Current state of every client, without triggering validation."""
+        return {
+            name: {
+                "enabled": entry.client is not None,
+                "validated": entry.validated_at is not None,
+                "error": entry.error
+            }
+            for name, entry in self._entries.items()
+        }
+
+    def _validate(self, entry: _ClientEntry):
+        """Validate and record the outcome; caller holds entry.lock"""
+        validated_at = time.monotonic()
+        self._record(entry, validated_at, *self._check(entry))
+
+    def _check(self, entry: _ClientEntry):
+        """
+        Run the validation request without touching the entry, so it can happen outside
+        entry.lock. Returns (is_valid, error, transient).
+        """
+        try:
+            is_valid, validation_error = validate_azure_openai_config(
+                entry.api_key,
+                entry.endpoint,
+                entry.api_version,
+                entry.model
+            )
+            return is_valid, validation_error, False
+        except TransientValidationError as e:
+            return False, str(e), True
+        except Exception as e:
+            return False, str(e), False
+
+    def _record(self, entry: _ClientEntry, validated_at, is_valid, validation_error, transient):
+        """Apply a validation outcome to the entry; caller holds entry.lock"""
+        try:
+            if transient:
+                raise TransientValidationError(validation_error)
+            if not is_valid:
+                raise ValueError(validation_error)
+            client = entry.client or initialize_azure_openai_client(
+                entry.api_key,
+                entry.endpoint,
+                entry.api_version
+            )
+            entry.client = client
+            entry.error = None
+            logger.info(f"AzureOpenAI {entry.name} client initialized successfully")
+        except TransientValidationError as e:
+            entry.error = str(e)
+            if entry.client is None:
+                logger.error(f"Failed to initialize AzureOpenAI {entry.name} client: {entry.error}")
+            else:
+                logger.warning(f"Could not re-validate AzureOpenAI {entry.name} client; keeping it in use: {entry.error}")
+                # Check again after retry_seconds instead of trusting it for another full TTL
+                validated_at -= self.ttl_seconds - self.retry_seconds
+        except Exception as e:
+            entry.client = None
+            entry.error = str(e)
+            logger.error(f"Failed to initialize AzureOpenAI {entry.name} client: {entry.error}")
+        entry.validated_at = validated_at
+
+    def _probe_in_background(self, entry: _ClientEntry):
+        with entry.lock:
+            if entry.probing:
+                return
+            entry.probing = True
+            previous_validated_at = entry.validated_at
+
+        def probe():
+            try:
+                # The network request runs without the lock, so callers keep getting the cached client
+                validated_at = time.monotonic()
+                outcome = self._check(entry)
+                with entry.lock:
+                    # mark_failed ran meanwhile; its verdict is newer than this probe
+                    if entry.validated_at == previous_validated_at:
+                        self._record(entry, validated_at, *outcome)
+            finally:
+                with entry.lock:
+                    entry.probing = False
+
+        threading.Thread(target=probe, name=f"openai-probe-{entry.name}", daemon=True).start()
@@ -0,0 +1,178 @@
+import json
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from resume_manager.profile_extractor import matches_filter
+
+BM25_INDEX_FILE = "bm25_index.sqlite3"
+# Documents whose metadata is loaded per query round trip when results are filtered
+METADATA_BATCH_SIZE = 200
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "of", "on", "or", "that", "the", "to", "was", "were", "with", "who", "what", "which", "me", "show",
+    "find", "list", "give", "any", "all", "candidates", "candidate", "resume", "resumes", "people",
+    "someone", "developers", "developer", "experience", "years", "year", "knows", "know", "skilled"
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*|\.net")
+
+def tokenize(text: str):
+    """Lowercase word tokens that keep skill spellings such as c#, c++, .net and asp.net intact"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+class BM25Index:
+    """
+    Disk-backed inverted index with BM25 scoring over parsed resume text.
+
+    Postings live in SQLite so that a changed resume only rewrites its own rows.
+    Documents are keyed by file id and carry the hash of the text they were
+    indexed from, which lets callers skip unchanged resumes.
+    """
+
+    def __init__(self, db_path: str = BM25_INDEX_FILE, k1: float = 1.5, b: float = 0.75):
+        self.db_path = db_path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                metadata TEXT
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings (doc_id);
+            """
+        )
+        self._conn.commit()
+
+    def document_hashes(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT doc_id, content_hash FROM documents").fetchall())
+
+    def upsert_documents(self, documents):
+        """
+        Index documents given as an iterable of (doc_id, text, content_hash, metadata).
+        Documents whose stored hash matches are skipped. Returns the number re-indexed.
+        """
+        existing = self.document_hashes()
+        updated = 0
+        with self._lock:
+            for doc_id, text, content_hash, metadata in documents:
+                if existing.get(doc_id) == content_hash:
+                    continue
+                term_counts = Counter(tokenize(text))
+                self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO documents (doc_id, content_hash, length, metadata) VALUES (?, ?, ?, ?)",
+                    (doc_id, content_hash, sum(term_counts.values()), json.dumps(metadata or {}))
+                )
+                self._conn.executemany(
+                    "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                    [(term, doc_id, tf) for term, tf in term_counts.items()]
+                )
+                updated += 1
+            self._conn.commit()
+        return updated
+
+    def remove_documents(self, doc_ids):
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM postings WHERE doc_id = ?", [(doc_id,) for doc_id in doc_ids])
+            self._conn.executemany("DELETE FROM documents WHERE doc_id = ?", [(doc_id,) for doc_id in doc_ids])
+            self._conn.commit()
+
+    def remove_missing(self, live_doc_ids):
+        """Remove documents that are no longer in live_doc_ids; returns how many were removed"""
+        live_doc_ids = set(live_doc_ids)
+        missing = [doc_id for doc_id in self.document_hashes() if doc_id not in live_doc_ids]
+        self.remove_documents(missing)
+        return len(missing)
+
+    def has_terms(self, terms) -> bool:
+        """True if every term occurs in at least one indexed document"""
+        terms = set(terms)
+        if not terms:
+            return False
+        with self._lock:
+            placeholders = ",".join("?" * len(terms))
+            found = self._conn.execute(
+                f"SELECT COUNT(DISTINCT term) FROM postings WHERE term IN ({placeholders})",
+                tuple(terms)
+            ).fetchone()[0]
+        return found == len(terms)
+
+    def candidate_name_terms(self, terms):
+        """The subset of terms that are a word of some indexed document's candidate_name"""
+        with self._lock:
+            names = self._conn.execute(
+                "SELECT DISTINCT json_extract(metadata, '$.candidate_name') FROM documents"
+            ).fetchall()
+        words = {word for (name,) in names if name for word in tokenize(str(name))}
+        return set(terms) & words
+
+    def search(self, query: str, top_k: int = 10, where=None):
+        """
+        Return [(doc_id, score, metadata)] for the top_k documents by BM25 score. With a
+        `where` metadata filter, documents are checked in score order until top_k match.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        with self._lock:
+            doc_count, total_length = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM documents").fetchone()
+            if not doc_count:
+                return []
+            avg_length = total_length / doc_count
+            placeholders = ",".join("?" * len(terms))
+            rows = self._conn.execute(
+                f"""
+                SELECT p.term, p.doc_id, p.tf, d.length
+                FROM postings p JOIN documents d ON d.doc_id = p.doc_id
+                WHERE p.term IN ({placeholders})
+                """,
+                tuple(terms)
+            ).fetchall()
+
+        doc_freq = Counter(term for term, _, _, _ in rows)
+        scores = Counter()
+        for term, doc_id, tf, length in rows:
+            idf = math.log(1 + (doc_count - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+            scores[doc_id] += idf * tf * (self.k1 + 1) / norm
+
+        ranked = scores.most_common(None if where else top_k)
+        results = []
+        for start in range(0, len(ranked), METADATA_BATCH_SIZE):
+            batch = ranked[start:start + METADATA_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            with self._lock:
+                metadata = {
+                    doc_id: json.loads(raw or "{}")
+                    for doc_id, raw in self._conn.execute(
+                        f"SELECT doc_id, metadata FROM documents WHERE doc_id IN ({placeholders})",
+                        tuple(doc_id for doc_id, _ in batch)
+                    ).fetchall()
+                }
+            for doc_id, score in batch:
+                doc_metadata = metadata.get(doc_id, {})
+                if where and not matches_filter(doc_metadata, where):
+                    continue
+                results.append((doc_id, score, doc_metadata))
+                if len(results) == top_k:
+                    return results
+        return results
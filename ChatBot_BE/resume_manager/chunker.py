@@ -0,0 +1,114 @@
+import re
+
+SECTION_KEYWORDS = (
+    "summary", "profile", "objective", "experience", "employment", "work history",
+    "projects", "skills", "technical skills", "education", "certifications",
+    "achievements", "responsibilities", "personal details", "languages", "tools"
+)
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4
+
+class ResumeChunker:
+    """
+    Split resume text into overlapping chunks for embedding.
+
+    Text is treated as a sequence of lines. Lines that look like section headings
+    ("EXPERIENCE", "Technical Skills:") start a new chunk when the current one is
+    already reasonably sized, lines are packed until `max_tokens`, and each new
+    chunk repeats the trailing `overlap_tokens` of the previous one so that
+    context spanning a boundary is still retrievable.
+    """
+
+    def __init__(self, max_tokens: int = 512, overlap_tokens: int = 64):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.min_section_tokens = max_tokens // 4
+
+    def is_heading(self, line: str) -> bool:
+        stripped = line.strip().rstrip(":").strip()
+        if not stripped or len(stripped) > 60:
+            return False
+        lowered = stripped.lower()
+        if any(lowered == keyword or lowered.startswith(keyword + " ") or lowered.endswith(" " + keyword)
+               for keyword in SECTION_KEYWORDS):
+            return True
+        letters = [c for c in stripped if c.isalpha()]
+        return len(letters) >= 4 and stripped.isupper()
+
+    def _split_long_line(self, line: str):
+        """Split a line longer than max_tokens at sentence, then word boundaries"""
+        max_chars = self.max_tokens * 4
+        pieces = []
+        current = ""
+        for sentence in re.split(r'(?<=[.;!?])\s+', line):
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                if current:
+                    pieces.append(current)
+                    current = ""
+                pieces.append(sentence[:cut].strip())
+                sentence = sentence[cut:].strip()
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                pieces.append(current)
+                current = ""
+            current = f"{current} {sentence}".strip()
+        if current:
+            pieces.append(current)
+        return pieces
+
+    def _lines(self, text: str):
+        for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+            line = line.strip()
+            if not line:
+                continue
+            if estimate_tokens(line) > self.max_tokens:
+                yield from self._split_long_line(line)
+            else:
+                yield line
+
+    def _overlap(self, lines):
+        """Trailing lines of a chunk that fit in overlap_tokens"""
+        tail = []
+        tokens = 0
+        for line in reversed(lines):
+            tokens += estimate_tokens(line) + 1
+            if tokens > self.overlap_tokens:
+                break
+            tail.insert(0, line)
+        return tail
+
+    def chunk(self, text: str):
+        """Return the list of chunk texts covering text, in document order"""
+        chunks = []
+        current = []
+        current_tokens = 0
+        has_new_content = False
+
+        def flush():
+            nonlocal current, current_tokens, has_new_content
+            if current and has_new_content:
+                chunks.append("\n".join(current))
+            current = self._overlap(current)
+            current_tokens = sum(estimate_tokens(line) + 1 for line in current)
+            has_new_content = False
+
+        for line in self._lines(text):
+            line_tokens = estimate_tokens(line) + 1
+            if self.is_heading(line) and current_tokens >= self.min_section_tokens:
+                flush()
+                # A new section should not start with the previous section's tail
+                current = []
+                current_tokens = 0
+            elif current_tokens + line_tokens > self.max_tokens:
+                flush()
+                while current and current_tokens + line_tokens > self.max_tokens:
+                    current_tokens -= estimate_tokens(current.pop(0)) + 1
+            current.append(line)
+            current_tokens += line_tokens
+            has_new_content = True
+        flush()
+        return chunks
@@ -1,18 +1,66 @@
+import hashlib
+import json
 import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
-from resume_manager.utils import calculate_file_hash
+from requests.adapters import HTTPAdapter
 from resume_manager.metadata_manager import ResumeMetadataManager
+from resume_manager.profile_extractor import extract_candidate_name
+from resume_manager.progress import IngestionCancelled
+
+DEFAULT_DOWNLOAD_CONCURRENCY = 8
+THROTTLE_STATUS_CODES = (429, 503)
+MAX_THROTTLE_RETRIES = 5
+DEFAULT_RETRY_AFTER_SECONDS = 2
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+PARTIAL_SUFFIX = ".part"
+# (connect, read) seconds; the read timeout applies between chunks, so a stalled stream fails
+REQUEST_TIMEOUT = (10, 60)
+DELTA_STATE_FILE = "sharepoint_delta_state.json"
 
 class SharePointFetcher:
-    def __init__(self, access_token, site_id, folder_path, download_dir="resumes"):
+    def __init__(self, access_token, site_id, folder_path, download_dir="resumes", progress=None,
+                 max_concurrency=DEFAULT_DOWNLOAD_CONCURRENCY, base_url="https://graph.microsoft.com/v1.0",
+                 use_delta=True, delta_state_file=DELTA_STATE_FILE, stop_event=None):
         self.access_token = access_token
         self.site_id = site_id
         self.folder_path = folder_path
         self.download_dir = download_dir
-        self.base_url = "https://graph.microsoft.com/v1.0"
+        self.base_url = base_url
         self.metadata_manager = ResumeMetadataManager()
+        self.progress = progress
+        self.max_concurrency = max(1, max_concurrency)
+        self.use_delta = use_delta
+        self.delta_state_file = delta_state_file
+        # threading.Event; when set, downloads stop and fetch_and_update raises IngestionCancelled
+        self.stop_event = stop_event
+
+        # One pooled session so downloads reuse TCP+TLS connections to the Graph hosts
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._throttle_lock = threading.Lock()
+        self._throttled_until = 0.0
 
         os.makedirs(self.download_dir, exist_ok=True)
+        self._remove_partial_downloads()
+
+    def _remove_partial_downloads(self):
+        """Delete temp files left behind by a sync that crashed mid-download"""
+        for name in os.listdir(self.download_dir):
+            if name.endswith(PARTIAL_SUFFIX):
+                try:
+                    os.remove(os.path.join(self.download_dir, name))
+                except OSError:
+                    pass
+
+    def _check_stop(self):
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise IngestionCancelled("SharePoint sync stopped")
 
     def _headers(self):
         return {
@@ -20,51 +68,250 @@ class SharePointFetcher:
             "Accept": "application/json"
         }
 
-    def fetch_and_update(self):
-        """Main method to fetch files from SharePoint and download new/updated ones"""
+    def _wait_for_throttle(self):
+        with self._throttle_lock:
+            delay = self._throttled_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _get(self, url, **kwargs):
+        """
+        GET through the pooled session. On 429/503 the Retry-After delay is applied to
+        every worker, not just the throttled one, as Graph asks clients to back off.
+        """
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            self._wait_for_throttle()
+            kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+            response = self.session.get(url, **kwargs)
+            if response.status_code not in THROTTLE_STATUS_CODES or attempt == MAX_THROTTLE_RETRIES:
+                response.raise_for_status()
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else DEFAULT_RETRY_AFTER_SECONDS * 2 ** attempt
+            print(f"Throttled by SharePoint ({response.status_code}); retrying in {delay}s")
+            response.close()
+            with self._throttle_lock:
+                self._throttled_until = max(self._throttled_until, time.monotonic() + delay)
+
+    def _get_all_pages(self, url):
+        """
+        Follow @odata.nextLink until the last page. Returns (items, deltaLink); the
+        deltaLink is only present on the final page of a delta query.
+        """
+        items, delta_link = [], None
+        while url:
+            page = self._get(url, headers=self._headers()).json()
+            items.extend(page.get("value", []))
+            url = page.get("@odata.nextLink")
+            delta_link = page.get("@odata.deltaLink")
+        return items, delta_link
+
+    def _load_delta_link(self):
+        if not os.path.exists(self.delta_state_file):
+            return None
+        with open(self.delta_state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        return state.get(f"{self.site_id}:{self.folder_path}")
+
+    def _save_delta_link(self, delta_link):
+        state = {}
+        if os.path.exists(self.delta_state_file):
+            with open(self.delta_state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        state[f"{self.site_id}:{self.folder_path}"] = delta_link
+        temp_path = f"{self.delta_state_file}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, self.delta_state_file)
+
+    def _list_folder(self):
+        """Full listing of the folder's files, across all pages"""
         url = f"{self.base_url}/sites/{self.site_id}/drive/root:/{self.folder_path}:/children"
-        response = requests.get(url, headers=self._headers())
-        response.raise_for_status()
-        files = response.json().get("value", [])
+        items, _ = self._get_all_pages(url)
+        return [item for item in items if "file" in item]
 
-        print(f"Found {len(files)} files in SharePoint folder.")
-        
-        for file in files:
-            filename = file["name"]
-            last_modified = file["lastModifiedDateTime"]
-            file_url = file["@microsoft.graph.downloadUrl"]
-
-            print(f"Checking file: {filename}")
-            file_content = self._download_file(file_url)
-            file_hash = calculate_file_hash(file_content)
-
-            if self.metadata_manager.check_if_update_needed(filename, last_modified, file_hash):
-                print(f"Downloading updated file: {filename}")
-                self._save_file(filename, file_content)
-                
-                candidate_name = self._extract_candidate_name(filename)
-                file_size = len(file_content)
-
-                self.metadata_manager.update_metadata(
-                    filename, last_modified, file_size, file_hash, candidate_name
-                )
+    def _list_changes(self, delta_link):
+        """
+        Files in the folder that were added or changed since delta_link, plus the
+        Graph item ids of files that were deleted or moved out of it. SharePoint only
+        supports delta on the drive root, so items are filtered by parent folder id.
+        """
+        folder_url = f"{self.base_url}/sites/{self.site_id}/drive/root:/{self.folder_path}"
+        folder_id = self._get(folder_url, headers=self._headers()).json()["id"]
+        items, new_delta_link = self._get_all_pages(delta_link)
+        changed, removed_ids = {}, set()
+        for item in items:
+            if "file" not in item and "deleted" not in item:
+                continue
+            if "deleted" in item or item.get("parentReference", {}).get("id") != folder_id:
+                removed_ids.add(item["id"])
+                changed.pop(item["id"], None)
             else:
-                print(f"No update needed for {filename}.")
+                changed[item["id"]] = item
+                removed_ids.discard(item["id"])
+        return list(changed.values()), removed_ids, new_delta_link
 
-    def _download_file(self, download_url):
-        """Download file content"""
-        response = requests.get(download_url)
-        response.raise_for_status()
-        return response.content
+    def _latest_delta_link(self):
+        """A delta link for 'now', without enumerating the drive"""
+        _, delta_link = self._get_all_pages(f"{self.base_url}/sites/{self.site_id}/drive/root/delta?token=latest")
+        return delta_link
 
-    def _save_file(self, filename, content):
-        """Save file to local directory"""
+    def _remove_file(self, filename):
+        print(f"Removing deleted file: {filename}")
+        self.metadata_manager.remove_metadata(filename)
         filepath = os.path.join(self.download_dir, filename)
-        with open(filepath, "wb") as f:
-            f.write(content)
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+    def fetch_and_update(self):
+        """
+        Main method to fetch files from SharePoint and download new/updated ones.
+
+        With delta sync, the first run lists the folder in full and stores a delta
+        link; later runs only fetch items added, changed or deleted since then. An
+        expired delta link (410 Gone) falls back to a full listing.
+        """
+        delta_link = self._load_delta_link() if self.use_delta else None
+        files = None
+        if delta_link:
+            try:
+                files, removed_ids, new_delta_link = self._list_changes(delta_link)
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code != 410:
+                    raise
+                print("SharePoint delta token expired; running a full resync.")
+        item_filenames = self.metadata_manager.item_id_index()
+        if files is None:
+            new_delta_link = self._latest_delta_link() if self.use_delta else None
+            files = self._list_folder()
+            listed_names = {file["name"] for file in files}
+            removed_names = [name for name in self.metadata_manager.metadata if name not in listed_names]
+            print(f"Found {len(files)} files in SharePoint folder.")
+            if not files and removed_names:
+                # An empty listing is far more likely a fetch problem (wrong folder, permissions)
+                # than an emptied library; keep every resume and list in full again next time
+                print(f"Warning: SharePoint listing is empty but {len(removed_names)} resumes are known; "
+                      f"not removing any of them.")
+                removed_names = []
+                new_delta_link = None
+        else:
+            removed_names = [item_filenames[item_id] for item_id in removed_ids if item_id in item_filenames]
+            print(f"Found {len(files)} added or changed files in SharePoint folder since the last sync.")
+
+        with self.metadata_manager.batch():
+            failed = self._apply_changes(files, item_filenames, removed_names)
+
+        # Keep the previous delta link when a download failed so its change is delivered again
+        self._check_stop()
+        if new_delta_link and not failed:
+            self._save_delta_link(new_delta_link)
+
+    def _apply_changes(self, files, item_filenames, removed_names):
+        """Remove deleted files and download changed ones; returns the number of failed downloads"""
+        # A renamed file keeps its item id; drop the entry recorded under the old name
+        for file in files:
+            previous = item_filenames.get(file["id"])
+            if previous and previous != file["name"]:
+                removed_names.append(previous)
+        for filename in set(removed_names):
+            self._remove_file(filename)
+        self.metadata_manager.record_item_ids({file["name"]: file["id"] for file in files})
+
+        if self.progress:
+            self.progress.set_count("listed", len(files))
+
+        to_download = []
+        for file in files:
+            if (self.metadata_manager.is_remote_unchanged(
+                    file["name"], file["lastModifiedDateTime"], file.get("size"), file.get("cTag"), file.get("eTag"))
+                    and os.path.exists(os.path.join(self.download_dir, file["name"]))):
+                continue
+            to_download.append(file)
+        print(f"Skipped {len(files) - len(to_download)} unchanged files without downloading.")
+
+        # Downloads run in parallel; hashing, saving and metadata updates stay on this thread
+        failed = 0
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = {
+                executor.submit(self._download_file, self._download_url(file), file["name"]): file
+                for file in to_download
+            }
+            for future in as_completed(futures):
+                if self.stop_event is not None and self.stop_event.is_set():
+                    # Running downloads notice the stop between chunks; queued ones never start
+                    for pending in futures:
+                        pending.cancel()
+                    self._check_stop()
+                file = futures[future]
+                try:
+                    temp_path, file_hash, file_size = future.result()
+                except Exception as e:
+                    print(f"Failed to download {file['name']}: {e}")
+                    failed += 1
+                    continue
+                if self.progress:
+                    self.progress.increment("downloaded")
+                try:
+                    self._process_download(file, temp_path, file_hash, file_size)
+                finally:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+        return failed
+
+    def _process_download(self, file, temp_path, file_hash, file_size):
+        filename = file["name"]
+        last_modified = file["lastModifiedDateTime"]
+        c_tag = file.get("cTag")
+        e_tag = file.get("eTag")
+
+        if (self.metadata_manager.check_if_update_needed(filename, last_modified, file_hash)
+                or not os.path.exists(os.path.join(self.download_dir, filename))):
+            print(f"Downloading updated file: {filename}")
+            self._save_file(filename, temp_path)
+
+            candidate_name = self._extract_candidate_name(filename)
+
+            self.metadata_manager.update_metadata(
+                filename, last_modified, file_size, file_hash, candidate_name, c_tag, e_tag, file.get("id")
+            )
+        else:
+            print(f"No update needed for {filename}.")
+            self.metadata_manager.update_remote_version(filename, last_modified, c_tag, e_tag, file.get("id"))
+
+    def _download_url(self, file):
+        """Pre-authenticated URL from the listing, or the item's /content endpoint when absent"""
+        return file.get("@microsoft.graph.downloadUrl") or \
+            f"{self.base_url}/sites/{self.site_id}/drive/items/{file['id']}/content"
+
+    def _download_file(self, download_url, filename):
+        """
+        Stream a file into a temp file next to its destination, hashing as it arrives.
+        Returns (temp_path, sha256, size); memory use does not depend on file size.
+        """
+        temp_path = os.path.join(self.download_dir, f".{filename}.{uuid.uuid4().hex}{PARTIAL_SUFFIX}")
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            # Graph's pre-authenticated download URLs must not carry the bearer token
+            headers = self._headers() if download_url.startswith(self.base_url) else None
+            with self._get(download_url, headers=headers, stream=True) as response, open(temp_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    self._check_stop()
+                    f.write(chunk)
+                    sha256.update(chunk)
+                    size += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return temp_path, sha256.hexdigest(), size
+
+    def _save_file(self, filename, temp_path):
+        """Atomically move a completed download into place"""
+        os.replace(temp_path, os.path.join(self.download_dir, filename))
 
     def _extract_candidate_name(self, filename):
-        """Basic logic to extract candidate name (can be improved later)"""
-        name_part = filename.split("{")[0] if "{" in filename else filename
-        name_part = os.path.splitext(name_part)[0]
-        return name_part.strip()
+        """Extract candidate name, dropping experience tags like [5y_1m] and role suffixes like -QA Mgr"""
+        return extract_candidate_name(filename)
@@ -1,41 +1,226 @@
 import json
 import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
 
 METADATA_FILE = "resume_metadata.json"
+METADATA_DB_FILE = "resume_metadata.sqlite3"
+# Inside batch(), commit every this many writes so a crash loses little work
+BATCH_COMMIT_SIZE = 200
+
+COLUMNS = ("file_name", "last_modified", "file_size", "file_hash", "candidate_name", "c_tag", "e_tag", "item_id")
+
+class MetadataView(Mapping):
+    """
+    Read-only dict-like view over the metadata table: {file_name: entry}.
+    Lookups by file name are primary-key queries; entries are returned as fresh dicts.
+    """
+
+    def __init__(self, manager):
+        self._manager = manager
+
+    def __getitem__(self, filename):
+        entry = self._manager._fetch_one("SELECT * FROM resumes WHERE file_name = ?", (filename,))
+        if entry is None:
+            raise KeyError(filename)
+        return entry
+
+    def __contains__(self, filename):
+        return self._manager._fetch_one("SELECT * FROM resumes WHERE file_name = ?", (filename,)) is not None
+
+    def __iter__(self):
+        return iter([row[0] for row in self._manager._execute("SELECT file_name FROM resumes ORDER BY file_name")])
+
+    def __len__(self):
+        return self._manager._execute("SELECT COUNT(*) FROM resumes")[0][0]
+
+    def items(self):
+        return [(entry["file_name"], entry) for entry in self._manager._fetch_all("SELECT * FROM resumes ORDER BY file_name")]
+
+    def values(self):
+        return [entry for _, entry in self.items()]
 
 class ResumeMetadataManager:
-    def __init__(self, metadata_file: str = METADATA_FILE):
-        self.metadata_file = metadata_file
-        self.metadata = self.load_metadata()
+    """
+    Resume metadata ({file_name: last_modified, file_size, file_hash, ...}) in SQLite (WAL).
+
+    Writes outside `batch()` commit immediately; inside it they share a transaction, so a
+    sync costs one write per changed file instead of rewriting the whole store. An existing
+    resume_metadata.json is imported once and renamed to *.migrated.
+    """
+
+    def __init__(self, db_path: str = METADATA_DB_FILE, json_file: str = METADATA_FILE):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._pending_writes = 0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS resumes (
+                file_name TEXT PRIMARY KEY,
+                last_modified TEXT,
+                file_size INTEGER,
+                file_hash TEXT,
+                candidate_name TEXT,
+                c_tag TEXT,
+                e_tag TEXT,
+                item_id TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_resumes_file_hash ON resumes (file_hash);
+            CREATE INDEX IF NOT EXISTS idx_resumes_last_modified ON resumes (last_modified);
+            CREATE INDEX IF NOT EXISTS idx_resumes_item_id ON resumes (item_id);
+            """
+        )
+        self._conn.commit()
+        self._migrate_json(json_file)
+        self.metadata = MetadataView(self)
+
+    def _migrate_json(self, json_file):
+        if not json_file or not os.path.exists(json_file) or len(self._execute("SELECT 1 FROM resumes LIMIT 1")):
+            return
+        with open(json_file, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO resumes ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [
+                    (filename,) + tuple(entry.get(column) for column in COLUMNS[1:])
+                    for filename, entry in legacy.items()
+                ]
+            )
+            self._conn.commit()
+        os.replace(json_file, f"{json_file}.migrated")
+        print(f"Migrated {len(legacy)} metadata entries from {json_file} to {self.db_path}.")
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _fetch_one(self, sql, params=()):
+        rows = self._execute(sql, params)
+        return dict(rows[0]) if rows else None
+
+    def _fetch_all(self, sql, params=()):
+        return [dict(row) for row in self._execute(sql, params)]
+
+    def _write(self, sql, params=(), many=False):
+        with self._lock:
+            if many:
+                self._conn.executemany(sql, params)
+            else:
+                self._conn.execute(sql, params)
+            self._pending_writes += 1
+            if not self._batch_depth or self._pending_writes >= BATCH_COMMIT_SIZE:
+                self._commit()
+
+    def _commit(self):
+        self._conn.commit()
+        self._pending_writes = 0
+
+    @contextmanager
+    def batch(self):
+        """
+        Group the writes made inside the block into as few transactions as possible.
+        An exception leaving the outermost block rolls back the writes not yet committed.
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            with self._lock:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._conn.rollback()
+                    self._pending_writes = 0
+            raise
+        with self._lock:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._commit()
 
     def load_metadata(self):
-        """Load existing metadata or initialize new"""
-        if os.path.exists(self.metadata_file):
-            with open(self.metadata_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        else:
-            return {}
+        """All entries as a plain dict"""
+        return dict(self.metadata.items())
 
     def save_metadata(self):
-        """Save metadata to file"""
-        with open(self.metadata_file, "w", encoding="utf-8") as f:
-            json.dump(self.metadata, f, indent=2)
+        """Commit pending writes"""
+        with self._lock:
+            self._commit()
 
     def check_if_update_needed(self, filename, last_modified, file_hash):
         """Check if the file needs to be downloaded/updated"""
-        entry = self.metadata.get(filename)
-        if not entry:
-            return True  # New file
-        if entry["last_modified"] != last_modified or entry["file_hash"] != file_hash:
-            return True  # Updated file
-        return False  # No change
-
-    def update_metadata(self, filename, last_modified, file_size, file_hash, candidate_name):
+        return not self._execute(
+            "SELECT 1 FROM resumes WHERE file_name = ? AND last_modified = ? AND file_hash = ?",
+            (filename, last_modified, file_hash)
+        )
+
+    def is_remote_unchanged(self, filename, last_modified, file_size, c_tag=None, e_tag=None):
+        """
+        Decide from the SharePoint listing alone whether a file is unchanged since it was
+        recorded, so it does not have to be downloaded. The cTag changes only when content
+        changes; entries recorded before tags were stored fall back to lastModified + size.
+        """
+        entry = self._fetch_one("SELECT * FROM resumes WHERE file_name = ?", (filename,))
+        if not entry or entry.get("file_size") != file_size:
+            return False
+        if c_tag and entry.get("c_tag"):
+            return entry["c_tag"] == c_tag
+        if e_tag and entry.get("e_tag") == e_tag:
+            return True
+        return entry.get("last_modified") == last_modified
+
+    def update_metadata(self, filename, last_modified, file_size, file_hash, candidate_name, c_tag=None, e_tag=None,
+                        item_id=None):
         """Update or insert metadata entry"""
-        self.metadata[filename] = {
-            "last_modified": last_modified,
-            "file_size": file_size,
-            "file_hash": file_hash,
-            "candidate_name": candidate_name
-        }
-        self.save_metadata()
+        self._write(
+            f"INSERT OR REPLACE INTO resumes ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            (filename, last_modified, file_size, file_hash, candidate_name, c_tag, e_tag, item_id)
+        )
+
+    def update_remote_version(self, filename, last_modified, c_tag=None, e_tag=None, item_id=None):
+        """Record new listing fields for a file whose content hash did not change"""
+        self._write(
+            "UPDATE resumes SET last_modified = ?, c_tag = ?, e_tag = ?, item_id = ? WHERE file_name = ?",
+            (last_modified, c_tag, e_tag, item_id, filename)
+        )
+
+    def remove_metadata(self, filename):
+        """Forget a file that was deleted from SharePoint"""
+        self._write("DELETE FROM resumes WHERE file_name = ?", (filename,))
+
+    def item_id_index(self):
+        """{SharePoint item id: filename} for entries that have an item id recorded"""
+        return dict(
+            (row[0], row[1]) for row in self._execute("SELECT item_id, file_name FROM resumes WHERE item_id IS NOT NULL")
+        )
+
+    def record_item_ids(self, item_ids):
+        """Backfill item ids ({filename: item_id}) for entries recorded before ids were stored"""
+        if not item_ids:
+            return
+        self._write(
+            "UPDATE resumes SET item_id = ? WHERE file_name = ? AND item_id IS NOT ?",
+            [(item_id, filename) + (item_id,) for filename, item_id in item_ids.items()],
+            many=True
+        )
+
+    def get_many(self, filenames):
+        """{file_name: entry} for the given file names, in one indexed query per 500 names"""
+        filenames = list(filenames)
+        entries = {}
+        for start in range(0, len(filenames), 500):
+            batch = filenames[start:start + 500]
+            entries.update(
+                (entry["file_name"], entry)
+                for entry in self._fetch_all(
+                    f"SELECT * FROM resumes WHERE file_name IN ({','.join('?' * len(batch))})", tuple(batch)
+                )
+            )
+        return entries
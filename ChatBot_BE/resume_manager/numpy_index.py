@@ -0,0 +1,316 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+import numpy as np
+from resume_manager.profile_extractor import matches_filter
+
+# Name of the vectors file for indexes created before the file name was recorded in index_meta
+VECTORS_FILE = "vectors.npy"
+RECORDS_FILE = "records.sqlite3"
+INITIAL_CAPACITY = 1024
+INT8_SCALE = 127.0
+
+class NumpyVectorIndex:
+    """
+    Exact in-process vector index stored as a memory-mapped .npy matrix.
+
+    Embeddings are L2-normalised and stored as float32 (or int8 when
+    `quantization="int8"`) in a .npy file, which every worker maps read-only so
+    the pages are shared through the OS page cache instead of being loaded per
+    process. Ids, documents and metadata live in a SQLite sidecar; a generation
+    counter there tells readers in other processes when to re-map. Top-k is a
+    single matmul over the mapped matrix.
+
+    Writers never touch a row that a committed record points at: upserts fill fresh
+    rows past `rows_used`, and growing or compacting writes a new vectors file whose
+    name is switched in index_meta by the same commit as the records. Until COMMIT
+    readers therefore see only the previous, consistent state, and a rolled-back
+    write leaves nothing behind but unreferenced rows or an orphaned file.
+
+    Implements the subset of the Chroma collection API that VectorDBManager uses
+    (count, get, peek, query, upsert, delete), so it can stand in for a collection.
+    Distances are cosine distances (1 - cosine similarity).
+    """
+
+    def __init__(self, path: str, quantization: str = "float32"):
+        if quantization not in ("float32", "int8"):
+            raise ValueError("quantization must be 'float32' or 'int8'")
+        self.path = path
+        self.quantization = quantization
+        self.dtype = np.int8 if quantization == "int8" else np.float32
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        # isolation_level=None: transactions are managed explicitly with BEGIN IMMEDIATE,
+        # which doubles as the cross-process writer lock.
+        self._conn = sqlite3.connect(os.path.join(path, RECORDS_FILE), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS records (
+                id TEXT PRIMARY KEY,
+                row INTEGER NOT NULL UNIQUE,
+                document TEXT,
+                metadata TEXT
+            );
+            CREATE TABLE IF NOT EXISTS index_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        stored = self._read_meta().get("quantization")
+        if stored and stored != quantization:
+            raise ValueError(f"Index at {path} was built with {stored} quantization, not {quantization}")
+        self._generation = None
+        self._vectors = None
+        self._ids = []
+        self._rows = np.empty(0, dtype=np.int64)
+        self._metadatas = []
+        self._row_of = {}
+        self._position_of_row = {}
+
+    # ---- reading -------------------------------------------------------------------
+
+    def _read_meta(self):
+        return dict(self._conn.execute("SELECT key, value FROM index_meta").fetchall())
+
+    def _vectors_path(self, meta):
+        return os.path.join(self.path, meta.get("vectors_file", VECTORS_FILE))
+
+    def _refresh(self):
+        """Re-map vectors and reload the id/metadata table if another writer changed them"""
+        if self._read_meta().get("generation") == self._generation:
+            return
+        for attempt in range(3):
+            # One read transaction, so records and the vectors file name come from the same commit
+            self._conn.execute("BEGIN")
+            try:
+                meta = self._read_meta()
+                records = self._conn.execute("SELECT id, row, metadata FROM records ORDER BY row").fetchall()
+            finally:
+                self._conn.execute("COMMIT")
+            vectors_path = self._vectors_path(meta)
+            try:
+                vectors = np.load(vectors_path, mmap_mode="r") if records else None
+                break
+            except FileNotFoundError:
+                # A writer replaced the file after our snapshot; read the newer state
+                if attempt == 2:
+                    raise
+        self._vectors = vectors
+        self._ids = [record[0] for record in records]
+        self._rows = np.array([record[1] for record in records], dtype=np.int64)
+        self._metadatas = [json.loads(record[2] or "{}") for record in records]
+        self._row_of = {record_id: i for i, record_id in enumerate(self._ids)}
+        self._position_of_row = {int(row): i for i, row in enumerate(self._rows)}
+        self._generation = meta.get("generation")
+
+    def _dequantize(self, matrix):
+        if self.quantization == "int8":
+            return matrix.astype(np.float32) / INT8_SCALE
+        return np.asarray(matrix, dtype=np.float32)
+
+    def _documents(self, ids):
+        if not ids:
+            return {}
+        documents = {}
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            documents.update(self._conn.execute(
+                f"SELECT id, document FROM records WHERE id IN ({placeholders})", tuple(batch)
+            ).fetchall())
+        return documents
+
+    def _positions(self, ids=None, where=None):
+        if ids is not None:
+            positions = [self._row_of[record_id] for record_id in ids if record_id in self._row_of]
+        else:
+            positions = range(len(self._ids))
+        if where:
+            positions = [i for i in positions if matches_filter(self._metadatas[i], where)]
+        return list(positions)
+
+    def _result(self, positions, include):
+        ids = [self._ids[i] for i in positions]
+        result = {"ids": ids}
+        result["metadatas"] = [self._metadatas[i] for i in positions] if "metadatas" in include else None
+        if "documents" in include:
+            documents = self._documents(ids)
+            result["documents"] = [documents.get(record_id) for record_id in ids]
+        else:
+            result["documents"] = None
+        if "embeddings" in include:
+            rows = self._rows[positions] if positions else np.empty(0, dtype=np.int64)
+            result["embeddings"] = self._dequantize(self._vectors[rows]) if len(rows) else np.empty((0, 0), dtype=np.float32)
+        else:
+            result["embeddings"] = None
+        return result
+
+    def count(self):
+        with self._lock:
+            self._refresh()
+            return len(self._ids)
+
+    def get(self, ids=None, where=None, limit=None, include=("metadatas", "documents")):
+        with self._lock:
+            self._refresh()
+            positions = self._positions(ids, where)
+            if limit is not None:
+                positions = positions[:limit]
+            return self._result(positions, include)
+
+    def peek(self, limit=10):
+        return self.get(limit=limit, include=("metadatas", "documents", "embeddings"))
+
+    def query(self, query_embeddings, n_results=10, where=None, include=("metadatas", "documents", "distances")):
+        with self._lock:
+            self._refresh()
+            results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+            if self._vectors is None or not self._ids:
+                for query_embedding in query_embeddings:
+                    for key in results:
+                        results[key].append([])
+                return results
+
+            # One matmul over the mapped matrix; rows that are deleted, unused or
+            # filtered out are masked to -inf rather than gathered into a copy.
+            queries = np.array(query_embeddings, dtype=np.float32)
+            queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+            scores = self._dequantize_scores(queries)
+            allowed = np.full(scores.shape[1], False)
+            allowed[self._rows[self._positions(where=where)]] = True
+            scores[:, ~allowed] = -np.inf
+
+            k = min(n_results, int(allowed.sum()))
+            for query_scores in scores:
+                if k == 0:
+                    top_rows = np.empty(0, dtype=np.int64)
+                else:
+                    top_rows = np.argpartition(-query_scores, k - 1)[:k]
+                    top_rows = top_rows[np.argsort(-query_scores[top_rows])]
+                positions = [self._position_of_row[int(row)] for row in top_rows]
+                hit = self._result(positions, include)
+                results["ids"].append(hit["ids"])
+                results["documents"].append(hit["documents"])
+                results["metadatas"].append(hit["metadatas"])
+                results["distances"].append([float(1 - query_scores[row]) for row in top_rows])
+            return results
+
+    def _dequantize_scores(self, queries):
+        used = int(self._rows.max()) + 1 if len(self._rows) else 0
+        matrix = self._vectors[:used]
+        if self.quantization == "int8":
+            return (matrix @ (queries.T * (1 / INT8_SCALE)).astype(np.float32)).T
+        return (matrix @ queries.T).T
+
+    # ---- writing -------------------------------------------------------------------
+
+    def _normalise(self, embeddings):
+        matrix = np.array(embeddings, dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        if self.quantization == "int8":
+            return np.clip(np.rint(matrix * INT8_SCALE), -INT8_SCALE, INT8_SCALE).astype(np.int8)
+        return matrix
+
+    def _bump_generation(self, meta, **values):
+        values["generation"] = str(int(meta.get("generation", "0")) + 1)
+        values["quantization"] = self.quantization
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)",
+            [(key, str(value)) for key, value in values.items()]
+        )
+
+    def _grow(self, vectors, dim, new_count):
+        """
+        Write a new, larger vectors file containing only live rows (compacting away
+        deleted and superseded ones) and point the records at their new rows. The file
+        only becomes current when the caller commits. Returns (memmap, rows_used, path).
+        """
+        live = self._conn.execute("SELECT id, row FROM records ORDER BY row").fetchall()
+        needed = len(live) + new_count
+        capacity = max(INITIAL_CAPACITY, 1 << (needed - 1).bit_length())
+        new_path = os.path.join(self.path, f"vectors-{uuid.uuid4().hex[:12]}.npy")
+        grown = np.lib.format.open_memmap(new_path, mode="w+", dtype=self.dtype, shape=(capacity, dim))
+        for new_row, (_, old_row) in enumerate(live):
+            grown[new_row] = vectors[old_row]
+        self._conn.executemany("UPDATE records SET row = -1 - row WHERE id = ?", [(record_id,) for record_id, _ in live])
+        self._conn.executemany(
+            "UPDATE records SET row = ? WHERE id = ?", [(new_row, record_id) for new_row, (record_id, _) in enumerate(live)]
+        )
+        return grown, len(live), new_path
+
+    def _remove_stale_files(self, current_path):
+        """Delete vectors files other than the current one; readers that still map them keep their mapping"""
+        for name in os.listdir(self.path):
+            path = os.path.join(self.path, name)
+            if name.endswith(".npy") and path != current_path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # still open elsewhere (Windows); removed after a later grow
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        if not ids:
+            return
+        matrix = self._normalise(embeddings)
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [{}] * len(ids)
+        # The last occurrence of a repeated id wins
+        positions = {record_id: position for position, record_id in enumerate(ids)}
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            new_path = None
+            try:
+                meta = self._read_meta()
+                dim = int(meta.get("dim", matrix.shape[1]))
+                if matrix.shape[1] != dim:
+                    raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match index dimension {dim}")
+                used = int(meta.get("rows_used", "0"))
+                vectors_path = self._vectors_path(meta)
+                if os.path.exists(vectors_path):
+                    vectors = np.lib.format.open_memmap(vectors_path, mode="r+")
+                else:
+                    vectors = np.zeros((0, dim), dtype=self.dtype)
+                if used + len(positions) > vectors.shape[0]:
+                    vectors, used, new_path = self._grow(vectors, dim, len(positions))
+
+                # Rows at or past rows_used are referenced by no committed record
+                for record_id, position in positions.items():
+                    vectors[used] = matrix[position]
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO records (id, row, document, metadata) VALUES (?, ?, ?, ?)",
+                        (record_id, used, documents[position], json.dumps(metadatas[position] or {}))
+                    )
+                    used += 1
+                vectors.flush()
+                del vectors
+                self._bump_generation(
+                    meta, dim=dim, rows_used=used, vectors_file=os.path.basename(new_path or vectors_path)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                if new_path and os.path.exists(new_path):
+                    os.remove(new_path)
+                raise
+            if new_path:
+                self._remove_stale_files(new_path)
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            if ids is None:
+                self._refresh()
+                ids = [self._ids[i] for i in self._positions(where=where)]
+            if not ids:
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("DELETE FROM records WHERE id = ?", [(record_id,) for record_id in ids])
+                self._bump_generation(self._read_meta())
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
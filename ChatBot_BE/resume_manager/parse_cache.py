@@ -0,0 +1,49 @@
+import os
+from resume_manager.parser import PARSER_VERSION
+
+PARSE_CACHE_DIR = "parsed_text"
+
+class ParsedTextCache:
+    """
+    Content-addressed store of extracted resume text.
+    Entries are keyed by the file hash recorded in ResumeMetadataManager plus the
+    parser version, so a changed file or a parser upgrade both produce a miss.
+    """
+
+    def __init__(self, cache_dir: str = PARSE_CACHE_DIR, parser_version: str = PARSER_VERSION):
+        self.cache_dir = cache_dir
+        self.parser_version = parser_version
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, file_hash):
+        return os.path.join(self.cache_dir, f"{file_hash}.{self.parser_version}.txt")
+
+    def get(self, file_hash):
+        """Return cached text for file_hash, or None on a miss"""
+        if not file_hash:
+            return None
+        try:
+            with open(self._path(file_hash), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, file_hash, text):
+        """Store text for file_hash, atomically replacing any previous entry"""
+        if not file_hash:
+            return
+        path = self._path(file_hash)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def garbage_collect(self, live_hashes):
+        """Delete entries for files that are gone or were parsed by another parser version"""
+        keep = {os.path.basename(self._path(file_hash)) for file_hash in live_hashes if file_hash}
+        removed = 0
+        for entry in os.listdir(self.cache_dir):
+            if entry not in keep:
+                os.remove(os.path.join(self.cache_dir, entry))
+                removed += 1
+        return removed
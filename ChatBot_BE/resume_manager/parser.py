@@ -1,7 +1,30 @@
 import os
+import time
+import multiprocessing
+from multiprocessing.connection import wait
 from pdfminer.high_level import extract_text as extract_pdf_text
 import docx
 
+DEFAULT_PARSE_TIMEOUT = 120
+# Bump when text extraction changes so cached parses are invalidated
+PARSER_VERSION = "1"
+
+def _parse_worker(conn, resume_dir):
+    """Worker process loop: receive filenames, send back (filename, text, error)"""
+    parser = ResumeParser(resume_dir=resume_dir)
+    while True:
+        try:
+            filename = conn.recv()
+        except EOFError:
+            break
+        if filename is None:
+            break
+        try:
+            conn.send((filename, parser.parse_resume(filename), None))
+        except Exception as e:
+            conn.send((filename, None, str(e)))
+    conn.close()
+
 class ResumeParser:
     def __init__(self, resume_dir="resumes"):
         self.resume_dir = resume_dir
@@ -50,3 +73,88 @@ class ResumeParser:
             text = self.parse_resume(filename)
             parsed_data[filename] = text
         return parsed_data
+
+    def parse_many(self, filenames, workers=None, timeout=DEFAULT_PARSE_TIMEOUT):
+        """
+        Parse filenames in parallel worker processes.
+        Yields (filename, text, error) tuples as each file completes; text is None
+        when parsing failed or took longer than `timeout` seconds. A worker that
+        exceeds the timeout is killed and replaced so the rest of the batch continues.
+        """
+        pending = list(filenames)
+        if not pending:
+            return
+        workers = max(1, min(workers or os.cpu_count() or 1, len(pending)))
+        pending.reverse()
+
+        # Never fork: the app process runs many threads (event loops, executors, chroma)
+        # whose held locks a forked child would inherit. Spawn is also what Windows uses.
+        ctx = multiprocessing.get_context("spawn")
+        idle = []
+        busy = {}  # conn -> (filename, deadline)
+        processes = {}
+
+        def start_worker():
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(target=_parse_worker, args=(child_conn, self.resume_dir), daemon=True)
+            process.start()
+            child_conn.close()
+            processes[parent_conn] = process
+            idle.append(parent_conn)
+
+        def stop_worker(conn):
+            process = processes.pop(conn)
+            process.kill()
+            process.join()
+            conn.close()
+
+        for _ in range(workers):
+            start_worker()
+
+        try:
+            while pending or busy:
+                while pending and idle:
+                    conn = idle.pop()
+                    filename = pending.pop()
+                    print(f"Parsing resume: {filename}")
+                    conn.send(filename)
+                    busy[conn] = (filename, time.monotonic() + timeout)
+
+                next_deadline = min(deadline for _, deadline in busy.values())
+                ready = wait(list(busy), timeout=max(0, next_deadline - time.monotonic()))
+
+                for conn in ready:
+                    filename, _ = busy.pop(conn)
+                    try:
+                        result = conn.recv()
+                    except EOFError:
+                        stop_worker(conn)
+                        start_worker()
+                        yield filename, None, "Parser worker exited unexpectedly"
+                        continue
+                    idle.append(conn)
+                    yield result
+
+                now = time.monotonic()
+                for conn, (filename, deadline) in list(busy.items()):
+                    if deadline <= now:
+                        del busy[conn]
+                        stop_worker(conn)
+                        if pending:
+                            start_worker()
+                        yield filename, None, f"Parsing timed out after {timeout} seconds"
+        finally:
+            for conn in list(busy):
+                stop_worker(conn)
+            for conn in idle:
+                try:
+                    conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+            for conn in list(processes):
+                process = processes.pop(conn)
+                process.join(timeout=1)
+                if process.is_alive():
+                    process.kill()
+                    process.join()
+                conn.close()
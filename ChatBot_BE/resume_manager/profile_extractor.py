@@ -0,0 +1,242 @@
+import os
+import re
+
+# Bump when extraction rules change so indexed metadata is refreshed
+PROFILE_VERSION = "2"
+
+MAX_PLAUSIBLE_YEARS = 50
+
+FILENAME_ROLE_TOKENS = {
+    "fsd": ["full_stack"],
+    "qa": ["qa"],
+    "mgr": ["manager"],
+    "manager": ["manager"],
+    "pm": ["project_manager", "manager"],
+    "etl": ["etl"],
+    "bi": ["bi"],
+    "ar": ["architect"],
+    "arch": ["architect"],
+    "architect": ["architect"],
+    "lead": ["lead"],
+    "gd": ["designer"],
+    "dotnet": ["dotnet"],
+    "sql": ["sql"],
+}
+
+TEXT_ROLE_PHRASES = {
+    "full_stack": ["full stack", "full-stack", "fullstack"],
+    "qa": ["quality assurance", "qa engineer", "qa lead", "qa manager", "test engineer", "software tester", "etl testing"],
+    "manager": ["manager"],
+    "project_manager": ["project manager", "program manager", "delivery manager"],
+    "etl": ["etl developer", "etl testing", "informatica", "datastage", "ssis"],
+    "bi": ["power bi", "business intelligence", "tableau", "bi developer"],
+    "architect": ["architect"],
+    "lead": ["team lead", "tech lead", "technical lead", "lead engineer"],
+    "designer": ["graphic designer", "ui designer", "ux designer", "photoshop"],
+    "dotnet": [".net", "asp.net", "c#"],
+    "sql": ["sql server", "t-sql", "pl/sql"],
+}
+
+ROLE_TAGS = sorted(TEXT_ROLE_PHRASES)
+
+SKILLS = [
+    "java", "python", "c#", ".net", "asp.net", "c++", "javascript", "typescript", "angular", "react",
+    "node.js", "php", "html", "css", "spring boot", "hibernate", "sql server", "oracle", "mysql",
+    "postgresql", "mongodb", "snowflake", "ssis", "ssrs", "ssas", "power bi", "tableau", "informatica",
+    "datastage", "talend", "hadoop", "spark", "selenium", "cucumber", "testng", "jmeter", "postman",
+    "manual testing", "automation testing", "azure", "aws", "docker", "kubernetes", "jenkins", "git",
+    "jira", "agile", "scrum", "devops", "photoshop", "figma", "machine learning", "etl"
+]
+
+def _phrase_pattern(phrase):
+    return re.compile(r"(?<![a-z0-9])" + re.escape(phrase) + r"(?![a-z0-9])")
+
+_SKILL_PATTERNS = [(skill, _phrase_pattern(skill)) for skill in SKILLS]
+_ROLE_PATTERNS = {
+    role: [_phrase_pattern(phrase) for phrase in phrases]
+    for role, phrases in TEXT_ROLE_PHRASES.items()
+}
+
+def extract_candidate_name(filename):
+    """
+    Strip extension, copy suffixes, experience tags and role suffixes from a resume filename.
+    "_JaiSudhakar[5y_1m].pdf" -> "JaiSudhakar", "AneshPeruvalappu_15Y_QA Mgr.pdf" -> "AneshPeruvalappu",
+    "Ananth _ QA Manager.pdf" -> "Ananth"
+    """
+    name = os.path.splitext(filename)[0]
+    name = name.split("{")[0]
+    name = re.sub(r"\(\d+\)", "", name)
+    name = re.split(r"\[", name)[0]
+    name = name.strip(" _-")
+    name = re.split(r"\s*-\s*|\s+_|_(?=\d)|_resume\b", name, maxsplit=1, flags=re.IGNORECASE)[0]
+    return name.strip(" _-") or os.path.splitext(filename)[0].strip()
+
+def extract_experience_years(filename, text=""):
+    """Years of experience from the filename tag ([5y_1m], _15Y_, 5.6Y) or, failing that, the resume text"""
+    match = re.search(r"\[(\d+)y_(\d+)m\]", filename, re.IGNORECASE)
+    if match:
+        return round(int(match.group(1)) + int(match.group(2)) / 12, 1)
+    match = re.search(r"(?<![A-Za-z0-9.])(\d+(?:\.\d+)?)\s*y(?:rs?|ears?)?(?![a-z])", filename, re.IGNORECASE)
+    if match and float(match.group(1)) <= MAX_PLAUSIBLE_YEARS:
+        return float(match.group(1))
+
+    head = text[:4000].lower()
+    candidates = [
+        float(value)
+        for value in re.findall(r"(\d+(?:\.\d+)?)\s*\+?\s*(?:years|yrs)", head)
+        if float(value) <= MAX_PLAUSIBLE_YEARS
+    ]
+    return max(candidates) if candidates else None
+
+def extract_role_tags(filename, text=""):
+    tags = set()
+    stem = os.path.splitext(filename)[0].lower().replace("dot net", "dotnet")
+    for token in re.split(r"[^a-z]+", stem):
+        tags.update(FILENAME_ROLE_TOKENS.get(token, []))
+    head = text[:1500].lower()
+    for role, patterns in _ROLE_PATTERNS.items():
+        if any(pattern.search(head) for pattern in patterns):
+            tags.add(role)
+    return sorted(tags)
+
+def extract_top_skills(text, limit=10):
+    lowered = text.lower()
+    counts = []
+    for skill, pattern in _SKILL_PATTERNS:
+        count = len(pattern.findall(lowered))
+        if count:
+            counts.append((count, skill))
+    counts.sort(key=lambda item: (-item[0], item[1]))
+    return [skill for _, skill in counts[:limit]]
+
+def extract_profile(filename, text):
+    """
+    Typed, Chroma-compatible metadata for a resume: scalar values only, one boolean
+    per role tag so that roles can be used directly in `where` filters.
+    """
+    role_tags = extract_role_tags(filename, text)
+    profile = {
+        "candidate_name": extract_candidate_name(filename),
+        "role_tags": ",".join(role_tags),
+        "top_skills": ",".join(extract_top_skills(text)),
+        "profile_version": PROFILE_VERSION,
+    }
+    experience_years = extract_experience_years(filename, text)
+    if experience_years is not None:
+        profile["experience_years"] = experience_years
+    for role in ROLE_TAGS:
+        profile[f"role_{role}"] = role in role_tags
+    return profile
+
+def build_resume_filter(min_experience_years=None, max_experience_years=None, roles=None):
+    """Build a Chroma `where` clause, or None when no filter applies"""
+    clauses = []
+    if min_experience_years is not None:
+        clauses.append({"experience_years": {"$gte": float(min_experience_years)}})
+    if max_experience_years is not None:
+        clauses.append({"experience_years": {"$lte": float(max_experience_years)}})
+    for role in roles or []:
+        role = role.strip().lower().replace(" ", "_")
+        if role not in ROLE_TAGS:
+            raise ValueError(f"Unknown role filter: {role}. Supported roles: {', '.join(ROLE_TAGS)}")
+        clauses.append({f"role_{role}": True})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+# Phrases that name people in a role. Bare words that also work as verbs or times
+# ("lead a project", "5 pm") are left out so they never turn into a filter.
+QUERY_ROLE_PHRASES = {
+    "qa": ["qa engineer", "qa engineers", "qa analyst", "qa analysts", "qa lead", "qa leads", "qa manager",
+           "qa managers", "tester", "testers", "quality assurance engineer", "quality assurance engineers"],
+    "manager": ["manager", "managers"],
+    "project_manager": ["project manager", "project managers", "pms"],
+    "architect": ["architect", "architects"],
+    "full_stack": ["full stack developer", "full stack developers", "full-stack developer", "full-stack developers",
+                   "full stack engineer", "full stack engineers", "fsd", "fsds"],
+    "lead": ["team lead", "team leads", "tech lead", "tech leads", "technical lead", "technical leads", "leads"],
+    "designer": ["designer", "designers"],
+}
+_QUERY_ROLE_PATTERNS = {
+    role: [_phrase_pattern(phrase) for phrase in phrases]
+    for role, phrases in QUERY_ROLE_PHRASES.items()
+}
+# "role: qa, lead" names role tags directly
+_EXPLICIT_ROLES = re.compile(r"\broles?\s*:\s*([a-z_ ,]+)")
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_YEARS_RANGE = re.compile(_NUMBER + r"\s*(?:-|to)\s*" + _NUMBER + r"\s*(?:years?|yrs?)\b")
+# "10+ years", "10 or more years", "10 years or more", "10 years of experience plus"
+_YEARS = re.compile(
+    _NUMBER + r"\s*(\+|or more|plus)?\s*(?:years?|yrs?)\b(?:\s+of\s+experience)?\s*(\+|or more|plus|or above|and above)?"
+)
+
+def infer_resume_filter_args(query):
+    """
+    Pull explicit constraints out of a free-text query, e.g.
+    "QA managers with 10+ years" -> {"min_experience_years": 10, "roles": ["qa", "manager"]},
+    "developers with 3-5 years" -> {"min_experience_years": 3, "max_experience_years": 5}
+    Roles are only inferred from role nouns ("testers", "tech lead") or a "role:" prefix.
+    """
+    lowered = query.lower()
+    args = {}
+    match = _YEARS_RANGE.search(lowered)
+    if match:
+        args["min_experience_years"] = float(match.group(1))
+        args["max_experience_years"] = float(match.group(2))
+    else:
+        match = _YEARS.search(lowered)
+    if match and not args:
+        years = re.escape(match.group(1))
+        if match.group(2) or match.group(3) or re.search(r"(at least|minimum|over|more than)\s*" + years, lowered):
+            args["min_experience_years"] = float(match.group(1))
+        elif re.search(r"(at most|up to|upto|under|less than|maximum|max)\s*" + years, lowered):
+            args["max_experience_years"] = float(match.group(1))
+    roles = [
+        role for role, patterns in _QUERY_ROLE_PATTERNS.items()
+        if any(pattern.search(lowered) for pattern in patterns)
+    ]
+    explicit = _EXPLICIT_ROLES.search(lowered)
+    if explicit:
+        for name in explicit.group(1).split(","):
+            name = name.strip().replace(" ", "_")
+            if name in ROLE_TAGS and name not in roles:
+                roles.append(name)
+    # "qa manager" also matches "manager"; keep the more specific tag only when both come from one phrase
+    if "project_manager" in roles and "manager" in roles and not re.search(r"(?<!project )managers?\b", lowered):
+        roles.remove("manager")
+    if roles:
+        args["roles"] = roles
+    return args
+
+FILTER_OPERATORS = {
+    "$eq": lambda value, expected: value == expected,
+    "$ne": lambda value, expected: value != expected,
+    "$gt": lambda value, expected: value > expected,
+    "$gte": lambda value, expected: value >= expected,
+    "$lt": lambda value, expected: value < expected,
+    "$lte": lambda value, expected: value <= expected,
+    "$in": lambda value, expected: value in expected,
+    "$nin": lambda value, expected: value not in expected,
+}
+
+def matches_filter(metadata, where):
+    """Evaluate a Chroma-style `where` clause ($and/$or plus comparison operators) against metadata"""
+    if not where:
+        return True
+    if "$and" in where:
+        return all(matches_filter(metadata, clause) for clause in where["$and"])
+    if "$or" in where:
+        return any(matches_filter(metadata, clause) for clause in where["$or"])
+    for key, condition in where.items():
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, expected in condition.items():
+            if value is None and op not in ("$ne", "$nin"):
+                return False
+            try:
+                if not FILTER_OPERATORS[op](value, expected):
+                    return False
+            except TypeError:
+                return False
+    return True
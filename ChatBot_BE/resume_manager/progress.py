@@ -0,0 +1,84 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+STATE_PENDING = "pending"
+STATE_RUNNING = "running"
+STATE_COMPLETED = "completed"
+STATE_FAILED = "failed"
+
+COUNTERS = ("listed", "downloaded", "parsed", "embedded")
+
+class IngestionCancelled(Exception):
+    """Raised inside the pipeline when a stop was requested, e.g. on app shutdown"""
+
+class IngestionProgress:
+    """Thread-safe progress tracker for the SharePoint -> parse -> embed pipeline"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempt = 0
+        self.reset()
+
+    def reset(self):
+        """Reset all counters and go back to the pending state"""
+        with self._lock:
+            self.state = STATE_PENDING
+            self.stage = None
+            self.error = None
+            self.started_at = None
+            self.finished_at = None
+            self.next_retry_at = None
+            self.counts = {name: 0 for name in COUNTERS}
+
+    def start(self, attempt=1):
+        self.reset()
+        with self._lock:
+            self.attempt = attempt
+            self.state = STATE_RUNNING
+            self.started_at = datetime.now(timezone.utc).isoformat()
+
+    def set_stage(self, stage):
+        with self._lock:
+            self.stage = stage
+
+    def set_count(self, name, value):
+        with self._lock:
+            self.counts[name] = value
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counts[name] += amount
+
+    def complete(self):
+        with self._lock:
+            self.state = STATE_COMPLETED
+            self.stage = None
+            self.finished_at = datetime.now(timezone.utc).isoformat()
+
+    def fail(self, error):
+        with self._lock:
+            self.state = STATE_FAILED
+            self.error = str(error)
+            self.finished_at = datetime.now(timezone.utc).isoformat()
+
+    def schedule_retry(self, delay_seconds):
+        with self._lock:
+            self.next_retry_at = (datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)).isoformat()
+
+    @property
+    def is_ready(self):
+        return self.state == STATE_COMPLETED
+
+    def snapshot(self):
+        """Return a JSON-serialisable copy of the current progress"""
+        with self._lock:
+            return {
+                "state": self.state,
+                "stage": self.stage,
+                "error": self.error,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "attempt": self.attempt,
+                "next_retry_at": self.next_retry_at,
+                **self.counts
+            }
@@ -0,0 +1,171 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from intent_classifier.model import IntentModel, INTENT_MODEL_FILE, TRAFFIC_LOG_FILE
+from resume_manager.profile_extractor import QUERY_ROLE_PHRASES, extract_profile
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# The fine-tuning files are not labelled by intent; their source decides the label
+SOURCE_LABELS = (
+    ("resume_finetune", "resume_query"),
+    ("tablesKR", "database_query"),
+    ("rbac", "conversational"),
+)
+
+# Hand-labelled examples of phrasings the fine-tuning data does not cover
+SEED_EXAMPLES = {
+    "conversational": [
+        "hi", "hello there", "good morning", "hey, how are you?", "thanks!", "thank you so much",
+        "who are you?", "what can you do?", "tell me a joke", "bye", "what's your name?",
+        "how does this chatbot work?", "can you help me?", "ok great", "nice, that helps",
+    ],
+    "database_query": [
+        "how many request forms were created this month?", "show me all open positions",
+        "list the interviewers for the sourcing form", "show pending interview feedback",
+        "how many candidates were sourced last week?", "list all job descriptions in table format",
+        "what is the status of request form 1024?", "show the recruiters assigned to project Titan",
+        "count the open requisitions by work location", "show skills table", "list all projects",
+        "which requests have high position priority?", "give me the sourcing form report",
+    ],
+    "resume_query": [
+        "find candidates with 5 years of java experience", "who knows python and azure?",
+        "show me resumes of QA managers", "find an ETL developer with informatica",
+        "which candidates have power bi skills?", "search resumes for react developers",
+        "candidates with more than 8 years of experience", "who has worked on .net core?",
+        "find me a project manager resume", "tell me about Arindam's experience",
+        "does anyone have AWS certification?", "list full stack developers", "best candidate for a BI architect role",
+    ],
+}
+
+# Every resume file shares the same two instruction lines, so after dedupe they add almost
+# nothing; search-style queries are synthesised from each resume's profile instead.
+RESUME_QUERY_TEMPLATES = {
+    "name": ["tell me about {name}", "show me {name}'s resume", "what is {name}'s experience?"],
+    "skill": ["find candidates with {skill} experience", "who knows {skill}?", "{skill} developers",
+              "search resumes for {skill}"],
+    "skills": ["who knows {skill} and {other}?", "candidates skilled in {skill} and {other}"],
+    "role": ["find {role}", "show me {role} resumes", "list {role} with {years} years of experience",
+             "{role} with more than {years} years"],
+}
+RESUME_FILE_SUFFIX = "_resume_finetune.jsonl"
+
+def source_label(path):
+    name = os.path.basename(path)
+    for marker, label in SOURCE_LABELS:
+        if marker in name:
+            return label
+    return None
+
+def read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning("Skipping invalid JSON in line %d of %s: %s", i, path, e)
+
+def user_prompt(record):
+    if "messages" in record:
+        prompts = [message["content"] for message in record["messages"] if message.get("role") == "user"]
+        prompt = prompts[0] if prompts else ""
+    else:
+        prompt = record.get("prompt", "")
+    # Resume prompts carry the whole resume after the instruction line
+    return prompt.split("\n", 1)[0].strip()
+
+def resume_queries(path, records, rng):
+    """A few search queries a recruiter might ask that this resume answers, built from its extracted profile"""
+    resume_text = next((record.get("prompt", "").split("\n", 1)[-1] for record in records if "prompt" in record), "")
+    filename = os.path.basename(path)[:-len(RESUME_FILE_SUFFIX)] + ".pdf"
+    profile = extract_profile(filename, resume_text)
+    skills = [skill for skill in profile["top_skills"].split(",") if skill]
+    roles = [role for role in profile["role_tags"].split(",") if role in QUERY_ROLE_PHRASES]
+    years = int(profile.get("experience_years") or 0)
+    queries = []
+    if roles or skills:
+        queries.append(rng.choice(RESUME_QUERY_TEMPLATES["name"]).format(name=profile["candidate_name"]))
+    if skills:
+        queries.append(rng.choice(RESUME_QUERY_TEMPLATES["skill"]).format(skill=skills[0]))
+    if len(skills) > 1:
+        other = rng.choice(skills[1:4])
+        queries.append(rng.choice(RESUME_QUERY_TEMPLATES["skills"]).format(skill=skills[0], other=other))
+    if roles:
+        # The plural phrasings are the ones infer_resume_filter_args recognises in queries
+        role = rng.choice([phrase for phrase in QUERY_ROLE_PHRASES[rng.choice(roles)] if phrase.endswith("s")])
+        templates = RESUME_QUERY_TEMPLATES["role"] if years else RESUME_QUERY_TEMPLATES["role"][:2]
+        queries.append(rng.choice(templates).format(role=role, years=years))
+    return queries
+
+def load_examples(data_dir, traffic_log, seed=42):
+    """{normalised text: (text, label)}; later sources override earlier ones"""
+    examples = {}
+    rng = random.Random(seed)
+
+    def add(text, label):
+        if text:
+            examples[text.lower()] = (text, label)
+
+    for label, texts in SEED_EXAMPLES.items():
+        for text in texts:
+            add(text, label)
+    for path in sorted(glob.glob(os.path.join(data_dir, "jsonl", "*.jsonl")) +
+                       glob.glob(os.path.join(data_dir, "messages", "*.jsonl"))):
+        label = source_label(path)
+        if label is None:
+            logger.info("No intent label for %s; skipping", path)
+            continue
+        records = list(read_jsonl(path))
+        for record in records:
+            add(user_prompt(record), label)
+        if path.endswith(RESUME_FILE_SUFFIX):
+            for query in resume_queries(path, records, rng):
+                add(query, label)
+    # The rotated log holds older traffic, so it is read first
+    for path in (traffic_log + ".1", traffic_log) if traffic_log else ():
+        if os.path.exists(path):
+            for record in read_jsonl(path):
+                add(record.get("message", "").strip(), record.get("label"))
+    return [example for example in examples.values() if example[1] in ("conversational", "database_query", "resume_query")]
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local intent classifier used by /api/classify-message")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--traffic-log", default=os.getenv("INTENT_TRAFFIC_LOG") or TRAFFIC_LOG_FILE)
+    parser.add_argument("--output", default=INTENT_MODEL_FILE)
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.85")))
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    examples = load_examples(args.data_dir, args.traffic_log, args.seed)
+    counts = {}
+    for _, label in examples:
+        counts[label] = counts.get(label, 0) + 1
+    logger.info("Loaded %d labelled messages: %s", len(examples), counts)
+    # Whatever imbalance remains is offset by the class weights IntentModel.fit applies
+
+    random.Random(args.seed).shuffle(examples)
+    split = int(len(examples) * (1 - args.holdout))
+    train, test = examples[:split], examples[split:]
+    model = IntentModel.fit([text for text, _ in train], [label for _, label in train])
+    metrics = model.evaluate([text for text, _ in test], [label for _, label in test], args.threshold)
+    logger.info("Held-out evaluation: %s", metrics)
+
+    # Ship a model trained on everything, carrying the held-out numbers
+    model = IntentModel.fit([text for text, _ in examples], [label for _, label in examples])
+    model.metrics = metrics
+    model.save(args.output)
+    logger.info("Saved intent model with %d terms to %s", len(model.vocabulary), args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import logging
+import struct
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+# msodbcsql pre-connect attribute that carries an Azure AD access token
+SQL_COPT_SS_ACCESS_TOKEN = 1256
+
+def encode_access_token(token: str) -> bytes:
+    """Pack an access token the way the ODBC driver expects: UTF-16-LE bytes with a 4-byte length prefix"""
+    token_bytes = token.encode("utf-16-le")
+    return struct.pack(f"<I{len(token_bytes)}s", len(token_bytes), token_bytes)
+
+class CachedAccessToken:
+    """
+    Caches an MSAL token until `refresh_margin` seconds before it expires.
+    `acquire` returns an MSAL result dict with access_token and expires_in.
+    """
+
+    def __init__(self, acquire, refresh_margin: float = 300):
+        self.acquire = acquire
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+
+    def get(self) -> str:
+        with self._lock:
+            if self._token is None or time.monotonic() >= self._expires_at - self.refresh_margin:
+                result = self.acquire()
+                if "access_token" not in result:
+                    raise Exception(f"Failed to acquire token: {result.get('error')} - {result.get('error_description')}")
+                self._token = result["access_token"]
+                self._expires_at = time.monotonic() + float(result.get("expires_in", 3600))
+                logger.info("SQL access token acquired.")
+            return self._token
+
+    def invalidate(self):
+        with self._lock:
+            self._token = None
+
+class PooledConnection:
+    """
+    Proxy for a pooled pyodbc connection. `close()` hands the connection back to the
+    pool instead of closing it, so callers keep the usual connect/close pattern.
+    A proxy that is garbage-collected without being closed gives up its pool slot.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._returned = False
+        self._finalizer = weakref.finalize(self, pool.abandon, raw)
+        self._finalizer.atexit = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        if not self._returned:
+            self._returned = True
+            self._finalizer.detach()
+            self._pool.release(self._raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class _IdleConnection:
+    def __init__(self, raw):
+        self.raw = raw
+        self.idle_since = time.monotonic()
+        self.checked_at = self.idle_since
+
+class SqlConnectionPool:
+    """
+    Bounded pool of database connections created by `connect()`.
+
+    Idle connections are reused most-recently-used first so the rest age out:
+    connections idle longer than `max_idle_seconds` are closed, and a connection
+    idle longer than `health_check_interval` is probed with SELECT 1 before it is
+    handed out. At most `max_size` connections exist; callers beyond that wait up
+    to `acquire_timeout` seconds.
+    """
+
+    def __init__(self, connect, max_size: int = 10, max_idle_seconds: float = 300,
+                 health_check_interval: float = 30, acquire_timeout: float = 30):
+        self.connect = connect
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self._idle = []
+        self._open = 0
+        self._condition = threading.Condition()
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def _discard(self, raw):
+        self.discarded += 1
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, raw) -> bool:
+        try:
+            cursor = raw.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy pooled SQL connection: {str(e)}")
+            return False
+
+    def _evict_expired(self, now):
+        """Close idle connections past max_idle_seconds; caller holds the condition"""
+        expired = [entry for entry in self._idle if now - entry.idle_since > self.max_idle_seconds]
+        if expired:
+            self._idle = [entry for entry in self._idle if entry not in expired]
+            self._open -= len(expired)
+            for entry in expired:
+                self._discard(entry.raw)
+            self._condition.notify(len(expired))
+
+    def acquire(self) -> PooledConnection:
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            with self._condition:
+                now = time.monotonic()
+                self._evict_expired(now)
+                entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    if self._open < self.max_size:
+                        self._open += 1
+                        break
+                    if not self._condition.wait(timeout=max(0.0, deadline - now)) and time.monotonic() >= deadline:
+                        raise TimeoutError(f"No SQL connection available within {self.acquire_timeout}s")
+                    continue
+            # Probe outside the lock so a slow health check does not block other callers
+            if now - entry.checked_at <= self.health_check_interval or self._is_healthy(entry.raw):
+                self.reused += 1
+                return PooledConnection(self, entry.raw)
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            self._discard(entry.raw)
+
+        try:
+            raw = self.connect()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+        self.created += 1
+        return PooledConnection(self, raw)
+
+    def release(self, raw):
+        """Return a connection; it is rolled back first and dropped if that fails"""
+        try:
+            raw.rollback()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            self._discard(raw)
+            return
+        with self._condition:
+            self._idle.append(_IdleConnection(raw))
+            self._condition.notify()
+
+    def abandon(self, raw):
+        """Free the slot of a connection whose proxy was dropped without close(); its state is unknown, so close it"""
+        logger.warning("Pooled SQL connection was never closed; discarding it")
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+        self._discard(raw)
+
+    def close_all(self):
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for entry in idle:
+            self._discard(entry.raw)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "open": self._open,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                "created": self.created,
+                "reused": self.reused,
+                "discarded": self.discarded,
+            }
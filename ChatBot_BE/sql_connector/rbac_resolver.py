@@ -0,0 +1,72 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+def accessible_objects_for_role(role_name, all_objects, role_definitions):
+    """Objects a role can see: all for Admin, otherwise those matching one of its table patterns"""
+    if role_name == "Admin":
+        return list(all_objects)
+    patterns = role_definitions.get(role_name, []) or [role_name]
+    return [obj for obj in all_objects if any(pattern.lower() in obj.lower() for pattern in patterns)]
+
+class RBACResolver:
+    """
+    Resolves the database objects a set of roles may access.
+
+    Role definitions and the object list are loaded together and kept for
+    `ttl_seconds`; the accessible-object list is memoised per role combination
+    until the next reload, so repeated logins do no database work beyond the
+    user's own role lookup.
+    """
+
+    def __init__(self, load_role_definitions, load_objects, ttl_seconds: float = 300):
+        self.load_role_definitions = load_role_definitions
+        self.load_objects = load_objects
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._role_definitions = None
+        self._objects = None
+        self._loaded_at = 0.0
+        self._accessible = {}
+
+    def _ensure_loaded(self):
+        """Reload definitions and objects once they are older than the TTL; caller holds the lock"""
+        if self._objects is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+            return
+        self._role_definitions = self.load_role_definitions()
+        self._objects = self.load_objects()
+        self._loaded_at = time.monotonic()
+        self._accessible = {}
+        logger.info(f"RBAC cache loaded {len(self._role_definitions)} role definitions and {len(self._objects)} objects.")
+
+    def role_definitions(self):
+        with self._lock:
+            self._ensure_loaded()
+            return self._role_definitions
+
+    def accessible_objects(self, role_names):
+        """Sorted objects accessible to any of role_names"""
+        key = frozenset(role_names)
+        with self._lock:
+            self._ensure_loaded()
+            if key not in self._accessible:
+                accessible = set()
+                for role_name in key:
+                    accessible.update(accessible_objects_for_role(role_name, self._objects, self._role_definitions))
+                self._accessible[key] = sorted(accessible)
+            return list(self._accessible[key])
+
+    def invalidate(self):
+        with self._lock:
+            self._objects = None
+            self._accessible = {}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": self._objects is not None,
+                "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._objects is not None else None,
+                "memoized_role_sets": len(self._accessible),
+            }
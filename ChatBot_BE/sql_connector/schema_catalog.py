@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+OBJECTS_QUERY = """
+SELECT o.name, o.modify_date
+FROM sys.objects o
+WHERE o.schema_id = SCHEMA_ID('dbo') AND o.type IN ('U', 'V')
+"""
+
+COLUMNS_QUERY = """
+SELECT c.TABLE_NAME, c.COLUMN_NAME, c.DATA_TYPE, c.CHARACTER_MAXIMUM_LENGTH, c.IS_NULLABLE, c.COLUMN_DEFAULT
+FROM INFORMATION_SCHEMA.COLUMNS c
+WHERE c.TABLE_SCHEMA = 'dbo'{name_filter}
+ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+"""
+
+def format_column(column_name, data_type, max_length, is_nullable, default_value):
+    data_type_str = f"{data_type}({max_length})" if max_length and max_length != -1 and data_type in ('char', 'varchar', 'nchar', 'nvarchar') else data_type
+    nullable = "NULL" if is_nullable == "YES" else "NOT NULL"
+    default = f" DEFAULT {default_value}" if default_value else ""
+    return f"    [{column_name}] [{data_type_str}] {nullable}{default}"
+
+class SchemaCatalog:
+    """
+    In-memory CREATE TABLE definitions for every dbo table and view.
+
+    `load()` reads all columns in one query. Afterwards, at most every
+    `refresh_interval` seconds a lookup compares `sys.objects.modify_date` against
+    the loaded snapshot and re-reads columns only for objects that were created or
+    altered; dropped objects are removed. Names are matched case-insensitively,
+    as SQL Server does by default.
+    """
+
+    def __init__(self, connect, refresh_interval: float = 60, miss_refresh_interval: float = 5):
+        self.connect = connect
+        self.refresh_interval = refresh_interval
+        self.miss_refresh_interval = miss_refresh_interval
+        self._columns = {}
+        self._modify_dates = {}
+        self._loaded = False
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def _query(self, sql, params=()):
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            conn.close()
+
+    def _load_columns(self, names=None):
+        if names is None:
+            rows = self._query(COLUMNS_QUERY.format(name_filter=""))
+        else:
+            placeholders = ",".join("?" * len(names))
+            rows = self._query(COLUMNS_QUERY.format(name_filter=f" AND c.TABLE_NAME IN ({placeholders})"), tuple(names))
+        columns = {}
+        for table_name, *column in rows:
+            columns.setdefault(table_name.lower(), []).append(format_column(*column))
+        return columns
+
+    def load(self):
+        """Bulk-load every dbo table and view"""
+        with self._lock:
+            modify_dates = {name.lower(): modify_date for name, modify_date in self._query(OBJECTS_QUERY)}
+            self._columns = self._load_columns()
+            self._modify_dates = modify_dates
+            self._loaded = True
+            self._checked_at = time.monotonic()
+        logger.info(f"Schema catalog loaded {len(self._columns)} tables and views.")
+
+    def refresh(self):
+        """Reload only objects whose modify_date changed since the last load or refresh"""
+        with self._lock:
+            current = {name: modify_date for name, modify_date in self._query(OBJECTS_QUERY)}
+            changed = [name for name, modify_date in current.items() if self._modify_dates.get(name.lower()) != modify_date]
+            dropped = set(self._modify_dates) - {name.lower() for name in current}
+            columns = dict(self._columns)
+            for name in dropped:
+                columns.pop(name, None)
+            if changed:
+                for name in changed:
+                    columns.pop(name.lower(), None)
+                for start in range(0, len(changed), 500):
+                    columns.update(self._load_columns(changed[start:start + 500]))
+            self._columns = columns
+            self._modify_dates = {name.lower(): modify_date for name, modify_date in current.items()}
+            self._checked_at = time.monotonic()
+        if changed or dropped:
+            logger.info(f"Schema catalog refreshed {len(changed)} changed and removed {len(dropped)} dropped objects.")
+
+    def _ensure_fresh(self, max_age):
+        if not self._loaded:
+            self.load()
+        elif time.monotonic() - self._checked_at > max_age and self._refresh_lock.acquire(blocking=False):
+            # One caller refreshes; concurrent lookups keep using the current snapshot
+            try:
+                if time.monotonic() - self._checked_at > max_age:
+                    self.refresh()
+            except Exception as e:
+                logger.warning(f"Schema catalog refresh failed: {str(e)}")
+            finally:
+                self._refresh_lock.release()
+
+    def get_schema(self, table_name):
+        """CREATE TABLE text for a dbo table or view, or None if it does not exist"""
+        self._ensure_fresh(self.refresh_interval)
+        columns = self._columns.get(table_name.lower())
+        if columns is None:
+            # Possibly created since the last refresh
+            self._ensure_fresh(self.miss_refresh_interval)
+            columns = self._columns.get(table_name.lower())
+            if columns is None:
+                return None
+        return f"CREATE TABLE [dbo].[{table_name}](\n" + ",\n".join(columns) + "\n)"
+
+    def stats(self):
+        return {
+            "objects": len(self._columns),
+            "loaded": self._loaded,
+            "last_checked_seconds_ago": round(time.monotonic() - self._checked_at, 1) if self._loaded else None,
+        }
@@ -0,0 +1,80 @@
+import pytest
+
+from resume_manager.bm25_index import BM25Index, tokenize
+
+@pytest.fixture
+def index(tmp_path):
+    return BM25Index(str(tmp_path / "bm25.sqlite3"))
+
+def test_tokenize_keeps_skill_spellings():
+    assert tokenize("C#, C++ and ASP.NET developers with .NET") == ["c#", "c++", "asp.net", ".net"]
+
+def test_tokenize_drops_stopwords():
+    assert tokenize("Find candidates who know Python") == ["python"]
+
+def test_search_ranks_matching_documents(index):
+    index.upsert_documents([
+        ("a", "Java Spring Boot developer. Java microservices.", "h1", {"name": "A"}),
+        ("b", "Python developer with some Java", "h2", {"name": "B"}),
+        ("c", "Graphic designer, Photoshop", "h3", {"name": "C"}),
+    ])
+
+    results = index.search("java developer")
+
+    assert [doc_id for doc_id, _, _ in results] == ["a", "b"]
+    assert results[0][2] == {"name": "A"}
+    assert results[0][1] > results[1][1] > 0
+
+def test_search_limits_results(index):
+    index.upsert_documents([(str(i), "sql server", f"h{i}", None) for i in range(5)])
+    assert len(index.search("sql", top_k=3)) == 3
+
+def test_search_without_terms_returns_nothing(index):
+    index.upsert_documents([("a", "java", "h1", None)])
+    assert index.search("show me all candidates") == []
+    assert index.search("cobol") == []
+
+def test_unchanged_documents_are_skipped(index):
+    assert index.upsert_documents([("a", "java", "h1", None)]) == 1
+    assert index.upsert_documents([("a", "java", "h1", None)]) == 0
+    assert index.upsert_documents([("a", "python", "h2", None)]) == 1
+    assert index.search("java") == []
+    assert [doc_id for doc_id, _, _ in index.search("python")] == ["a"]
+
+def test_remove_missing(index):
+    index.upsert_documents([("a", "java", "h1", None), ("b", "java", "h2", None)])
+
+    assert index.remove_missing(["a"]) == 1
+
+    assert index.document_hashes() == {"a": "h1"}
+    assert [doc_id for doc_id, _, _ in index.search("java")] == ["a"]
+
+def test_has_terms(index):
+    index.upsert_documents([("a", "java spring", "h1", None), ("b", "python", "h2", None)])
+    assert index.has_terms(["java", "python"])
+    assert not index.has_terms(["java", "cobol"])
+    assert not index.has_terms([])
+
+def test_index_persists(tmp_path):
+    path = str(tmp_path / "bm25.sqlite3")
+    BM25Index(path).upsert_documents([("a", "kubernetes", "h1", None)])
+    assert [doc_id for doc_id, _, _ in BM25Index(path).search("kubernetes")] == ["a"]
+
+def test_filtered_search_fills_top_k_from_lower_ranked_matches(index, monkeypatch):
+    monkeypatch.setattr("resume_manager.bm25_index.METADATA_BATCH_SIZE", 2)
+    index.upsert_documents(
+        [(f"strong{i}", "java java java", f"s{i}", {"role_qa": False}) for i in range(5)] +
+        [(f"weak{i}", "java and lots of other words here", f"w{i}", {"role_qa": True}) for i in range(3)]
+    )
+
+    results = index.search("java", top_k=3, where={"role_qa": True})
+
+    assert sorted(doc_id for doc_id, _, _ in results) == ["weak0", "weak1", "weak2"]
+    assert all(metadata["role_qa"] for _, _, metadata in results)
+
+def test_candidate_name_terms(index):
+    index.upsert_documents([
+        ("a", "ravi kumar java", "h1", {"candidate_name": "Ravi Kumar"}),
+        ("b", "java", "h2", {}),
+    ])
+    assert index.candidate_name_terms(["ravi", "kumar", "java"]) == {"ravi", "kumar"}
@@ -0,0 +1,77 @@
+import pytest
+
+from resume_manager.chunker import ResumeChunker, estimate_tokens
+
+def words(count, prefix="word"):
+    return " ".join(f"{prefix}{i}" for i in range(count))
+
+def test_overlap_must_be_smaller_than_max_tokens():
+    with pytest.raises(ValueError):
+        ResumeChunker(max_tokens=64, overlap_tokens=64)
+
+def test_short_text_is_one_chunk():
+    assert ResumeChunker().chunk("John Doe\nPython developer\n\n\nSkills: Python") == [
+        "John Doe\nPython developer\nSkills: Python"
+    ]
+
+def test_empty_text_has_no_chunks():
+    assert ResumeChunker().chunk("\n \n") == []
+
+@pytest.mark.parametrize("line, expected", [
+    ("EXPERIENCE", True),
+    ("Technical Skills:", True),
+    ("Work History", True),
+    ("PROFESSIONAL SUMMARY", True),
+    ("Worked on the experience platform for five years", False),
+    ("C#", False),
+    ("", False),
+])
+def test_is_heading(line, expected):
+    assert ResumeChunker().is_heading(line) is expected
+
+def test_chunks_respect_max_tokens_and_overlap():
+    chunker = ResumeChunker(max_tokens=64, overlap_tokens=16)
+    lines = [f"line {i} " + "x" * 40 for i in range(40)]
+
+    chunks = chunker.chunk("\n".join(lines))
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert sum(estimate_tokens(line) + 1 for line in chunk.split("\n")) <= 64
+    # Every line is covered, in order
+    covered = []
+    for chunk in chunks:
+        covered.extend(line for line in chunk.split("\n") if not covered or line not in covered)
+    assert covered == lines
+    # Consecutive chunks share the previous chunk's tail
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split("\n")[0] in previous.split("\n")
+
+def test_heading_starts_new_chunk_without_overlap():
+    chunker = ResumeChunker(max_tokens=128, overlap_tokens=32)
+    summary = [f"summary line {i} " + "y" * 20 for i in range(8)]
+    skills = ["SKILLS", "Python, Java, SQL"]
+
+    chunks = chunker.chunk("\n".join(summary + skills))
+
+    assert chunks[-1] == "\n".join(skills)
+
+def test_long_line_is_split_at_sentence_boundaries():
+    chunker = ResumeChunker(max_tokens=32, overlap_tokens=8)
+    sentence = words(10) + "."
+    line = " ".join([sentence] * 6)
+
+    chunks = chunker.chunk(line)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(chunk) <= 32 * 4
+    assert all(piece.endswith(".") for chunk in chunks for piece in chunk.split("\n"))
+
+def test_long_sentence_is_split_at_word_boundaries():
+    chunker = ResumeChunker(max_tokens=16, overlap_tokens=4)
+    text = words(60)
+
+    chunks = chunker.chunk(text)
+
+    assert " ".join(" ".join(chunk.split("\n")) for chunk in chunks).split() == text.split()
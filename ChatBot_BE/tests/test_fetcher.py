@@ -0,0 +1,302 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from resume_manager import fetcher as fetcher_module
+from resume_manager.fetcher import SharePointFetcher
+from resume_manager.progress import IngestionCancelled
+
+SITE_ID = "site"
+FOLDER = "Resumes"
+FOLDER_ID = "folder-id"
+
+class FakeGraph:
+    """
+    Stand-in for the Graph endpoints SharePointFetcher uses. `routes` maps a request
+    path (with query string) to a list of responses served in order, the last one
+    repeating; a response is (status, headers, body) with a dict body sent as JSON.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.delays = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        graph = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with graph.lock:
+                    graph.requests.append((self.path, self.headers.get("Authorization")))
+                    responses = graph.routes.get(self.path)
+                    response = (responses.pop(0) if len(responses) > 1 else responses[0]) if responses else None
+                time.sleep(graph.delays.get(self.path, 0))
+                if response is None:
+                    response = (404, {}, {"error": {"code": "itemNotFound"}})
+                status, headers, body = response
+                if isinstance(body, dict):
+                    body = json.dumps(body).encode("utf-8")
+                    headers = {"Content-Type": "application/json", **headers}
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                # Send in small writes so the client really receives a stream
+                for start in range(0, len(body), 4096):
+                    self.wfile.write(body[start:start + 4096])
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/v1.0"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def route(self, path, *responses):
+        self.routes[f"/v1.0{path}"] = list(responses)
+
+    def paths(self):
+        return [path[len("/v1.0"):] if path.startswith("/v1.0/") else path for path, _ in self.requests]
+
+    def file_item(self, item_id, name, content, modified="2024-01-01T00:00:00Z", download_url=True):
+        item = {
+            "id": item_id,
+            "name": name,
+            "file": {},
+            "size": len(content),
+            "lastModifiedDateTime": modified,
+            "eTag": f"{item_id}-{modified}",
+            "cTag": f"{item_id}-{modified}-c",
+            "parentReference": {"id": FOLDER_ID},
+        }
+        if download_url:
+            # Pre-authenticated URLs live on another host in Graph; here they just skip the /v1.0 prefix
+            item["@microsoft.graph.downloadUrl"] = self.base_url.replace("/v1.0", "") + f"/download/{item_id}"
+            self.routes[f"/download/{item_id}"] = [(200, {}, content)]
+        else:
+            self.route(f"/sites/{SITE_ID}/drive/items/{item_id}/content", (200, {}, content))
+        return item
+
+@pytest.fixture
+def graph(tmp_path, monkeypatch):
+    # ResumeMetadataManager keeps its database in the working directory
+    monkeypatch.chdir(tmp_path)
+    fake = FakeGraph()
+    fake.thread.start()
+    yield fake
+    fake.server.shutdown()
+    fake.server.server_close()
+
+def make_fetcher(graph, tmp_path, **kwargs):
+    options = {"max_concurrency": 2, **kwargs}
+    return SharePointFetcher(
+        "token", SITE_ID, FOLDER,
+        download_dir=str(tmp_path / "resumes"),
+        base_url=graph.base_url,
+        delta_state_file=str(tmp_path / "delta.json"),
+        **options
+    )
+
+def route_full_listing(graph, pages, delta_token="t1"):
+    """The children listing split over `pages`, plus the token=latest delta query"""
+    children = f"/sites/{SITE_ID}/drive/root:/{FOLDER}:/children"
+    for number, items in enumerate(pages):
+        page = {"value": items}
+        if number + 1 < len(pages):
+            page["@odata.nextLink"] = f"{graph.base_url}{children}?page={number + 2}"
+        graph.route(children if number == 0 else f"{children}?page={number + 1}", (200, {}, page))
+    graph.route(
+        f"/sites/{SITE_ID}/drive/root/delta?token=latest",
+        (200, {}, {"value": [], "@odata.deltaLink": f"{graph.base_url}/sites/{SITE_ID}/drive/root/delta?token={delta_token}"})
+    )
+
+def test_downloads_run_concurrently(graph, tmp_path):
+    items = [graph.file_item(str(i), f"Resume{i}.pdf", b"resume %d" % i) for i in range(4)]
+    for i in range(4):
+        graph.delays[f"/download/{i}"] = 0.5
+    route_full_listing(graph, [items])
+
+    started = time.monotonic()
+    make_fetcher(graph, tmp_path, max_concurrency=4).fetch_and_update()
+
+    assert time.monotonic() - started < 1.5
+    for i in range(4):
+        assert (tmp_path / "resumes" / f"Resume{i}.pdf").read_bytes() == b"resume %d" % i
+
+def test_download_url_is_fetched_without_bearer_token(graph, tmp_path):
+    pre_authenticated = graph.file_item("1", "Alice.pdf", b"alice")
+    via_graph = graph.file_item("2", "Bob.pdf", b"bob", download_url=False)
+    route_full_listing(graph, [[pre_authenticated, via_graph]])
+
+    make_fetcher(graph, tmp_path).fetch_and_update()
+
+    authorization = dict(graph.requests)
+    assert authorization["/download/1"] is None
+    assert authorization[f"/v1.0/sites/{SITE_ID}/drive/items/2/content"] == "Bearer token"
+
+def test_throttled_request_waits_for_retry_after(graph, tmp_path):
+    item = graph.file_item("1", "Alice.pdf", b"alice")
+    route_full_listing(graph, [[item]])
+    children = f"/sites/{SITE_ID}/drive/root:/{FOLDER}:/children"
+    graph.routes[f"/v1.0{children}"].insert(0, (429, {"Retry-After": "1"}, {"error": {"code": "TooManyRequests"}}))
+
+    started = time.monotonic()
+    make_fetcher(graph, tmp_path).fetch_and_update()
+
+    assert time.monotonic() - started >= 1
+    assert graph.paths().count(children) == 2
+    assert (tmp_path / "resumes" / "Alice.pdf").exists()
+
+def test_throttling_gives_up_after_max_retries(graph, tmp_path, monkeypatch):
+    monkeypatch.setattr(fetcher_module, "MAX_THROTTLE_RETRIES", 1)
+    children = f"/sites/{SITE_ID}/drive/root:/{FOLDER}:/children"
+    route_full_listing(graph, [])
+    graph.route(children, (503, {"Retry-After": "0"}, {"error": {"code": "serviceNotAvailable"}}))
+
+    with pytest.raises(requests.HTTPError) as error:
+        make_fetcher(graph, tmp_path).fetch_and_update()
+    assert error.value.response.status_code == 503
+    assert graph.paths().count(children) == 2
+
+def test_download_streams_to_disk_with_hash(graph, tmp_path, monkeypatch):
+    monkeypatch.setattr(fetcher_module, "DOWNLOAD_CHUNK_SIZE", 1024)
+    content = os.urandom(64 * 1024)
+    graph.file_item("1", "Large.pdf", content)
+    fetcher = make_fetcher(graph, tmp_path)
+
+    chunks = []
+    original_check_stop = fetcher._check_stop
+    monkeypatch.setattr(fetcher, "_check_stop", lambda: chunks.append(1) or original_check_stop())
+    temp_path, file_hash, size = fetcher._download_file(f"{graph.base_url.replace('/v1.0', '')}/download/1", "Large.pdf")
+
+    assert size == len(content)
+    assert file_hash == hashlib.sha256(content).hexdigest()
+    assert len(chunks) >= len(content) // 1024
+    with open(temp_path, "rb") as f:
+        assert f.read() == content
+    assert temp_path.endswith(fetcher_module.PARTIAL_SUFFIX)
+
+def test_stop_event_interrupts_download_and_removes_partial_file(graph, tmp_path, monkeypatch):
+    monkeypatch.setattr(fetcher_module, "DOWNLOAD_CHUNK_SIZE", 1024)
+    alice = graph.file_item("1", "Alice.pdf", os.urandom(32 * 1024))
+    route_full_listing(graph, [[alice]])
+    stop = threading.Event()
+    stop.set()
+
+    with pytest.raises(IngestionCancelled):
+        make_fetcher(graph, tmp_path, stop_event=stop).fetch_and_update()
+
+    assert os.listdir(tmp_path / "resumes") == []
+    assert not (tmp_path / "delta.json").exists()
+
+def read_delta_state(tmp_path):
+    with open(tmp_path / "delta.json", encoding="utf-8") as f:
+        return json.load(f)[f"{SITE_ID}:{FOLDER}"]
+
+def test_full_sync_follows_next_link_pages(graph, tmp_path):
+    first = graph.file_item("1", "Alice[5y_0m].pdf", b"alice resume")
+    second = graph.file_item("2", "Bob-QA.pdf", b"bob resume", download_url=False)
+    route_full_listing(graph, [[first], [second]])
+
+    fetcher = make_fetcher(graph, tmp_path)
+    fetcher.fetch_and_update()
+
+    resumes = tmp_path / "resumes"
+    assert (resumes / "Alice[5y_0m].pdf").read_bytes() == b"alice resume"
+    assert (resumes / "Bob-QA.pdf").read_bytes() == b"bob resume"
+    assert f"/sites/{SITE_ID}/drive/root:/{FOLDER}:/children?page=2" in graph.paths()
+    assert fetcher.metadata_manager.metadata["Alice[5y_0m].pdf"]["candidate_name"] == "Alice"
+    assert read_delta_state(tmp_path).endswith("token=t1")
+
+def test_delta_sync_applies_changes_and_deletions(graph, tmp_path):
+    alice = graph.file_item("1", "Alice.pdf", b"alice v1")
+    bob = graph.file_item("2", "Bob.pdf", b"bob")
+    route_full_listing(graph, [[alice, bob]])
+    make_fetcher(graph, tmp_path).fetch_and_update()
+
+    graph.requests.clear()
+    changed = graph.file_item("1", "Alice.pdf", b"alice v2", modified="2024-02-01T00:00:00Z")
+    unrelated = dict(graph.file_item("9", "Other.pdf", b"x"), parentReference={"id": "another-folder"})
+    graph.route(f"/sites/{SITE_ID}/drive/root:/{FOLDER}", (200, {}, {"id": FOLDER_ID}))
+    graph.route(f"/sites/{SITE_ID}/drive/root/delta?token=t1", (200, {}, {
+        "value": [changed, {"id": "2", "deleted": {}}],
+        "@odata.nextLink": f"{graph.base_url}/sites/{SITE_ID}/drive/root/delta?token=t1&page=2",
+    }))
+    graph.route(f"/sites/{SITE_ID}/drive/root/delta?token=t1&page=2", (200, {}, {
+        "value": [unrelated],
+        "@odata.deltaLink": f"{graph.base_url}/sites/{SITE_ID}/drive/root/delta?token=t2",
+    }))
+
+    fetcher = make_fetcher(graph, tmp_path)
+    fetcher.fetch_and_update()
+
+    resumes = tmp_path / "resumes"
+    assert (resumes / "Alice.pdf").read_bytes() == b"alice v2"
+    assert not (resumes / "Bob.pdf").exists()
+    assert not (resumes / "Other.pdf").exists()
+    assert "Bob.pdf" not in fetcher.metadata_manager.metadata
+    assert f"/sites/{SITE_ID}/drive/root:/{FOLDER}:/children" not in graph.paths()
+    assert read_delta_state(tmp_path).endswith("token=t2")
+
+def test_expired_delta_link_falls_back_to_full_listing(graph, tmp_path):
+    alice = graph.file_item("1", "Alice.pdf", b"alice")
+    route_full_listing(graph, [[alice]])
+    make_fetcher(graph, tmp_path).fetch_and_update()
+
+    graph.route(f"/sites/{SITE_ID}/drive/root:/{FOLDER}", (200, {}, {"id": FOLDER_ID}))
+    graph.route(f"/sites/{SITE_ID}/drive/root/delta?token=t1", (410, {}, {"error": {"code": "resyncRequired"}}))
+    route_full_listing(graph, [[alice]], delta_token="t3")
+    graph.requests.clear()
+
+    make_fetcher(graph, tmp_path).fetch_and_update()
+
+    assert f"/sites/{SITE_ID}/drive/root:/{FOLDER}:/children" in graph.paths()
+    # Unchanged files are not downloaded again
+    assert "/download/1" not in graph.paths()
+    assert read_delta_state(tmp_path).endswith("token=t3")
+
+def test_failed_download_keeps_previous_delta_link(graph, tmp_path):
+    alice = graph.file_item("1", "Alice.pdf", b"alice")
+    route_full_listing(graph, [[alice]])
+    graph.routes["/download/1"] = [(500, {}, b"")]
+
+    make_fetcher(graph, tmp_path).fetch_and_update()
+
+    assert not (tmp_path / "delta.json").exists()
+    assert not (tmp_path / "resumes" / "Alice.pdf").exists()
+
+def test_full_listing_removes_files_no_longer_listed(graph, tmp_path):
+    alice = graph.file_item("1", "Alice.pdf", b"alice")
+    bob = graph.file_item("2", "Bob.pdf", b"bob")
+    route_full_listing(graph, [[alice, bob]])
+    make_fetcher(graph, tmp_path, use_delta=False).fetch_and_update()
+
+    route_full_listing(graph, [[alice]])
+    fetcher = make_fetcher(graph, tmp_path, use_delta=False)
+    fetcher.fetch_and_update()
+
+    assert (tmp_path / "resumes" / "Alice.pdf").exists()
+    assert not (tmp_path / "resumes" / "Bob.pdf").exists()
+    assert list(fetcher.metadata_manager.metadata) == ["Alice.pdf"]
+
+def test_empty_full_listing_keeps_known_resumes(graph, tmp_path):
+    alice = graph.file_item("1", "Alice.pdf", b"alice")
+    route_full_listing(graph, [[alice]])
+    make_fetcher(graph, tmp_path).fetch_and_update()
+    (tmp_path / "delta.json").unlink()
+
+    route_full_listing(graph, [[]], delta_token="t2")
+    fetcher = make_fetcher(graph, tmp_path)
+    fetcher.fetch_and_update()
+
+    assert (tmp_path / "resumes" / "Alice.pdf").read_bytes() == b"alice"
+    assert list(fetcher.metadata_manager.metadata) == ["Alice.pdf"]
+    # The suspicious listing is not trusted as a baseline for later delta syncs
+    assert not (tmp_path / "delta.json").exists()
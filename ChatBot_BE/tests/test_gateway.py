@@ -0,0 +1,184 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import AuthenticationError, RateLimitError
+
+from openai_clients.gateway import AzureOpenAIGateway, RateLimitQueueTimeout, TokenBucket
+
+def api_error(error_class, status, headers=None):
+    response = httpx.Response(status, headers=headers or {}, request=httpx.Request("POST", "https://example.test"))
+    return error_class("error", response=response, body=None)
+
+class FakeCompletions:
+    """chat.completions stand-in: raises the queued errors first, then answers"""
+
+    def __init__(self, errors=(), delay=0.0, total_tokens=42):
+        self.errors = list(errors)
+        self.delay = delay
+        self.total_tokens = total_tokens
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, model, messages, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.errors:
+                raise self.errors.pop(0)
+            return SimpleNamespace(usage=SimpleNamespace(total_tokens=self.total_tokens))
+        finally:
+            self.in_flight -= 1
+
+class FakeRegistry:
+    def __init__(self, completions=None):
+        self.client = SimpleNamespace(chat=SimpleNamespace(completions=completions)) if completions else None
+        self.failures = []
+
+    def get_async(self, name):
+        return self.client
+
+    def error(self, name):
+        return "not configured"
+
+    def mark_failed(self, name, error):
+        self.failures.append((name, error))
+
+def gateway(completions=None, **kwargs):
+    return AzureOpenAIGateway(FakeRegistry(completions), "general", **kwargs)
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+# ---- TokenBucket -------------------------------------------------------------------
+
+def test_bucket_admits_within_capacity_immediately():
+    async def scenario():
+        bucket = TokenBucket(600)
+        started = time.monotonic()
+        await bucket.acquire(600, started + 1)
+        return time.monotonic() - started
+    assert run(scenario()) < 0.05
+
+def test_bucket_waits_for_refill():
+    async def scenario():
+        bucket = TokenBucket(600)  # refills 10 tokens per second
+        await bucket.acquire(600, time.monotonic() + 1)
+        started = time.monotonic()
+        await bucket.acquire(3, started + 2)
+        return time.monotonic() - started
+    assert 0.25 <= run(scenario()) < 1
+
+def test_bucket_rejects_without_waiting_when_deadline_is_too_close():
+    async def scenario():
+        bucket = TokenBucket(600)
+        await bucket.acquire(600, time.monotonic() + 1)
+        started = time.monotonic()
+        with pytest.raises(RateLimitQueueTimeout):
+            await bucket.acquire(100, started + 1)
+        return time.monotonic() - started
+    assert run(scenario()) < 0.05
+
+def test_bucket_clamps_requests_larger_than_capacity():
+    async def scenario():
+        bucket = TokenBucket(60)
+        await bucket.acquire(10_000, time.monotonic() + 1)
+        return bucket.tokens
+    assert run(scenario()) == pytest.approx(0, abs=0.1)
+
+def test_bucket_settle_returns_unused_estimate():
+    async def scenario():
+        bucket = TokenBucket(600)
+        await bucket.acquire(500, time.monotonic() + 1)
+        bucket.settle(500, 100)
+        return bucket.tokens
+    assert run(scenario()) == pytest.approx(500, abs=1)
+
+def test_bucket_pause_holds_admissions():
+    async def scenario():
+        bucket = TokenBucket(600)
+        bucket.pause(0.3)
+        started = time.monotonic()
+        await bucket.acquire(1, started + 1)
+        return time.monotonic() - started
+    assert run(scenario()) >= 0.3
+
+# ---- AzureOpenAIGateway ------------------------------------------------------------
+
+def test_chat_settles_usage():
+    completions = FakeCompletions(total_tokens=42)
+    gw = gateway(completions, tpm_limit=6000)
+
+    gw.chat_sync("gpt", MESSAGES, max_tokens=10)
+
+    stats = gw.stats()
+    assert stats["requests"] == 1
+    assert stats["tokens_used"] == 42
+    assert stats["tpm"]["available"] == pytest.approx(6000 - 42, abs=5)
+
+def test_429_pauses_for_retry_after_and_retries():
+    completions = FakeCompletions(errors=[api_error(RateLimitError, 429, {"retry-after": "0.3"})])
+    gw = gateway(completions, rpm_limit=600, max_queue_wait=5)
+
+    started = time.monotonic()
+    gw.chat_sync("gpt", MESSAGES)
+
+    assert time.monotonic() - started >= 0.3
+    assert completions.calls == 2
+    assert gw.stats()["rate_limited"] == 1
+    assert gw.stats()["requests"] == 1
+
+def test_429_beyond_queue_budget_is_raised():
+    completions = FakeCompletions(errors=[api_error(RateLimitError, 429, {"retry-after": "30"})])
+    gw = gateway(completions, rpm_limit=600, max_queue_wait=1)
+
+    with pytest.raises(RateLimitError):
+        gw.chat_sync("gpt", MESSAGES)
+    assert completions.calls == 1
+
+def test_request_over_quota_is_rejected_after_queue_budget():
+    gw = gateway(FakeCompletions(), rpm_limit=1, max_queue_wait=0.2)
+
+    gw.chat_sync("gpt", MESSAGES)
+    with pytest.raises(RateLimitQueueTimeout):
+        gw.chat_sync("gpt", MESSAGES)
+    assert gw.stats()["rejected"] == 1
+
+def test_concurrency_is_limited():
+    completions = FakeCompletions(delay=0.1)
+    gw = gateway(completions, max_concurrency=2)
+
+    async def burst():
+        await asyncio.gather(*(gw.chat("gpt", MESSAGES) for _ in range(6)))
+
+    run(burst())
+    assert completions.calls == 6
+    assert completions.max_in_flight == 2
+
+def test_authentication_error_disables_client():
+    gw = gateway(FakeCompletions(errors=[api_error(AuthenticationError, 401)]))
+
+    with pytest.raises(AuthenticationError):
+        gw.chat_sync("gpt", MESSAGES)
+    assert gw.registry.failures and gw.registry.failures[0][0] == "general"
+
+def test_unavailable_client_raises():
+    with pytest.raises(ValueError, match="not configured"):
+        gateway().chat_sync("gpt", MESSAGES)
+
+@pytest.mark.parametrize("headers, attempt, expected", [
+    ({"retry-after-ms": "250", "retry-after": "9"}, 0, 0.25),
+    ({"retry-after": "3"}, 0, 3.0),
+    ({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}, 1, 4.0),
+    ({}, 2, 8.0),
+])
+def test_retry_after(headers, attempt, expected):
+    error = api_error(RateLimitError, 429, headers)
+    assert AzureOpenAIGateway._retry_after(error, attempt) == pytest.approx(expected)
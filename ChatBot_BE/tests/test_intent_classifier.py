@@ -0,0 +1,27 @@
+import json
+
+from intent_classifier.model import IntentClassifier
+
+def read_messages(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["message"] for line in f]
+
+def test_traffic_log_is_off_by_default(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    classifier = IntentClassifier(model_path="")
+
+    classifier.record_llm_label("my phone is 555-0100", None, "conversational")
+
+    assert list(tmp_path.iterdir()) == []
+
+def test_traffic_log_rotates_at_size_limit(tmp_path):
+    log = tmp_path / "traffic.jsonl"
+    classifier = IntentClassifier(model_path="", traffic_log=str(log), traffic_log_max_bytes=100)
+
+    for i in range(6):
+        classifier.record_llm_label(f"message number {i}", ("resume_query", 0.5), "resume_query")
+
+    rotated = tmp_path / "traffic.jsonl.1"
+    assert log.stat().st_size <= 100 + 60
+    assert rotated.stat().st_size <= 100 + 60
+    assert read_messages(rotated) + read_messages(log) == [f"message number {i}" for i in range(2, 6)]
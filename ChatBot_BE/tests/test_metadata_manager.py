@@ -0,0 +1,145 @@
+import json
+
+import pytest
+
+from resume_manager import metadata_manager
+from resume_manager.metadata_manager import ResumeMetadataManager
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "metadata.sqlite3"), str(tmp_path / "resume_metadata.json")
+
+@pytest.fixture
+def manager(paths):
+    return ResumeMetadataManager(*paths)
+
+def record(manager, filename, **overrides):
+    values = {
+        "last_modified": "2024-01-01T00:00:00Z",
+        "file_size": 100,
+        "file_hash": "hash",
+        "candidate_name": filename.split(".")[0],
+        "c_tag": None,
+        "e_tag": None,
+        "item_id": None,
+        **overrides,
+    }
+    manager.update_metadata(filename, **values)
+
+def test_legacy_json_is_migrated_once(paths, tmp_path):
+    db_path, json_path = paths
+    legacy = {
+        "Alice.pdf": {"last_modified": "2024-01-01T00:00:00Z", "file_size": 10, "file_hash": "a", "candidate_name": "Alice"},
+        "Bob.pdf": {"last_modified": "2024-01-02T00:00:00Z", "file_size": 20, "file_hash": "b", "candidate_name": "Bob"},
+    }
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(legacy, f)
+
+    manager = ResumeMetadataManager(db_path, json_path)
+
+    assert manager.load_metadata()["Alice.pdf"]["file_hash"] == "a"
+    assert manager.metadata["Bob.pdf"]["candidate_name"] == "Bob"
+    assert manager.metadata["Bob.pdf"]["c_tag"] is None
+    assert not (tmp_path / "resume_metadata.json").exists()
+    assert (tmp_path / "resume_metadata.json.migrated").exists()
+
+def test_reopen_keeps_entries_and_does_not_reimport(paths):
+    db_path, json_path = paths
+    record(ResumeMetadataManager(db_path, json_path), "Alice.pdf")
+    # A stale JSON file showing up later must not overwrite the database
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"Stale.pdf": {"file_hash": "x"}}, f)
+
+    reopened = ResumeMetadataManager(db_path, json_path)
+
+    assert list(reopened.metadata) == ["Alice.pdf"]
+    assert ResumeMetadataManager(db_path, json_path).metadata["Alice.pdf"]["file_hash"] == "hash"
+
+def test_metadata_view(manager):
+    record(manager, "Bob.pdf")
+    record(manager, "Alice.pdf", item_id="1")
+
+    assert list(manager.metadata) == ["Alice.pdf", "Bob.pdf"]
+    assert len(manager.metadata) == 2
+    assert "Alice.pdf" in manager.metadata
+    assert "Carol.pdf" not in manager.metadata
+    with pytest.raises(KeyError):
+        manager.metadata["Carol.pdf"]
+    assert [entry["file_name"] for entry in manager.metadata.values()] == ["Alice.pdf", "Bob.pdf"]
+    assert manager.item_id_index() == {"1": "Alice.pdf"}
+    assert set(manager.get_many(["Alice.pdf", "Carol.pdf"])) == {"Alice.pdf"}
+
+def test_remove_and_update_remote_version(manager):
+    record(manager, "Alice.pdf")
+    record(manager, "Bob.pdf")
+
+    manager.remove_metadata("Bob.pdf")
+    manager.update_remote_version("Alice.pdf", "2024-03-01T00:00:00Z", c_tag="c2", e_tag="e2", item_id="1")
+
+    assert list(manager.metadata) == ["Alice.pdf"]
+    entry = manager.metadata["Alice.pdf"]
+    assert (entry["last_modified"], entry["c_tag"], entry["e_tag"], entry["item_id"], entry["file_hash"]) == \
+        ("2024-03-01T00:00:00Z", "c2", "e2", "1", "hash")
+
+def test_record_item_ids_backfills(manager):
+    record(manager, "Alice.pdf")
+    manager.record_item_ids({"Alice.pdf": "1", "Unknown.pdf": "2"})
+    assert manager.item_id_index() == {"1": "Alice.pdf"}
+
+@pytest.mark.parametrize("stored, listed, expected", [
+    ({"c_tag": "c1"}, {"c_tag": "c1", "last_modified": "changed"}, True),
+    ({"c_tag": "c1"}, {"c_tag": "c2"}, False),
+    ({"e_tag": "e1"}, {"e_tag": "e1", "last_modified": "changed"}, True),
+    ({}, {}, True),
+    ({}, {"last_modified": "changed"}, False),
+    ({}, {"file_size": 101}, False),
+])
+def test_is_remote_unchanged(manager, stored, listed, expected):
+    record(manager, "Alice.pdf", **stored)
+    listing = {"last_modified": "2024-01-01T00:00:00Z", "file_size": 100, "c_tag": None, "e_tag": None, **listed}
+    assert manager.is_remote_unchanged("Alice.pdf", **listing) is expected
+
+def test_unknown_file_is_not_unchanged(manager):
+    assert not manager.is_remote_unchanged("Alice.pdf", "2024-01-01T00:00:00Z", 100)
+
+def test_check_if_update_needed(manager):
+    record(manager, "Alice.pdf")
+    assert not manager.check_if_update_needed("Alice.pdf", "2024-01-01T00:00:00Z", "hash")
+    assert manager.check_if_update_needed("Alice.pdf", "2024-01-01T00:00:00Z", "other")
+
+def test_batch_commits_on_exit(paths):
+    manager = ResumeMetadataManager(*paths)
+    with manager.batch():
+        record(manager, "Alice.pdf")
+        with manager.batch():
+            record(manager, "Bob.pdf")
+        # Nested blocks do not commit; another connection sees nothing yet
+        assert len(ResumeMetadataManager(*paths).metadata) == 0
+
+    assert list(ResumeMetadataManager(*paths).metadata) == ["Alice.pdf", "Bob.pdf"]
+
+def test_batch_rolls_back_on_exception(paths):
+    manager = ResumeMetadataManager(*paths)
+    record(manager, "Alice.pdf")
+
+    with pytest.raises(RuntimeError):
+        with manager.batch():
+            manager.remove_metadata("Alice.pdf")
+            record(manager, "Bob.pdf")
+            raise RuntimeError("sync failed")
+
+    assert list(manager.metadata) == ["Alice.pdf"]
+    assert list(ResumeMetadataManager(*paths).metadata) == ["Alice.pdf"]
+
+def test_batch_commits_periodically(paths, monkeypatch):
+    monkeypatch.setattr(metadata_manager, "BATCH_COMMIT_SIZE", 2)
+    manager = ResumeMetadataManager(*paths)
+
+    with pytest.raises(RuntimeError):
+        with manager.batch():
+            for name in ("A.pdf", "B.pdf", "C.pdf"):
+                record(manager, name)
+            raise RuntimeError("sync failed")
+
+    # The first two writes were committed by the periodic commit; the third was rolled back
+    assert list(ResumeMetadataManager(*paths).metadata) == ["A.pdf", "B.pdf"]
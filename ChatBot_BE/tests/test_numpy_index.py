@@ -0,0 +1,130 @@
+import os
+
+import numpy as np
+import pytest
+
+from resume_manager import numpy_index
+from resume_manager.numpy_index import NumpyVectorIndex
+
+DIM = 8
+
+def unit(i):
+    vector = np.zeros(DIM)
+    vector[i] = 1.0
+    return vector.tolist()
+
+@pytest.fixture
+def index(tmp_path):
+    return NumpyVectorIndex(str(tmp_path / "index"))
+
+@pytest.fixture
+def small_capacity(monkeypatch):
+    monkeypatch.setattr(numpy_index, "INITIAL_CAPACITY", 4)
+
+def vector_files(path):
+    return sorted(name for name in os.listdir(path) if name.endswith(".npy"))
+
+def test_query_returns_nearest_with_cosine_distance(index):
+    index.upsert(["a", "b", "c"], [unit(0), unit(1), [1, 1, 0, 0, 0, 0, 0, 0]],
+                 documents=["doc a", "doc b", "doc c"], metadatas=[{"n": 1}, {"n": 2}, {"n": 3}])
+
+    results = index.query([unit(0)], n_results=2)
+
+    assert results["ids"] == [["a", "c"]]
+    assert results["documents"] == [["doc a", "doc c"]]
+    assert results["metadatas"] == [[{"n": 1}, {"n": 3}]]
+    assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-6)
+    assert results["distances"][0][1] == pytest.approx(1 - 1 / np.sqrt(2), abs=1e-6)
+
+def test_query_applies_where_filter(index):
+    index.upsert(["a", "b"], [unit(0), [0.9, 0.1, 0, 0, 0, 0, 0, 0]],
+                 metadatas=[{"role_qa": False}, {"role_qa": True}])
+
+    results = index.query([unit(0)], n_results=5, where={"role_qa": True})
+
+    assert results["ids"] == [["b"]]
+
+def test_empty_index(index):
+    assert index.count() == 0
+    assert index.query([unit(0)], n_results=3)["ids"] == [[]]
+
+def test_get_and_delete(index):
+    index.upsert(["a", "b", "c"], [unit(0), unit(1), unit(2)], metadatas=[{"k": 1}, {"k": 2}, {"k": 2}])
+
+    index.delete(where={"k": 2})
+
+    assert index.count() == 1
+    assert index.get()["ids"] == ["a"]
+    assert index.query([unit(1)], n_results=3)["ids"] == [["a"]]
+
+def test_reupsert_replaces_vector_and_metadata(index):
+    index.upsert(["a", "b"], [unit(0), unit(1)], metadatas=[{"v": 1}, {}])
+    index.upsert(["a"], [unit(2)], metadatas=[{"v": 2}])
+
+    assert index.count() == 2
+    assert index.query([unit(2)], n_results=1)["ids"] == [["a"]]
+    assert index.get(ids=["a"])["metadatas"] == [{"v": 2}]
+    assert index.get(ids=["a"], include=("embeddings",))["embeddings"][0] == pytest.approx(unit(2))
+
+def test_dimension_mismatch_is_rejected(index):
+    index.upsert(["a"], [unit(0)])
+    with pytest.raises(ValueError):
+        index.upsert(["b"], [[1.0, 0.0]])
+
+def test_quantization_must_match_stored_index(tmp_path):
+    NumpyVectorIndex(str(tmp_path / "index")).upsert(["a"], [unit(0)])
+    with pytest.raises(ValueError):
+        NumpyVectorIndex(str(tmp_path / "index"), quantization="int8")
+
+def test_int8_quantization_keeps_ranking(tmp_path):
+    index = NumpyVectorIndex(str(tmp_path / "index"), quantization="int8")
+    index.upsert(["a", "b"], [[1, 0.2, 0, 0, 0, 0, 0, 0], unit(1)])
+
+    results = index.query([unit(0)], n_results=2)
+
+    assert results["ids"] == [["a", "b"]]
+    assert results["distances"][0][0] == pytest.approx(1 - 1 / np.sqrt(1.04), abs=0.01)
+
+def test_growing_compacts_rows_and_keeps_one_vectors_file(index, small_capacity):
+    for i in range(6):
+        index.upsert(["a"], [unit(i)])
+    index.upsert(["b", "c", "d"], [unit(5), unit(6), unit(7)])
+
+    assert index.count() == 4
+    assert len(vector_files(index.path)) == 1
+    for record_id, i in (("a", 5), ("c", 6), ("d", 7)):
+        assert index.get(ids=[record_id], include=("embeddings",))["embeddings"][0] == pytest.approx(unit(i))
+
+def test_other_instances_see_writes(tmp_path, small_capacity):
+    path = str(tmp_path / "index")
+    writer, reader = NumpyVectorIndex(path), NumpyVectorIndex(path)
+    writer.upsert(["a"], [unit(0)])
+    assert reader.query([unit(0)], n_results=1)["ids"] == [["a"]]
+
+    writer.upsert(["b", "c", "d", "e"], [unit(1), unit(2), unit(3), unit(4)])
+
+    assert reader.count() == 5
+    assert reader.query([unit(4)], n_results=1)["ids"] == [["e"]]
+    assert NumpyVectorIndex(path).query([unit(3)], n_results=1)["ids"] == [["d"]]
+
+def test_failed_upsert_leaves_committed_vectors_untouched(index):
+    index.upsert(["a", "b"], [unit(0), unit(1)])
+
+    with pytest.raises(TypeError):
+        index.upsert(["a", "z"], [unit(5), unit(6)], metadatas=[{}, {"bad": object()}])
+
+    assert index.count() == 2
+    assert index.get(ids=["a"], include=("embeddings",))["embeddings"][0] == pytest.approx(unit(0))
+    assert index.query([unit(0)], n_results=1)["ids"] == [["a"]]
+
+def test_failed_growing_upsert_keeps_previous_file(index, small_capacity):
+    index.upsert(["a", "b", "c"], [unit(0), unit(1), unit(2)])
+    files = vector_files(index.path)
+
+    with pytest.raises(TypeError):
+        index.upsert(["a", "d"], [unit(5), unit(6)], metadatas=[{}, {"bad": object()}])
+
+    assert vector_files(index.path) == files
+    reopened = NumpyVectorIndex(index.path)
+    for record_id, i in (("a", 0), ("b", 1), ("c", 2)):
+        assert reopened.get(ids=[record_id], include=("embeddings",))["embeddings"][0] == pytest.approx(unit(i))
@@ -0,0 +1,41 @@
+import docx
+import pytest
+
+from resume_manager.parser import ResumeParser
+
+@pytest.fixture
+def resume_dir(tmp_path):
+    document = docx.Document()
+    document.add_paragraph("Jane Doe")
+    document.add_paragraph("Skills: Python, SQL Server")
+    document.save(str(tmp_path / "JaneDoe.docx"))
+    return tmp_path
+
+def test_parse_resume_reads_docx(resume_dir):
+    assert ResumeParser(str(resume_dir)).parse_resume("JaneDoe.docx") == "Jane Doe\nSkills: Python, SQL Server"
+
+def test_parse_resume_rejects_unsupported_format(resume_dir):
+    (resume_dir / "notes.txt").write_text("hello")
+    with pytest.raises(ValueError):
+        ResumeParser(str(resume_dir)).parse_resume("notes.txt")
+
+def test_parse_many_parses_in_worker_processes(resume_dir):
+    results = list(ResumeParser(str(resume_dir)).parse_many(["JaneDoe.docx", "missing.docx"], workers=2))
+
+    by_name = {filename: (text, error) for filename, text, error in results}
+    assert by_name["JaneDoe.docx"] == ("Jane Doe\nSkills: Python, SQL Server", None)
+    text, error = by_name["missing.docx"]
+    assert text is None
+    assert "not found" in error
+
+def test_parse_many_times_out_and_continues(resume_dir):
+    results = list(ResumeParser(str(resume_dir)).parse_many(["JaneDoe.docx", "JaneDoe.docx"], workers=1, timeout=0))
+
+    assert len(results) == 2
+    for filename, text, error in results:
+        assert filename == "JaneDoe.docx"
+        assert text is None
+        assert "timed out" in error
+
+def test_parse_many_without_files_yields_nothing(resume_dir):
+    assert list(ResumeParser(str(resume_dir)).parse_many([])) == []
@@ -0,0 +1,186 @@
+import gc
+import struct
+import threading
+
+import pytest
+
+from sql_connector.pool import CachedAccessToken, SqlConnectionPool, encode_access_token
+
+class FakeConnection:
+    def __init__(self, healthy=True, rollback_fails=False):
+        self.healthy = healthy
+        self.rollback_fails = rollback_fails
+        self.closed = False
+        self.rollbacks = 0
+
+    def cursor(self):
+        if not self.healthy:
+            raise RuntimeError("connection is broken")
+        return FakeCursor()
+
+    def rollback(self):
+        if self.rollback_fails:
+            raise RuntimeError("rollback failed")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+class FakeCursor:
+    def execute(self, sql, params=()):
+        self.sql = sql
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        pass
+
+class Connector:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.connections = []
+
+    def __call__(self):
+        connection = FakeConnection(**self.kwargs)
+        self.connections.append(connection)
+        return connection
+
+def test_closed_connection_is_reused():
+    connect = Connector()
+    pool = SqlConnectionPool(connect, max_size=2)
+
+    with pool.acquire() as conn:
+        conn.cursor()
+    with pool.acquire():
+        pass
+
+    assert len(connect.connections) == 1
+    assert connect.connections[0].rollbacks == 2
+    assert pool.stats()["created"] == 1
+    assert pool.stats()["reused"] == 1
+
+def test_close_is_idempotent():
+    pool = SqlConnectionPool(Connector(), max_size=1)
+    conn = pool.acquire()
+    conn.close()
+    conn.close()
+    assert pool.stats()["idle"] == 1
+
+def test_acquire_times_out_when_pool_is_exhausted():
+    pool = SqlConnectionPool(Connector(), max_size=1, acquire_timeout=0.1)
+    held = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    held.close()
+    pool.acquire().close()
+
+def test_waiting_caller_gets_released_connection():
+    pool = SqlConnectionPool(Connector(), max_size=1, acquire_timeout=5)
+    held = pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    held.close()
+    waiter.join(timeout=5)
+    assert len(acquired) == 1
+    assert pool.stats()["created"] == 1
+
+def test_failed_rollback_discards_connection():
+    connect = Connector(rollback_fails=True)
+    pool = SqlConnectionPool(connect, max_size=1)
+    pool.acquire().close()
+    assert connect.connections[0].closed
+    assert pool.stats()["open"] == 0
+    assert pool.stats()["discarded"] == 1
+
+def test_failed_connect_frees_slot():
+    def connect():
+        raise ConnectionError("login failed")
+    pool = SqlConnectionPool(connect, max_size=1, acquire_timeout=0.1)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            pool.acquire()
+    assert pool.stats()["open"] == 0
+
+def test_unhealthy_idle_connection_is_replaced():
+    connect = Connector()
+    pool = SqlConnectionPool(connect, max_size=1, health_check_interval=0)
+    pool.acquire().close()
+    connect.connections[0].healthy = False
+
+    pool.acquire().close()
+
+    assert len(connect.connections) == 2
+    assert connect.connections[0].closed
+    assert pool.stats()["discarded"] == 1
+
+def test_expired_idle_connections_are_closed():
+    connect = Connector()
+    pool = SqlConnectionPool(connect, max_size=2, max_idle_seconds=0)
+    pool.acquire().close()
+
+    pool.acquire().close()
+
+    assert connect.connections[0].closed
+    assert pool.stats()["created"] == 2
+
+def test_dropped_connection_gives_up_its_slot():
+    connect = Connector()
+    pool = SqlConnectionPool(connect, max_size=1, acquire_timeout=0.1)
+
+    def leak():
+        leaked = pool.acquire()
+        try:
+            raise RuntimeError("query failed before close()")
+        finally:
+            del leaked
+
+    with pytest.raises(RuntimeError):
+        leak()
+    gc.collect()
+
+    assert connect.connections[0].closed
+    assert pool.stats()["open"] == 0
+    pool.acquire().close()
+
+def test_close_all_closes_idle_connections():
+    connect = Connector()
+    pool = SqlConnectionPool(connect, max_size=2)
+    first, second = pool.acquire(), pool.acquire()
+    first.close()
+    second.close()
+
+    pool.close_all()
+
+    assert all(connection.closed for connection in connect.connections)
+    assert pool.stats()["open"] == 0
+
+def test_access_token_is_cached_until_refresh_margin():
+    calls = []
+
+    def acquire():
+        calls.append(1)
+        return {"access_token": f"token-{len(calls)}", "expires_in": 3600}
+
+    token = CachedAccessToken(acquire, refresh_margin=300)
+    assert token.get() == "token-1"
+    assert token.get() == "token-1"
+    token.invalidate()
+    assert token.get() == "token-2"
+
+    calls.clear()
+    short_lived = CachedAccessToken(lambda: calls.append(1) or {"access_token": "t", "expires_in": 60}, refresh_margin=300)
+    short_lived.get()
+    short_lived.get()
+    assert len(calls) == 2
+
+def test_access_token_error_is_raised():
+    token = CachedAccessToken(lambda: {"error": "invalid_client", "error_description": "bad secret"})
+    with pytest.raises(Exception, match="invalid_client"):
+        token.get()
+
+def test_encode_access_token():
+    encoded = encode_access_token("abc")
+    assert struct.unpack("<I", encoded[:4])[0] == 6
+    assert encoded[4:].decode("utf-16-le") == "abc"
@@ -0,0 +1,65 @@
+import pytest
+
+from resume_manager.profile_extractor import (
+    build_resume_filter, extract_candidate_name, extract_experience_years, infer_resume_filter_args, matches_filter
+)
+
+@pytest.mark.parametrize("filename, expected", [
+    ("_JaiSudhakar[5y_1m].pdf", "JaiSudhakar"),
+    ("AneshPeruvalappu_15Y_QA Mgr.pdf", "AneshPeruvalappu"),
+    ("Ananth _ QA Manager.pdf", "Ananth"),
+    ("Abirami-BI lead.pdf", "Abirami"),
+    ("AbhilashSharab[3y_8m] (1).pdf", "AbhilashSharab"),
+    ("Akshata_Rajoor_Resume (1).docx", "Akshata_Rajoor"),
+    ("Ankit Singh_5.6Y_FSD.pdf", "Ankit Singh"),
+])
+def test_extract_candidate_name(filename, expected):
+    assert extract_candidate_name(filename) == expected
+
+@pytest.mark.parametrize("filename, text, expected", [
+    ("Jai[5y_6m].pdf", "", 5.5),
+    ("Anesh_15Y_QA Mgr.pdf", "", 15.0),
+    ("Jane.pdf", "Over 8+ years of experience in testing", 8.0),
+    ("Jane.pdf", "Graduated in 2015", None),
+])
+def test_extract_experience_years(filename, text, expected):
+    assert extract_experience_years(filename, text) == expected
+
+@pytest.mark.parametrize("query, expected", [
+    ("QA managers with 10+ years", {"min_experience_years": 10.0, "roles": ["qa", "manager"]}),
+    ("QA managers with 5 years or more", {"min_experience_years": 5.0, "roles": ["qa", "manager"]}),
+    ("testers with at least 4 yrs", {"min_experience_years": 4.0, "roles": ["qa"]}),
+    ("architects with 8 years of experience plus", {"min_experience_years": 8.0, "roles": ["architect"]}),
+    ("developers with 3-5 years", {"min_experience_years": 3.0, "max_experience_years": 5.0}),
+    ("3 to 6 years of experience", {"min_experience_years": 3.0, "max_experience_years": 6.0}),
+    ("designers with up to 2 years", {"max_experience_years": 2.0, "roles": ["designer"]}),
+    ("java developer 5 years", {}),
+    ("project managers", {"roles": ["project_manager"]}),
+    ("who can lead a project", {}),
+    ("meeting at 5 pm", {}),
+    ("python role: qa, lead", {"roles": ["qa", "lead"]}),
+])
+def test_infer_resume_filter_args(query, expected):
+    assert infer_resume_filter_args(query) == expected
+
+def test_build_resume_filter():
+    assert build_resume_filter() is None
+    assert build_resume_filter(min_experience_years=5) == {"experience_years": {"$gte": 5.0}}
+    assert build_resume_filter(min_experience_years=3, max_experience_years=5, roles=["QA", "project manager"]) == {
+        "$and": [
+            {"experience_years": {"$gte": 3.0}},
+            {"experience_years": {"$lte": 5.0}},
+            {"role_qa": True},
+            {"role_project_manager": True},
+        ]
+    }
+
+def test_build_resume_filter_rejects_unknown_role():
+    with pytest.raises(ValueError):
+        build_resume_filter(roles=["astronaut"])
+
+def test_inferred_filter_matches_profiles():
+    where = build_resume_filter(**infer_resume_filter_args("QA managers with 3-5 years"))
+    assert matches_filter({"experience_years": 4.0, "role_qa": True, "role_manager": True}, where)
+    assert not matches_filter({"experience_years": 6.0, "role_qa": True, "role_manager": True}, where)
+    assert not matches_filter({"role_qa": True, "role_manager": True}, where)